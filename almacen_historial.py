@@ -0,0 +1,340 @@
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+# --- ALMACÉN DEL HISTORIAL DE PRONÓSTICOS ---
+# SQLite con índice por id de partido (clave primaria) y por fecha de pronóstico.
+# Las inserciones son incrementales y cada escritura es una transacción atómica.
+# Varios escritores a la vez (sesiones de la app, el servicio en otro proceso): modo WAL,
+# una conexión por hilo para que las lecturas no esperen a nadie y escrituras con
+# BEGIN IMMEDIATE, que toman el bloqueo de escritura de SQLite al empezar y esperan hasta
+# TIEMPO_ESPERA_BLOQUEO si otro lo tiene. Guardar fusiona: un id que ya está no se pisa
+# (el primero que lo guarda gana y no se pierde su liquidación).
+# La primera vez que se abre importa el antiguo historial_pronosticos.json.
+# La tabla resultados guarda los marcadores finales con los que se liquidan los pronósticos.
+
+CAMPOS = ('fecha_pronostico', 'equipos', 'resultado_probable', 'cuota', 'liga', 'deporte', 'estado', 'marcador',
+          'mercado', 'linea')
+
+# Estado de un pronóstico hasta y después de conocerse el resultado
+PENDIENTE, GANADO, PERDIDO = 'pendiente', 'ganado', 'perdido'
+
+# Columnas añadidas después de la primera versión del esquema
+COLUMNAS_NUEVAS = {'deporte': 'TEXT', 'estado': f"TEXT NOT NULL DEFAULT '{PENDIENTE}'", 'marcador': 'TEXT',
+                   'mercado': "TEXT NOT NULL DEFAULT 'h2h'", 'linea': 'REAL'}
+
+TIEMPO_ESPERA_BLOQUEO = 30  # segundos que una escritura espera a que otra termine
+
+class AlmacenHistorial(Mapping):
+    """Historial de pronósticos con acceso indexado: se consulta como un dict {id: pronóstico}"""
+
+    def __init__(self, ruta, ruta_json=None):
+        self.ruta = ruta
+        self.ruta_json = ruta_json
+        self._local = threading.local()
+        self._preparado = False
+        self._lock = threading.Lock()
+        # Los hilos de un mismo proceso hacen cola aquí, por orden; entre procesos decide SQLite
+        # (su espera reintenta a intervalos crecientes y deja a los que llegan tarde sin turno)
+        self._lock_escritura = threading.Lock()
+
+    def _conexion(self):
+        """Conexión del hilo actual; la primera del proceso crea el esquema y migra el JSON antiguo"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None: las transacciones se abren a mano con _transaccion()
+            conn = sqlite3.connect(self.ruta, timeout=TIEMPO_ESPERA_BLOQUEO, isolation_level=None,
+                                   check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            try:
+                with self._lock:
+                    if not self._preparado:
+                        self._crear_esquema()
+                        self._migrar_json()
+                        self._preparado = True
+            except BaseException:
+                self._local.conn = None
+                conn.close()
+                raise
+        return conn
+
+    @contextmanager
+    def _transaccion(self):
+        """Transacción de escritura: el bloqueo se toma al empezar, no al primer INSERT"""
+        conn = self._conexion()
+        with self._lock_escritura:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _crear_esquema(self):
+        # Dentro de una transacción: dos procesos que arrancan a la vez no repiten los ALTER TABLE
+        with self._transaccion() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pronosticos (
+                    id TEXT PRIMARY KEY,
+                    fecha_pronostico TEXT NOT NULL,
+                    equipos TEXT NOT NULL,
+                    resultado_probable TEXT NOT NULL,
+                    cuota REAL NOT NULL,
+                    liga TEXT
+                )
+            """)
+            existentes = {fila['name'] for fila in conn.execute("PRAGMA table_info(pronosticos)")}
+            for columna, tipo in COLUMNAS_NUEVAS.items():
+                if columna not in existentes:
+                    conn.execute(f"ALTER TABLE pronosticos ADD COLUMN {columna} {tipo}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_fecha_pronostico ON pronosticos (fecha_pronostico)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_estado ON pronosticos (estado)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_liga ON pronosticos (liga)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS resultados (
+                    id TEXT PRIMARY KEY,
+                    deporte TEXT,
+                    goles_local INTEGER NOT NULL,
+                    goles_visitante INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+
+    def _migrar_json(self):
+        """Importa una sola vez el historial en formato JSON"""
+        conn = self._conexion()
+        if conn.execute("SELECT 1 FROM meta WHERE clave = 'json_migrado'").fetchone():
+            return
+        entradas = {}
+        if self.ruta_json and os.path.exists(self.ruta_json):
+            try:
+                with open(self.ruta_json, 'r', encoding='utf-8') as f:
+                    entradas = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"No se pudo migrar {self.ruta_json}: {e}")
+                return
+        with self._transaccion() as conn:
+            # Otro proceso puede haber migrado mientras se leía el JSON
+            if conn.execute("SELECT 1 FROM meta WHERE clave = 'json_migrado'").fetchone():
+                return
+            # Las claves de fecha antiguas ("2025-07-14": []) no contienen pronósticos
+            conn.executemany(
+                f"INSERT OR IGNORE INTO pronosticos {self._COLUMNAS}",
+                [self._fila(id_partido, p) for id_partido, p in entradas.items() if isinstance(p, dict)]
+            )
+            conn.execute("INSERT INTO meta VALUES ('json_migrado', '1')")
+
+    _COLUMNAS = f"(id, {', '.join(CAMPOS)}) VALUES ({', '.join('?' * (len(CAMPOS) + 1))})"
+
+    @staticmethod
+    def _fila(id_partido, pronostico):
+        valores = {campo: pronostico.get(campo) for campo in CAMPOS}
+        valores['estado'] = valores['estado'] or PENDIENTE
+        valores['mercado'] = valores['mercado'] or 'h2h'
+        return (id_partido, *valores.values())
+
+    @staticmethod
+    def _entrada(fila):
+        return {campo: fila[campo] for campo in CAMPOS}
+
+    # --- Lectura (interfaz de dict) ---
+
+    def __contains__(self, id_partido):
+        return self._conexion().execute(
+            "SELECT 1 FROM pronosticos WHERE id = ?", (id_partido,)
+        ).fetchone() is not None
+
+    def __getitem__(self, id_partido):
+        fila = self._conexion().execute(
+            "SELECT * FROM pronosticos WHERE id = ?", (id_partido,)
+        ).fetchone()
+        if fila is None:
+            raise KeyError(id_partido)
+        return self._entrada(fila)
+
+    def __iter__(self):
+        ids = [fila[0] for fila in self._conexion().execute("SELECT id FROM pronosticos")]
+        return iter(ids)
+
+    def __len__(self):
+        return self._conexion().execute("SELECT COUNT(*) FROM pronosticos").fetchone()[0]
+
+    def items(self):
+        filas = self._conexion().execute("SELECT * FROM pronosticos").fetchall()
+        return [(fila['id'], self._entrada(fila)) for fila in filas]
+
+    def values(self):
+        return [entrada for _, entrada in self.items()]
+
+    def existentes(self, ids, tam_bloque=500):
+        """Devuelve el subconjunto de ids que ya están en el historial (consultas por bloques)"""
+        ids = list(ids)
+        encontrados = set()
+        conn = self._conexion()
+        for inicio in range(0, len(ids), tam_bloque):
+            bloque = ids[inicio:inicio + tam_bloque]
+            marcadores = ','.join('?' * len(bloque))
+            encontrados.update(
+                fila[0] for fila in conn.execute(f"SELECT id FROM pronosticos WHERE id IN ({marcadores})", bloque)
+            )
+        return encontrados
+
+    def por_fecha(self, fecha_pronostico):
+        """Devuelve los pronósticos hechos en una fecha (YYYY-MM-DD)"""
+        filas = self._conexion().execute(
+            "SELECT * FROM pronosticos WHERE fecha_pronostico = ? ORDER BY rowid", (fecha_pronostico,)
+        ).fetchall()
+        return [self._entrada(fila) for fila in filas]
+
+    def revision(self):
+        """Contador que aumenta con cada escritura (sirve para invalidar cachés, también entre procesos)"""
+        fila = self._conexion().execute("SELECT valor FROM meta WHERE clave = 'revision'").fetchone()
+        return int(fila[0]) if fila else 0
+
+    def fechas(self, limite=None):
+        """Devuelve las fechas con pronósticos, de la más reciente a la más antigua"""
+        consulta = "SELECT DISTINCT fecha_pronostico FROM pronosticos ORDER BY fecha_pronostico DESC"
+        if limite is not None:
+            filas = self._conexion().execute(consulta + " LIMIT ?", (limite,)).fetchall()
+        else:
+            filas = self._conexion().execute(consulta).fetchall()
+        return [fila[0] for fila in filas]
+
+    # --- Consultas paginadas ---
+
+    @staticmethod
+    def _filtro(desde=None, hasta=None, ligas=None, estados=None, mercados=None):
+        """Cláusula WHERE y parámetros para un rango de fechas (YYYY-MM-DD), ligas, estados y mercados"""
+        condiciones, parametros = [], []
+        if desde:
+            condiciones.append("fecha_pronostico >= ?")
+            parametros.append(desde)
+        if hasta:
+            condiciones.append("fecha_pronostico <= ?")
+            parametros.append(hasta)
+        for columna, valores in (('liga', ligas), ('estado', estados), ('mercado', mercados)):
+            if valores:
+                condiciones.append(f"{columna} IN ({','.join('?' * len(valores))})")
+                parametros.extend(valores)
+        return (" WHERE " + " AND ".join(condiciones) if condiciones else ""), parametros
+
+    def consultar(self, desde=None, hasta=None, ligas=None, estados=None, limite=50, desplazamiento=0, mercados=None):
+        """[(id, pronóstico)] de una página (limite=None: todos), de la fecha más reciente a la más antigua"""
+        donde, parametros = self._filtro(desde, hasta, ligas, estados, mercados)
+        filas = self._conexion().execute(
+            f"SELECT * FROM pronosticos{donde} ORDER BY fecha_pronostico DESC, rowid LIMIT ? OFFSET ?",
+            (*parametros, -1 if limite is None else limite, desplazamiento)
+        ).fetchall()
+        return [(fila['id'], self._entrada(fila)) for fila in filas]
+
+    def contar(self, desde=None, hasta=None, ligas=None, estados=None, mercados=None):
+        """Número de pronósticos que cumplen los filtros de consultar()"""
+        donde, parametros = self._filtro(desde, hasta, ligas, estados, mercados)
+        return self._conexion().execute(f"SELECT COUNT(*) FROM pronosticos{donde}", parametros).fetchone()[0]
+
+    def ligas(self):
+        """Ligas con algún pronóstico, en orden alfabético"""
+        filas = self._conexion().execute(
+            "SELECT DISTINCT liga FROM pronosticos WHERE liga IS NOT NULL ORDER BY liga"
+        ).fetchall()
+        return [fila[0] for fila in filas]
+
+    # --- Escritura ---
+
+    @staticmethod
+    def _incrementar_revision(conn):
+        conn.execute("""
+            INSERT INTO meta VALUES ('revision', '1')
+            ON CONFLICT (clave) DO UPDATE SET valor = CAST(valor AS INTEGER) + 1
+        """)
+
+    def agregar(self, pronosticos, maximo_por_fecha=None):
+        """Inserta {id: pronóstico} en una sola transacción y devuelve los ids añadidos
+
+        Los ids que ya están se dejan como están (los guardó otra sesión u otro proceso). Con
+        maximo_por_fecha no se pasa de ese número de pronósticos por fecha_pronostico, contando
+        los que ya hay: la cuenta y la inserción van en la misma transacción, así que dos
+        escritores a la vez no pueden superarlo.
+        """
+        filas = [self._fila(id_partido, p) for id_partido, p in pronosticos.items() if isinstance(p, dict)]
+        with self._transaccion() as conn:
+            ya_guardados = self.existentes(fila[0] for fila in filas)
+            filas = [fila for fila in filas if fila[0] not in ya_guardados]
+            if maximo_por_fecha is not None:
+                filas = self._recortar_por_fecha(conn, filas, maximo_por_fecha)
+            if filas:
+                conn.executemany(f"INSERT INTO pronosticos {self._COLUMNAS}", filas)
+                self._incrementar_revision(conn)
+        return [fila[0] for fila in filas]
+
+    @staticmethod
+    def _recortar_por_fecha(conn, filas, maximo):
+        """Las primeras filas de cada fecha que caben hasta `maximo` con las ya guardadas"""
+        libres = {}
+        seleccion = []
+        for fila in filas:
+            fecha = fila[1]
+            if fecha not in libres:
+                guardados = conn.execute(
+                    "SELECT COUNT(*) FROM pronosticos WHERE fecha_pronostico = ?", (fecha,)
+                ).fetchone()[0]
+                libres[fecha] = maximo - guardados
+            if libres[fecha] > 0:
+                libres[fecha] -= 1
+                seleccion.append(fila)
+        return seleccion
+
+    def limpiar(self):
+        """Elimina todos los pronósticos (la migración del JSON no se repite)"""
+        with self._transaccion() as conn:
+            conn.execute("DELETE FROM pronosticos")
+            self._incrementar_revision(conn)
+
+    # --- Liquidación ---
+
+    def pendientes(self, hasta_fecha=None):
+        """[(id, pronóstico)] sin liquidar; con hasta_fecha (YYYY-MM-DD) solo los partidos de esa fecha o anteriores"""
+        filas = self._conexion().execute(
+            "SELECT * FROM pronosticos WHERE estado = ?", (PENDIENTE,)
+        ).fetchall()
+        # La fecha del partido es el sufijo del id (crear_id_partido)
+        return [(fila['id'], self._entrada(fila)) for fila in filas
+                if hasta_fecha is None or fila['id'][-10:] <= hasta_fecha]
+
+    def guardar_resultados(self, marcadores):
+        """Guarda marcadores finales {id: (deporte, goles_local, goles_visitante)}"""
+        filas = [(id_partido, *marcador) for id_partido, marcador in marcadores.items()]
+        with self._transaccion() as conn:
+            conn.executemany("INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?)", filas)
+        return len(filas)
+
+    def resultados(self, ids=None, tam_bloque=500):
+        """{id: (goles_local, goles_visitante)} de todos los partidos o solo de los ids dados"""
+        conn = self._conexion()
+        if ids is None:
+            filas = conn.execute("SELECT id, goles_local, goles_visitante FROM resultados").fetchall()
+        else:
+            ids, filas = list(ids), []
+            for inicio in range(0, len(ids), tam_bloque):
+                bloque = ids[inicio:inicio + tam_bloque]
+                filas += conn.execute(
+                    f"SELECT id, goles_local, goles_visitante FROM resultados "
+                    f"WHERE id IN ({','.join('?' * len(bloque))})", bloque
+                ).fetchall()
+        return {fila[0]: (fila[1], fila[2]) for fila in filas}
+
+    def liquidar(self, estados):
+        """Marca pronósticos como ganados o perdidos: {id: (estado, marcador)}"""
+        filas = [(estado, marcador, id_partido) for id_partido, (estado, marcador) in estados.items()]
+        if not filas:
+            return 0
+        with self._transaccion() as conn:
+            conn.executemany("UPDATE pronosticos SET estado = ?, marcador = ? WHERE id = ?", filas)
+            self._incrementar_revision(conn)
+        return len(filas)
@@ -6,6 +6,8 @@ import pandas as pd
 # Importamos todo tu código backend como un módulo
 # Es crucial que tu archivo original se llame 'backend.py'
 import backend 
+import configuracion
+from registro_ligas import FEM
 
 # --- CONFIGURACIÓN DE LA PÁGINA DE STREAMLIT ---
 st.set_page_config(
@@ -15,6 +17,16 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# --- CONFIGURACIÓN (con diagnóstico) ---
+try:
+    configuracion.obtener_api_key()
+except configuracion.ConfiguracionError as e:
+    # Esto hará que la app falle, pero con un mensaje nuestro muy claro.
+    st.error(f"ERROR CRÍTICO: {e}")
+    # Mostramos qué secretos SÍ encuentra (solo los nombres), para depurar.
+    st.warning(f"Secretos encontrados: {configuracion.claves_secretos_streamlit()}")
+    st.stop() # Detiene la ejecución de la app aquí.
+
 # --- ESTILOS CSS PERSONALIZADOS (Opcional, para mejorar la estética) ---
 st.markdown("""
 <style>
@@ -43,133 +55,271 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# --- CACHÉ DE LLAMADAS AL BACKEND (compartida por todas las sesiones del servidor) ---
+
+# Segundos que se reutiliza la lista de ligas activas antes de volver a la API
+TTL_LIGAS_ACTIVAS = backend.CACHE_TTL
+
+@st.cache_data(ttl=TTL_LIGAS_ACTIVAS, show_spinner=False)
+def ligas_activas_cacheadas():
+    return backend.obtener_ligas_activas()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def pagina_historial(revision, pagina, desde, hasta, ligas, estados):
+    # La revisión forma parte de la clave: cualquier escritura en el historial invalida la caché.
+    # Solo se lee la página visible, no el historial entero
+    entradas, total = backend.pagina_historial(pagina, desde=desde, hasta=hasta, ligas=ligas, estados=estados)
+    df = pd.DataFrame([{
+        "Fecha": p['fecha_pronostico'],
+        "Partido": p['equipos'],
+        "Liga": p['liga'],
+        "Pronóstico": p['resultado_probable'],
+        "Cuota": p['cuota'],
+        "Resultado": f"{p['marcador'] or ''} {backend.ICONOS_LIQUIDACION[p['estado']]}".strip(),
+    } for p in entradas])
+    return df, total
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def ligas_historial(revision):
+    return backend.ligas_historial()
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def rendimiento_historial(revision):
+    return backend.rendimiento_historial()
+
 # --- FUNCIONES DE LA INTERFAZ ---
 
+ICONOS_ESTADO = {
+    backend.ESTADO_DESCARGADA: "📥",
+    backend.ESTADO_CACHE: "💾",
+    backend.ESTADO_VACIA: "⚪",
+    backend.ESTADO_ERROR: "❌",
+}
+
+def tabla_candidatos(partidos):
+    return pd.DataFrame([{
+        "Partido": p['equipos'],
+        "Liga": p['liga'],
+        "Fecha": p['fecha'],
+        "Pronóstico": p['resultado_probable'],
+        "Cuota": p['cuota'],
+        "Probabilidad (%)": p['probabilidad_implicita'],
+    } for p in partidos])
+
+def tabla_estados(estados):
+    return pd.DataFrame([
+        {"Liga": deporte, "Estado": f"{ICONOS_ESTADO.get(estado, '')} {estado}", "Partidos": num_partidos}
+        for deporte, (estado, num_partidos) in estados.items()
+    ])
+
+def cancelar_analisis():
+    # Pulsar el botón relanza el script, lo que detiene el análisis en curso;
+    # lo ya calculado sigue en session_state
+    st.session_state['analisis']['cancelado'] = True
+
+def guardar_analisis():
+    analisis = st.session_state['analisis']
+    # Solo se añaden los que no estén ya: otra sesión puede haber guardado los mismos partidos
+    analisis['guardado'] = len(backend.registrar_pronosticos(analisis['top'], analisis['fecha'].strftime('%Y-%m-%d')))
+    pagina_historial.clear()
+
+def ejecutar_analisis():
+    # 1. Cargar historial para no repetir
+    historial = backend.cargar_historial()
+    fecha_hoy = date.today()
+
+    # 2. Descartar las ligas fuera de temporada con el listado gratuito de la API
+    deportes = backend.deportes_a_consultar()
+
+    analisis = {
+        'fecha': fecha_hoy, 'num_ligas': len(deportes), 'estados': {}, 'top': [], 'total': 0,
+        'completado': False, 'cancelado': False, 'guardado': False
+    }
+    st.session_state['analisis'] = analisis
+
+    # 3. Descargar y procesar en una sola pasada mostrando los mejores candidatos según llegan las ligas
+    st.button("⏹️ Cancelar (conserva los resultados parciales)", on_click=cancelar_analisis)
+    progreso = st.progress(0)
+    clasificacion = st.empty()
+    with st.expander("📡 Estado por liga"):
+        estados = st.empty()
+
+    for i, (deporte, estado, num_partidos, selector) in enumerate(backend.analizar_ligas(deportes, historial=historial, fecha_hoy=fecha_hoy)):
+        analisis['estados'][deporte] = (estado, num_partidos)
+        analisis['top'] = selector.mejores()
+        analisis['total'] = selector.total
+        progreso.progress((i + 1) / len(deportes), text=f"Consultando: {deporte}")
+        if analisis['top']:
+            clasificacion.dataframe(tabla_candidatos(analisis['top']), use_container_width=True, hide_index=True)
+        estados.dataframe(tabla_estados(analisis['estados']), use_container_width=True, hide_index=True)
+
+    analisis['completado'] = True
+    progreso.empty()
+    clasificacion.empty()
+
+def mostrar_resultado_analisis(analisis):
+    fecha_hoy = analisis['fecha']
+    top_partidos = analisis['top']
+
+    if analisis['completado'] and not any(num for _, num in analisis['estados'].values()):
+        st.warning("No se encontraron ligas con partidos disponibles en este momento.")
+        return
+
+    if not analisis['completado']:
+        # Sin el botón de cancelar, otra interacción con la página relanzó el script a medias
+        motivo = "cancelado" if analisis['cancelado'] else "interrumpido"
+        st.warning(f"⏹️ Análisis {motivo} tras {len(analisis['estados'])} de {analisis['num_ligas']} ligas. Se muestran los resultados parciales.")
+
+    if not analisis['total']:
+        st.error("❌ No se encontraron partidos nuevos para pronosticar.")
+        st.info(f"Posibles razones: Todos los partidos próximos ya fueron pronosticados, no hay partidos en los próximos {backend.DIAS_VENTANA} días, o hubo un error en la API.")
+        return
+
+    if analisis['completado']:
+        st.success(f"✅ Análisis completado. Se encontraron {analisis['total']} partidos nuevos.")
+    st.subheader(f"🏆 Top {len(top_partidos)} Pronósticos - {fecha_hoy.strftime('%d/%m/%Y')}")
+
+    # 4. Mostrar resultados de forma atractiva
+    for p in top_partidos:
+        with st.container():
+            col1, col2, col3 = st.columns([3, 2, 2])
+            with col1:
+                st.markdown(f"**🏟️ {p['equipos']}**")
+                st.caption(f"📅 {p['fecha']} | 🏆 {p['liga']}")
+            with col2:
+                st.metric(label="⭐ Pronóstico", value=p['resultado_probable'])
+            with col3:
+                st.metric(label="📊 Probabilidad (Cuota)", value=f"{p['probabilidad_implicita']}% ({p['cuota']})")
+                st.caption(f"💰 Mejor cuota: {p['mejor_cuota']} en {p['casa_mejor_cuota']} · {p['num_casas']} casas")
+            st.divider()
+
+    # 5. Guardar en el historial (los resultados parciales solo si el usuario lo pide)
+    if analisis['completado'] and analisis['guardado'] is False:
+        guardar_analisis()
+    if analisis['guardado'] is not False:
+        repetidos = len(analisis['top']) - analisis['guardado']
+        aviso = f" ({repetidos} ya estaban guardados)" if repetidos else ""
+        st.success(f"💾 {analisis['guardado']} pronósticos guardados en `{backend.HISTORIAL_DB}`{aviso}")
+    else:
+        st.button("💾 Guardar pronósticos parciales", on_click=guardar_analisis)
+
+    with st.expander("📡 Estado por liga"):
+        st.dataframe(tabla_estados(analisis['estados']), use_container_width=True, hide_index=True)
+
 def mostrar_pronosticos():
     st.header("🎯 Generar Pronóstico Diario")
-    st.markdown("Busca en todas las ligas activas los 5 partidos con el resultado más probable en los próximos 7 días.")
+    st.markdown(f"Busca en todas las ligas activas los {backend.TOP_K} partidos con el resultado más probable en los próximos {backend.DIAS_VENTANA} días.")
 
     if st.button("🚀 Iniciar Análisis"):
-        with st.spinner('🔍 Analizando ligas y partidos... Esto puede tardar unos minutos.'):
-            # 1. Cargar historial para no repetir
-            historial = backend.cargar_historial()
-            fecha_hoy = date.today()
-
-            # 2. Obtener ligas activas (más eficiente)
-            ligas_activas = backend.obtener_ligas_activas()
-            if not ligas_activas:
-                st.warning("No se encontraron ligas con partidos disponibles en este momento.")
-                return
-
-            # 3. Obtener y procesar partidos de todas las ligas activas
-            todos_los_partidos = []
-            progreso = st.progress(0)
-            for i, deporte in enumerate(ligas_activas):
-                partidos_raw = backend.obtener_partidos_deporte(deporte)
-                partidos_procesados = backend.procesar_partidos(partidos_raw, historial, fecha_hoy)
-                todos_los_partidos.extend(partidos_procesados)
-                progreso.progress((i + 1) / len(ligas_activas), text=f"Consultando: {deporte}")
-            
-            progreso.empty()
-
-            if not todos_los_partidos:
-                st.error("❌ No se encontraron partidos nuevos para pronosticar.")
-                st.info("Posibles razones: Todos los partidos próximos ya fueron pronosticados, no hay partidos en los próximos 7 días, o hubo un error en la API.")
-                return
-            
-            # 4. Ordenar y seleccionar los mejores
-            partidos_ordenados = sorted(todos_los_partidos, key=lambda x: x['cuota'])
-            top_partidos = partidos_ordenados[:5]
-
-        st.success(f"✅ Análisis completado. Se encontraron {len(todos_los_partidos)} partidos nuevos.")
-        st.subheader(f"🏆 Top 5 Pronósticos - {fecha_hoy.strftime('%d/%m/%Y')}")
-
-        # 5. Mostrar resultados de forma atractiva
-        for p in top_partidos:
-            with st.container():
-                col1, col2, col3 = st.columns([3, 2, 2])
-                with col1:
-                    st.markdown(f"**🏟️ {p['equipos']}**")
-                    st.caption(f"📅 {p['fecha']} | 🏆 {p['liga']}")
-                with col2:
-                    st.metric(label="⭐ Pronóstico", value=p['resultado_probable'])
-                with col3:
-                    st.metric(label="📊 Probabilidad (Cuota)", value=f"{p['probabilidad_implicita']}% ({p['cuota']})")
-                st.divider()
-
-        # 6. Guardar en el historial
-        fecha_str = fecha_hoy.strftime('%Y-%m-%d')
-        if fecha_str not in historial:
-            historial[fecha_str] = []
-        
-        for partido in top_partidos:
-            historial[partido['id']] = {
-                'fecha_pronostico': fecha_str,
-                'equipos': partido['equipos'],
-                'resultado_probable': partido['resultado_probable'],
-                'cuota': partido['cuota'],
-                'liga': partido['liga']
-            }
-        
-        backend.guardar_historial(historial)
-        st.success(f"💾 Pronósticos guardados en `{backend.HISTORIAL_FILE}`")
+        ejecutar_analisis()
+
+    # El último análisis (completo o cancelado) se conserva entre recargas de la página
+    if 'analisis' in st.session_state:
+        mostrar_resultado_analisis(st.session_state['analisis'])
 
 
 def mostrar_historial():
     st.header("📚 Historial de Pronósticos")
-    historial = backend.cargar_historial()
-    
-    if not any('_vs_' in k for k in historial.keys()):
+    revision = backend.revision_historial()
+    if not len(backend.cargar_historial()):
         st.info("Aún no hay pronósticos en el historial.")
         return
-
-    # Extraer y ordenar pronósticos por fecha
-    pronosticos = [v for k, v in historial.items() if '_vs_' in k]
-    df = pd.DataFrame(pronosticos)
-    df['fecha_pronostico'] = pd.to_datetime(df['fecha_pronostico'])
-    df = df.sort_values(by='fecha_pronostico', ascending=False)
     
-    for fecha, grupo in df.groupby('fecha_pronostico'):
-        with st.expander(f"📅 Pronósticos del {fecha.strftime('%d-%m-%Y')}", expanded=True):
-            for _, partido in grupo.iterrows():
-                st.markdown(f"**{partido['equipos']}** ({partido['liga']})")
-                st.markdown(f"→ **Pronóstico:** {partido['resultado_probable']} (Cuota: {partido['cuota']})")
-                st.divider()
+    mostrar_rendimiento()
+
+    col1, col2, col3 = st.columns(3)
+    rango = col1.date_input("Fechas", value=(), key='historial_fechas')
+    ligas_elegidas = col2.multiselect("Ligas", ligas_historial(revision), key='historial_ligas')
+    estados = col3.multiselect("Resultado", list(backend.ICONOS_LIQUIDACION),
+                               format_func=lambda e: f"{backend.ICONOS_LIQUIDACION[e]} {e}", key='historial_estados')
+    desde = rango[0].strftime('%Y-%m-%d') if len(rango) > 0 else None
+    hasta = rango[-1].strftime('%Y-%m-%d') if len(rango) > 0 else None
+
+    filtros = (desde, hasta, tuple(ligas_elegidas), tuple(estados))
+    if st.session_state.get('historial_filtros') != filtros:
+        # Con otros filtros se vuelve a la primera página
+        st.session_state['historial_filtros'] = filtros
+        st.session_state['historial_pagina'] = 1
+
+    _, total = pagina_historial(revision, 0, *filtros)
+    paginas = max(1, -(-total // backend.TAM_PAGINA_HISTORIAL))
+    st.session_state['historial_pagina'] = min(st.session_state.get('historial_pagina', 1), paginas)
+    pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, key='historial_pagina')
+
+    df, total = pagina_historial(revision, pagina - 1, *filtros)
+    if df.empty:
+        st.info("Ningún pronóstico cumple los filtros.")
+        return
+    st.caption(f"{total} pronósticos")
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+def mostrar_rendimiento():
+    with st.expander("📈 Rendimiento de los pronósticos"):
+        if st.button("Liquidar resultados"):
+            with st.spinner("Descargando marcadores..."):
+                liquidados, pendientes = backend.liquidar_pronosticos()
+            pagina_historial.clear()
+            st.success(f"{liquidados} pronósticos liquidados, {pendientes} sin resultado todavía.")
+
+        rendimiento = rendimiento_historial(backend.revision_historial())
+        if rendimiento is None:
+            st.info("Aún no hay pronósticos liquidados.")
+            return
+        total, por_liga, calibracion = rendimiento
+        fila = total.iloc[0]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Liquidados", int(fila['apuestas']))
+        col2.metric("Tasa de acierto", f"{fila['tasa_acierto']}%")
+        col3.metric("ROI", f"{fila['roi']}%")
+        st.markdown("**Por liga**")
+        st.dataframe(por_liga, use_container_width=True)
+        st.markdown("**Calibración por tramo de cuota**")
+        calibracion.index = calibracion.index.astype(str)
+        st.dataframe(calibracion, use_container_width=True)
 
 def mostrar_estadisticas_ligas():
     st.header("📊 Estadísticas de Competiciones")
     
-    # La lógica de categorización es la misma que en tu backend, pero mostrada con Streamlit
-    regiones = {
-        'Europa': [d for d in backend.DEPORTES if any(x in d for x in ['epl', 'spain', 'italy', 'germany', 'france', 'netherlands', 'portugal', 'uefa', 'scotland'])],
-        'Sudamérica': [d for d in backend.DEPORTES if any(x in d for x in ['brazil', 'argentina', 'colombia', 'conmebol'])],
-        'Norteamérica': [d for d in backend.DEPORTES if any(x in d for x in ['usa', 'mexico', 'concacaf'])],
-        'Asia': [d for d in backend.DEPORTES if any(x in d for x in ['japan', 'australia', 'saudi', 'afc'])],
-        'África': [d for d in backend.DEPORTES if any(x in d for x in ['egypt', 'south_africa', 'caf'])],
-        'Internacionales': [d for d in backend.DEPORTES if any(x in d for x in ['fifa', 'olympics', 'friendlies'])],
-        'Femeninas': [d for d in backend.DEPORTES if any(x in d for x in ['women', 'feminine', 'frauen'])]
-    }
-    
-    # Para no duplicar, calculamos las ligas ya categorizadas
-    categorizadas = set(sum(regiones.values(), []))
-    regiones['Otras Regiones'] = [d for d in backend.DEPORTES if d not in categorizadas]
+    # Mismas cifras que la CLI: todo sale del registro de ligas del backend
+    estadisticas = backend.estadisticas_ligas()
 
-    col1, col2 = st.columns(2)
+    col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("Total de Competiciones", len(backend.DEPORTES))
+    with col2:
+        st.metric("Femeninas", estadisticas['generos'].get(FEM, 0))
+    with col3:
+        st.metric("Primeras divisiones", len(backend.registro_ligas.filtrar(backend.DEPORTES, nivel=1)))
+    st.caption(" · ".join(f"{tipo}: {n}" for tipo, n in estadisticas['tipos'].items()))
     
-    for region, ligas in regiones.items():
-        if not ligas: continue
+    for region, ligas in estadisticas['regiones'].items():
         with st.expander(f"🌍 {region} ({len(ligas)} competiciones)"):
-            df = pd.DataFrame(ligas, columns=["Identificador de la Liga"])
-            st.table(df)
+            filas = [backend.registro_ligas.get(clave) for clave in ligas]
+            df = pd.DataFrame({
+                "Competición": [liga.nombre for liga in filas],
+                "País": [liga.pais for liga in filas],
+                "Nivel": [liga.nivel for liga in filas],
+                "Tipo": [liga.tipo for liga in filas],
+                "Identificador de la Liga": ligas,
+            })
+            st.dataframe(df, use_container_width=True, hide_index=True)
 
 def verificar_ligas_activas():
     st.header("📡 Verificar Ligas Activas")
     st.markdown("Comprueba qué ligas de la configuración tienen partidos disponibles en la API en este momento.")
-    if st.button("Verificar Ahora"):
+    col1, col2 = st.columns([1, 4])
+    with col1:
+        verificar = st.button("Verificar Ahora")
+    with col2:
+        if st.button("🔄 Forzar actualización"):
+            # Incluye las ligas que el planificador tenía en espera
+            backend.planificador.forzar_barrido()
+            ligas_activas_cacheadas.clear()
+            verificar = True
+
+    if verificar:
         with st.spinner("Buscando ligas activas..."):
-            ligas_activas = backend.obtener_ligas_activas()
+            ligas_activas = ligas_activas_cacheadas()
         
         if ligas_activas:
             st.success(f"Se encontraron {len(ligas_activas)} ligas activas de {len(backend.DEPORTES)} configuradas.")
@@ -180,16 +330,69 @@ def verificar_ligas_activas():
 
 def limpiar_historial():
     st.header("🗑️ Limpiar Historial")
-    st.warning("⚠️ ¡Cuidado! Esta acción eliminará permanentemente el archivo `historial_pronosticos.json` y no se puede deshacer.")
+    st.warning(f"⚠️ ¡Cuidado! Esta acción eliminará permanentemente todos los pronósticos de `{backend.HISTORIAL_DB}` y no se puede deshacer.")
     
-    if os.path.exists(backend.HISTORIAL_FILE):
+    if backend.cargar_historial() or os.path.exists(backend.HISTORIAL_FILE):
         if st.button("Eliminar Historial Permanentemente"):
-            os.remove(backend.HISTORIAL_FILE)
+            backend.limpiar_historial()
+            pagina_historial.clear()
             st.success("✅ Historial limpiado con éxito.")
             st.balloons()
     else:
         st.info("No existe un archivo de historial para limpiar.")
 
+def tabla_metricas(filas, nombre):
+    """Filas de una métrica con sus etiquetas como columnas"""
+    return pd.DataFrame([{**f['etiquetas'], **{k: v for k, v in f.items() if k not in ('nombre', 'etiquetas')}}
+                         for f in filas if f['nombre'] == nombre])
+
+def mostrar_diagnostico():
+    datos = backend.metricas.instantanea()
+    if not datos['contadores'] and not datos['medidas']:
+        st.sidebar.caption("Aún no hay métricas: ejecuta un análisis.")
+        return
+
+    # Latencia por liga: las más lentas primero
+    latencias = tabla_metricas(datos['medidas'], 'peticion_segundos')
+    if not latencias.empty:
+        st.sidebar.markdown("**Ligas más lentas (s)**")
+        st.sidebar.dataframe(latencias.sort_values('p95', ascending=False)[['deporte', 'n', 'p50', 'p95', 'max']].head(10),
+                             hide_index=True)
+
+    errores = tabla_metricas(datos['contadores'], 'errores_total')
+    peticiones = tabla_metricas(datos['contadores'], 'peticiones_total')
+    if not peticiones.empty:
+        peticiones = peticiones[peticiones['codigo'] != 200]
+    if not errores.empty or not peticiones.empty:
+        st.sidebar.markdown("**Ligas con fallos**")
+        st.sidebar.dataframe(pd.concat([errores, peticiones.rename(columns={'codigo': 'tipo'})]), hide_index=True)
+
+    descargado = tabla_metricas(datos['contadores'], 'respuesta_bytes_total')
+    if not descargado.empty:
+        transferido = tabla_metricas(datos['contadores'], 'transferencia_bytes_total')
+        bytes_liga = descargado.rename(columns={'valor': 'json_kb'}).merge(
+            transferido.rename(columns={'valor': 'red_kb'}), on='deporte', how='left')
+        bytes_liga[['json_kb', 'red_kb']] = (bytes_liga[['json_kb', 'red_kb']] / 1024).round(1)
+        st.sidebar.markdown("**Bytes por liga (KB)**")
+        st.sidebar.dataframe(bytes_liga.sort_values('json_kb', ascending=False).head(10), hide_index=True)
+
+    partidos = tabla_metricas(datos['contadores'], 'partidos_total')
+    if not partidos.empty:
+        st.sidebar.markdown("**Partidos procesados**")
+        st.sidebar.dataframe(partidos, hide_index=True)
+
+    tiempos = pd.concat([tabla_metricas(datos['medidas'], nombre).assign(medida=nombre)
+                         for nombre in ('escaneo_segundos', 'decodificacion_segundos', 'procesado_segundos',
+                                       'persistencia_segundos')])
+    if not tiempos.empty:
+        st.sidebar.markdown("**¿Dónde se va el tiempo? (s)**")
+        st.sidebar.dataframe(tiempos.fillna(''), hide_index=True)
+
+    archivos = tabla_metricas(datos['valores'], 'archivo_bytes')
+    if not archivos.empty:
+        st.sidebar.markdown("**Archivos de datos (KB)**")
+        st.sidebar.dataframe(archivos.assign(valor=(archivos['valor'] / 1024).round(1)), hide_index=True)
+
 # --- SIDEBAR Y NAVEGACIÓN PRINCIPAL ---
 st.sidebar.title("Menú de Opciones")
 st.sidebar.image("https://cdn-icons-png.flaticon.com/512/857/857454.png", width=100) # Un ícono para decorar
@@ -207,6 +410,9 @@ seleccion = st.sidebar.radio("Elige una acción:", list(opciones.keys()))
 # Ejecutar la función correspondiente a la selección
 opciones[seleccion]()
 
+if st.sidebar.checkbox("🩺 Diagnóstico"):
+    mostrar_diagnostico()
+
 st.sidebar.info(
     "Este proyecto utiliza la API de 'The Odds API'. "
     "Recuerda que las cuotas son solo probabilidades y no garantizan resultados."
@@ -0,0 +1,20 @@
+import json
+import os
+import tempfile
+
+# --- ESCRITURA ATÓMICA DE ARCHIVOS ---
+# Quien lee el archivo (cron, Prometheus, otro proceso) nunca ve uno a medias: se escribe
+# en un temporal del mismo directorio y se renombra encima, que es atómico en el mismo
+# sistema de archivos.
+
+def escribir_json_atomico(ruta, datos, indent=None):
+    """Escribe en un temporal del mismo directorio y lo renombra (nunca queda un archivo a medias)"""
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    fd, temporal = tempfile.mkstemp(dir=directorio, prefix='.tmp_', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False, indent=indent)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.remove(temporal)
+        raise
@@ -1,227 +1,167 @@
-import requests
-import json
-from datetime import datetime, date
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, date, timedelta
+from itertools import islice
 import os
-import streamlit as st
-
-# --- CONFIGURACIÓN (con diagnóstico) ---
-if "API_KEY" in st.secrets:
-    API_KEY = st.secrets["API_KEY"]
-else:
-    # Esto hará que la app falle, pero con un mensaje nuestro muy claro.
-    st.error("ERROR CRÍTICO: La clave 'API_KEY' no se encontró en los secretos de Streamlit Cloud. Por favor, configúrala en el panel de 'Settings > Secrets'.")
-    # Mostramos qué secretos SÍ encuentra, para depurar.
-    st.warning(f"Secretos encontrados: {st.secrets.to_dict()}")
-    st.stop() # Detiene la ejecución de la app aquí.
-
-# TODAS LAS COMPETICIONES DE FÚTBOL DISPONIBLES EN THE ODDS API
-DEPORTES = [
-    # --- LIGAS EUROPEAS PRINCIPALES ---
-    'soccer_epl',                    # Premier League (Inglaterra)
-    'soccer_efl_champ',              # EFL Championship (Inglaterra)
-    'soccer_england_league1',        # League One (Inglaterra)
-    'soccer_england_league2',        # League Two (Inglaterra)
-    'soccer_spain_la_liga',          # La Liga (España)
-    'soccer_spain_segunda_division', # Segunda División (España)
-    'soccer_italy_serie_a',          # Serie A (Italia)
-    'soccer_italy_serie_b',          # Serie B (Italia)
-    'soccer_germany_bundesliga',     # Bundesliga (Alemania)
-    'soccer_germany_bundesliga2',    # 2. Bundesliga (Alemania)
-    'soccer_germany_liga3',          # 3. Liga (Alemania)
-    'soccer_france_ligue_one',       # Ligue 1 (Francia)
-    'soccer_france_ligue_two',       # Ligue 2 (Francia)
-    'soccer_netherlands_eredivisie', # Eredivisie (Países Bajos)
-    'soccer_portugal_primeira_liga', # Primeira Liga (Portugal)
-    'soccer_belgium_first_div',      # First Division A (Bélgica)
-    'soccer_switzerland_superleague', # Super League (Suiza)
-    'soccer_austria_bundesliga',     # Bundesliga (Austria)
-    'soccer_turkey_super_league',    # Süper Lig (Turquía)
-    'soccer_greece_super_league',    # Super League (Grecia)
-    'soccer_denmark_superliga',      # Superliga (Dinamarca)
-    'soccer_sweden_allsvenskan',     # Allsvenskan (Suecia)
-    'soccer_norway_eliteserien',     # Eliteserien (Noruega)
-    'soccer_finland_veikkausliiga',  # Veikkausliiga (Finlandia)
-    'soccer_poland_ekstraklasa',     # Ekstraklasa (Polonia)
-    'soccer_czech_republic_fnl',     # Fortuna Liga (República Checa)
-    'soccer_slovakia_super_liga',    # Super Liga (Eslovaquia)
-    'soccer_hungary_nb_i',           # NB I (Hungría)
-    'soccer_romania_liga_1',         # Liga 1 (Rumania)
-    'soccer_bulgaria_first_league',  # First League (Bulgaria)
-    'soccer_croatia_hnl',            # HNL (Croacia)
-    'soccer_serbia_super_liga',      # Super Liga (Serbia)
-    'soccer_slovenia_prvaliga',      # PrvaLiga (Eslovenia)
-    'soccer_russia_premier_league',  # Premier League (Rusia)
-    'soccer_ukraine_premier_league', # Premier League (Ucrania)
-    
-    # --- COMPETICIONES EUROPEAS ---
-    'soccer_uefa_champs_league',     # Champions League
-    'soccer_uefa_europa_league',     # Europa League
-    'soccer_uefa_europa_conference_league', # Europa Conference League
-    'soccer_uefa_nations_league',    # Nations League
-    'soccer_uefa_euros',             # Eurocopa (cuando esté disponible)
-    'soccer_uefa_euros_qualification', # Clasificación Eurocopa
-    
-    # --- LIGAS SUDAMERICANAS ---
-    'soccer_brazil_campeonato',      # Campeonato Brasileiro Série A
-    'soccer_brazil_serie_b',         # Campeonato Brasileiro Série B
-    'soccer_argentina_primera_division', # Primera División (Argentina)
-    'soccer_chile_primera_division', # Primera División (Chile)
-    'soccer_colombia_primera_a',     # Primera A (Colombia)
-    'soccer_peru_primera_division',  # Primera División (Perú)
-    'soccer_uruguay_primera_division', # Primera División (Uruguay)
-    'soccer_ecuador_primera_a',      # Primera A (Ecuador)
-    'soccer_bolivia_primera_division', # Primera División (Bolivia)
-    'soccer_paraguay_primera_division', # Primera División (Paraguay)
-    'soccer_venezuela_primera_profesional', # Primera Profesional (Venezuela)
-    'soccer_conmebol_copa_libertadores', # Copa Libertadores
-    'soccer_conmebol_copa_sudamericana', # Copa Sudamericana
-    'soccer_copa_america',           # Copa América (cuando esté disponible)
-    'soccer_conmebol_wc_qualification', # Clasificación Mundial CONMEBOL
-    
-    # --- LIGAS NORTEAMERICANAS ---
-    'soccer_usa_mls',                # Major League Soccer (MLS)
-    'soccer_mexico_ligamx',          # Liga MX (México)
-    'soccer_canada_cpl',             # Canadian Premier League
-    'soccer_concacaf_champions_league', # Champions League CONCACAF
-    'soccer_concacaf_gold_cup',      # Copa Oro CONCACAF
-    'soccer_concacaf_nations_league', # Nations League CONCACAF
-    'soccer_concacaf_wc_qualification', # Clasificación Mundial CONCACAF
-    
-    # --- LIGAS ASIÁTICAS ---
-    'soccer_japan_j_league',         # J1 League (Japón)
-    'soccer_japan_j_league_2',       # J2 League (Japón)
-    'soccer_south_korea_k_league_1', # K League 1 (Corea del Sur)
-    'soccer_china_super_league',     # Chinese Super League
-    'soccer_australia_aleague',      # A-League (Australia)
-    'soccer_saudi_arabia_pro_league', # Pro League (Arabia Saudí)
-    'soccer_uae_arabian_gulf_league', # Arabian Gulf League (EAU)
-    'soccer_qatar_stars_league',     # Stars League (Qatar)
-    'soccer_iran_pro_league',        # Pro League (Irán)
-    'soccer_iraq_premier_league',    # Premier League (Irak)
-    'soccer_thailand_premier_league', # Premier League (Tailandia)
-    'soccer_vietnam_v_league',       # V.League 1 (Vietnam)
-    'soccer_malaysia_super_league',  # Super League (Malasia)
-    'soccer_singapore_premier_league', # Premier League (Singapur)
-    'soccer_indonesia_liga_1',       # Liga 1 (Indonesia)
-    'soccer_philippines_pfl',        # Philippines Football League
-    'soccer_india_super_league',     # Indian Super League
-    'soccer_afc_asian_cup',          # Copa Asiática AFC
-    'soccer_afc_wc_qualification',   # Clasificación Mundial AFC
-    
-    # --- LIGAS AFRICANAS ---
-    'soccer_south_africa_premier_division', # Premier Division (Sudáfrica)
-    'soccer_egypt_premier_league',   # Premier League (Egipto)
-    'soccer_morocco_gnf_1',          # Botola Pro (Marruecos)
-    'soccer_tunisia_ligue_1',        # Ligue 1 (Túnez)
-    'soccer_algeria_ligue_1',        # Ligue 1 (Argelia)
-    'soccer_nigeria_npfl',           # Nigeria Professional Football League
-    'soccer_ghana_premier_league',   # Premier League (Ghana)
-    'soccer_kenya_premier_league',   # Premier League (Kenia)
-    'soccer_uganda_premier_league',  # Premier League (Uganda)
-    'soccer_tanzania_premier_league', # Premier League (Tanzania)
-    'soccer_zambia_super_league',    # Super League (Zambia)
-    'soccer_zimbabwe_premier_league', # Premier League (Zimbabwe)
-    'soccer_caf_champions_league',   # Champions League CAF
-    'soccer_caf_confederation_cup',  # Copa Confederación CAF
-    'soccer_caf_african_cup_of_nations', # Copa Africana de Naciones
-    'soccer_caf_wc_qualification',   # Clasificación Mundial CAF
-    
-    # --- OTRAS COMPETICIONES INTERNACIONALES ---
-    'soccer_fifa_world_cup',         # Copa del Mundo FIFA
-    'soccer_fifa_world_cup_qualification', # Clasificación Copa del Mundo
-    'soccer_fifa_confederations_cup', # Copa Confederaciones FIFA
-    'soccer_fifa_club_world_cup',    # Copa del Mundo de Clubes FIFA
-    'soccer_fifa_womens_world_cup',  # Copa del Mundo Femenina FIFA
-    'soccer_olympics_mens',          # Juegos Olímpicos (masculino)
-    'soccer_olympics_womens',        # Juegos Olímpicos (femenino)
-    
-    # --- LIGAS FEMENINAS ---
-    'soccer_fa_wsl',                 # Women's Super League (Inglaterra)
-    'soccer_nwsl',                   # National Women's Soccer League (EE.UU.)
-    'soccer_france_feminine_1',      # Première Ligue (Francia - femenino)
-    'soccer_germany_frauen_bundesliga', # Frauen-Bundesliga (Alemania)
-    'soccer_spain_primera_federacion_femenina', # Primera Federación Femenina (España)
-    'soccer_italy_serie_a_femminile', # Serie A Femminile (Italia)
-    'soccer_netherlands_eredivisie_vrouwen', # Eredivisie Vrouwen (Países Bajos)
-    'soccer_sweden_damallsvenskan',  # Damallsvenskan (Suecia)
-    'soccer_norway_toppserien',      # Toppserien (Noruega)
-    'soccer_denmark_kvindeligaen',   # Kvindeligaen (Dinamarca)
-    'soccer_australia_aleague_women', # A-League Women (Australia)
-    'soccer_brazil_serie_a1_feminino', # Série A1 Feminino (Brasil)
-    'soccer_uefa_womens_euro',       # Eurocopa Femenina UEFA
-    'soccer_uefa_womens_champions_league', # Champions League Femenina UEFA
-    
-    # --- LIGAS MENORES Y REGIONALES ---
-    'soccer_scotland_premiership',   # Premiership (Escocia)
-    'soccer_scotland_championship',  # Championship (Escocia)
-    'soccer_wales_premier_league',   # Premier League (Gales)
-    'soccer_northern_ireland_premiership', # Premiership (Irlanda del Norte)
-    'soccer_ireland_premier_division', # Premier Division (Irlanda)
-    'soccer_iceland_urvalsdeild',    # Úrvalsdeild (Islandia)
-    'soccer_faroe_islands_premier_league', # Premier League (Islas Feroe)
-    'soccer_luxembourg_bgl_ligue',   # BGL Ligue (Luxemburgo)
-    'soccer_malta_premier_league',   # Premier League (Malta)
-    'soccer_cyprus_first_division',  # First Division (Chipre)
-    'soccer_latvia_virsliga',        # Virsliga (Letonia)
-    'soccer_lithuania_a_lyga',       # A Lyga (Lituania)
-    'soccer_estonia_meistriliiga',   # Meistriliiga (Estonia)
-    'soccer_albania_kategoria_superiore', # Kategoria Superiore (Albania)
-    'soccer_north_macedonia_first_league', # First League (Macedonia del Norte)
-    'soccer_montenegro_first_league', # First League (Montenegro)
-    'soccer_bosnia_premier_league',  # Premier League (Bosnia y Herzegovina)
-    'soccer_kosovo_superliga',       # Superliga (Kosovo)
-    'soccer_moldova_super_liga',     # Super Liga (Moldavia)
-    'soccer_georgia_erovnuli_liga',  # Erovnuli Liga (Georgia)
-    'soccer_armenia_premier_league', # Premier League (Armenia)
-    'soccer_azerbaijan_premier_league', # Premier League (Azerbaiyán)
-    'soccer_kazakhstan_premier_league', # Premier League (Kazajistán)
-    'soccer_uzbekistan_super_league', # Super League (Uzbekistán)
-    'soccer_kyrgyzstan_top_league',  # Top League (Kirguistán)
-    'soccer_tajikistan_higher_league', # Higher League (Tayikistán)
-    'soccer_turkmenistan_yokary_liga', # Yokary Liga (Turkmenistán)
-    'soccer_afghanistan_premier_league', # Premier League (Afganistán)
-    'soccer_bangladesh_premier_league', # Premier League (Bangladesh)
-    'soccer_bhutan_premier_league',  # Premier League (Bután)
-    'soccer_cambodia_premier_league', # Premier League (Camboya)
-    'soccer_laos_premier_league',    # Premier League (Laos)
-    'soccer_myanmar_national_league', # National League (Myanmar)
-    'soccer_nepal_super_league',     # Super League (Nepal)
-    'soccer_sri_lanka_premier_league', # Premier League (Sri Lanka)
-    'soccer_maldives_premier_league', # Premier League (Maldivas)
-    'soccer_pakistan_premier_league', # Premier League (Pakistán)
-    
-    # --- COMPETICIONES DE CLUBES ESPECIALES ---
-    'soccer_friendlies',             # Partidos amistosos
-    'soccer_friendlies_clubs',       # Amistosos de clubes
-    'soccer_friendlies_womens',      # Amistosos femeninos
-    'soccer_youth_league',           # UEFA Youth League
-    'soccer_europa_league_qualifying', # Clasificación Europa League
-    'soccer_champions_league_qualifying', # Clasificación Champions League
-    'soccer_conference_league_qualifying', # Clasificación Conference League
-]
+import sys
+import threading
+import time
+
+from almacen_historial import AlmacenHistorial
+from cache_respuestas import CacheRespuestas
+from configuracion import ConfiguracionError, obtener_api_key
+from decodificacion import decodificar_partidos
+from duplicados import IndiceDuplicados
+from metricas import registro as metricas
+from planificador import PlanificadorLigas
+from registro_ligas import registro as registro_ligas
+from seleccion import SelectorTopK
+
+# --- CONFIGURACIÓN ---
+# La clave de la API se lee al hacer la primera petición (ver configuracion.py), de modo que
+# importar este módulo no carga Streamlit, requests ni NumPy y funciona fuera de la app web.
+
+# TODAS LAS COMPETICIONES DE FÚTBOL DISPONIBLES EN THE ODDS API (atributos en registro_ligas.py)
+DEPORTES = registro_ligas.claves()
 
 REGIONS = 'eu'
-MARKETS = 'h2h'
+# Mercados pedidos en la misma llamada (ver mercados.py); cada uno cuenta aparte en la cuota de la API
+MARKETS = 'h2h,totals,spreads'
+
+# Endpoint base de The Odds API (ODDS_API_URL permite apuntar a un servidor local, p. ej. en los benchmarks)
+ODDS_API_URL = os.environ.get('ODDS_API_URL', 'https://api.the-odds-api.com/v4/sports')
 
-# Archivo para guardar el historial de pronósticos
+# Partidos por pronóstico y días hacia delante en los que se buscan partidos
+TOP_K = 5
+DIAS_VENTANA = 7
+
+# Estado de cada liga tras consultarla
+ESTADO_DESCARGADA = 'descargada'
+ESTADO_CACHE = 'caché'
+ESTADO_VACIA = 'vacía'
+ESTADO_ERROR = 'error'
+
+# Consultas simultáneas a la API y tiempo máximo (segundos) por petición
+MAX_CONCURRENCIA = 8
+TIMEOUT_PETICION = 15
+
+# Base de datos del historial de pronósticos (el JSON antiguo se importa la primera vez)
+HISTORIAL_DB = 'historial_pronosticos.db'
 HISTORIAL_FILE = 'historial_pronosticos.json'
 
+almacen_historial = AlmacenHistorial(HISTORIAL_DB, ruta_json=HISTORIAL_FILE)
+
+# Caché en disco de las respuestas de la API (segundos de validez y tamaño máximo)
+CACHE_FILE = 'cache_cuotas.db'
+CACHE_TTL = 600
+CACHE_MAX_ENTRADAS = 500
+
+cache = CacheRespuestas(CACHE_FILE, ttl=CACHE_TTL, max_entradas=CACHE_MAX_ENTRADAS)
+
+# Estado de cada liga para espaciar las consultas de las que no tienen partidos próximos
+PLANIFICADOR_FILE = 'planificador_ligas.db'
+
+planificador = PlanificadorLigas(PLANIFICADOR_FILE, intervalo_base=CACHE_TTL)
+
+# Serie temporal de cuotas: cada descarga se añade como instantánea (movimiento de la línea)
+INSTANTANEAS_DIR = 'instantaneas'
+
+# Métricas de descarga, procesado y persistencia (se exportan al terminar cada análisis)
+METRICAS_FILE = 'metricas.json'
+
+# Icono de cada estado de liquidación (ver almacen_historial.py)
+ICONOS_LIQUIDACION = {'pendiente': '⏳', 'ganado': '✅', 'perdido': '❌'}
+
+# Pronósticos por página en la vista del historial
+TAM_PAGINA_HISTORIAL = 50
+
+# Reintentos ante fallos transitorios, peticiones de la cuota mensual que nunca se gastan
+# y peticiones por segundo como máximo (0 = sin límite)
+REINTENTOS_PETICION = 3
+CUOTA_MINIMA = 10
+MAX_PETICIONES_POR_SEGUNDO = 10
+
+_cliente = None
+_instantaneas = None
+_lock_cliente = threading.Lock()
+
+def obtener_cliente():
+    """Cliente HTTP compartido; se crea (e importa requests) en la primera petición"""
+    global _cliente
+    if _cliente is None:
+        with _lock_cliente:
+            if _cliente is None:
+                from cliente_odds import ClienteOdds
+                _cliente = ClienteOdds(pool=MAX_CONCURRENCIA, reintentos=REINTENTOS_PETICION, cuota_minima=CUOTA_MINIMA,
+                                       max_por_segundo=MAX_PETICIONES_POR_SEGUNDO)
+    return _cliente
+
+def obtener_instantaneas():
+    """Almacén de instantáneas compartido; se crea (e importa NumPy) la primera vez que se usa"""
+    global _instantaneas
+    if _instantaneas is None:
+        with _lock_cliente:
+            if _instantaneas is None:
+                from instantaneas import AlmacenInstantaneas
+                _instantaneas = AlmacenInstantaneas(INSTANTANEAS_DIR)
+    return _instantaneas
+
 # --- FIN DE LA CONFIGURACIÓN ---
 
 def cargar_historial():
-    """Carga el historial de pronósticos desde el archivo"""
-    if os.path.exists(HISTORIAL_FILE):
-        try:
-            with open(HISTORIAL_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
+    """Devuelve el historial de pronósticos (consultas indexadas, no se carga entero en memoria)"""
+    return almacen_historial
+
+def guardar_historial(historial, maximo_por_fecha=None):
+    """Añade al historial los pronósticos nuevos de un dict {id: pronóstico}; devuelve sus ids"""
+    if historial is almacen_historial:
+        return []
+    with metricas.cronometro('persistencia_segundos', operacion='guardar_historial'):
+        return almacen_historial.agregar(historial, maximo_por_fecha)
+
+def revision_historial():
+    """Número de revisión del historial: cambia cada vez que se guarda o se limpia"""
+    return almacen_historial.revision()
+
+def pagina_historial(pagina=0, tam_pagina=TAM_PAGINA_HISTORIAL, **filtros):
+    """Una página del historial filtrado (desde, hasta, ligas, estados) y el total de pronósticos que cumplen el filtro"""
+    with metricas.cronometro('persistencia_segundos', operacion='leer_historial'):
+        total = almacen_historial.contar(**filtros)
+        entradas = almacen_historial.consultar(limite=tam_pagina, desplazamiento=pagina * tam_pagina, **filtros)
+    return [entrada for _, entrada in entradas], total
+
+def ligas_historial():
+    """Ligas con algún pronóstico en el historial"""
+    return almacen_historial.ligas()
+
+def registrar_pronosticos(partidos, fecha_str, maximo=None):
+    """Añade al historial los partidos pronosticados en una fecha (YYYY-MM-DD), como mucho `maximo` ese día
+
+    Devuelve los ids guardados; los que ya estaban (de otra sesión o proceso) no se tocan.
+    """
+    return guardar_historial({
+        partido['id']: {
+            'fecha_pronostico': fecha_str,
+            'equipos': partido['equipos'],
+            'resultado_probable': partido['resultado_probable'],
+            'cuota': partido['cuota'],
+            'liga': partido['liga'],
+            'deporte': partido.get('deporte'),
+            'mercado': partido.get('mercado'),
+            'linea': partido.get('linea')
+        }
+        for partido in partidos
+    }, maximo)
 
-def guardar_historial(historial):
-    """Guarda el historial de pronósticos en el archivo"""
-    with open(HISTORIAL_FILE, 'w', encoding='utf-8') as f:
-        json.dump(historial, f, ensure_ascii=False, indent=2)
+def limpiar_historial():
+    """Elimina todos los pronósticos guardados, incluido el antiguo archivo JSON"""
+    hay_historial = len(almacen_historial) > 0 or os.path.exists(HISTORIAL_FILE)
+    with metricas.cronometro('persistencia_segundos', operacion='limpiar_historial'):
+        almacen_historial.limpiar()
+    try:
+        os.remove(HISTORIAL_FILE)
+    except FileNotFoundError:  # otra sesión lo acaba de borrar
+        pass
+    return hay_historial
 
 def crear_id_partido(home_team, away_team, fecha):
     """Crea un ID único para cada partido"""
@@ -234,98 +174,432 @@ def cuota_a_probabilidad(cuota):
         return 0
     return round((1 / cuota) * 100, 2)
 
-def obtener_partidos_deporte(deporte):
-    """Obtiene los partidos de un deporte específico"""
-    url = f'https://api.the-odds-api.com/v4/sports/{deporte}/odds/?apiKey={API_KEY}&regions={REGIONS}&markets={MARKETS}'
+def ventana_consulta(dias=DIAS_VENTANA, fecha_hoy=None):
+    """(commenceTimeFrom, commenceTimeTo) de los partidos de hoy a hoy + dias, en UTC
+
+    Es el mismo rango que procesar_partidos acepta: la API deja fuera el resto y la
+    respuesta ya no trae el calendario entero de la liga.
+    """
+    fecha_hoy = fecha_hoy or date.today()
+    return f"{fecha_hoy:%Y-%m-%d}T00:00:00Z", f"{fecha_hoy + timedelta(days=dias):%Y-%m-%d}T23:59:59Z"
+
+def consultar_deporte(deporte, timeout=TIMEOUT_PETICION, usar_cache=True, antiguedad_maxima=None, ventana=None,
+                      solo_numero=False):
+    """Obtiene los partidos de un deporte junto con el estado de la consulta
+
+    ventana: (desde, hasta) de ventana_consulta para pedir solo esos partidos; None, todos.
+    solo_numero: devuelve el número de partidos en lugar de la lista (desde la caché, sin decodificar).
+    """
+    if usar_cache:
+        partidos = cache.obtener(deporte, REGIONS, MARKETS, ttl=antiguedad_maxima, ventana='/'.join(ventana or ()),
+                                 solo_numero=solo_numero)
+        if partidos is not None:
+            estado = ESTADO_CACHE if partidos else ESTADO_VACIA
+            metricas.incrementar('ligas_consultadas_total', estado=estado, origen='cache')
+            return partidos, estado
+    
+    partidos, estado = descargar_deporte(deporte, timeout, ventana)
+    metricas.incrementar('ligas_consultadas_total', estado=estado, origen='api')
+    return (len(partidos) if solo_numero else partidos), estado
+
+def descargar_deporte(deporte, timeout=TIMEOUT_PETICION, ventana=None):
+    """Descarga las cuotas de un deporte de la API, registrando latencia, código, bytes y reintentos"""
+    from cliente_odds import CuotaAgotadaError  # requests solo se carga si hay que ir a la red
+    
+    url = f'{ODDS_API_URL}/{deporte}/odds/'
+    params = {'apiKey': obtener_api_key(), 'regions': REGIONS, 'markets': MARKETS}
+    if ventana:
+        params['commenceTimeFrom'], params['commenceTimeTo'] = ventana
     
     try:
-        response = requests.get(url)
+        with metricas.cronometro('peticion_segundos', deporte=deporte):
+            response = obtener_cliente().get(url, params=params, timeout=timeout)
+        metricas.incrementar('peticiones_total', deporte=deporte, codigo=response.status_code)
+        # Bytes del JSON y bytes que han viajado por la red (comprimidos con gzip)
+        metricas.incrementar('respuesta_bytes_total', len(response.content), deporte=deporte)
+        metricas.incrementar('transferencia_bytes_total', getattr(response, 'bytes_transferidos', 0),
+                             deporte=deporte)
+        metricas.incrementar('reintentos_total', getattr(response, 'reintentos', 0), deporte=deporte)
         if response.status_code == 200:
-            return response.json()
+            with metricas.cronometro('decodificacion_segundos'):
+                partidos = decodificar_partidos(response.content, MARKETS)
+            # También se guardan las ligas vacías: son la mayoría y no cambian de un minuto a otro
+            with metricas.cronometro('persistencia_segundos', operacion='cache'):
+                cache.guardar(deporte, REGIONS, MARKETS, partidos, ventana='/'.join(ventana or ()))
+            planificador.registrar(deporte, partidos)
+            with metricas.cronometro('persistencia_segundos', operacion='instantaneas'):
+                registrar_instantanea(deporte, partidos)
+            return partidos, (ESTADO_DESCARGADA if partidos else ESTADO_VACIA)
         else:
             print(f"Error al obtener datos de {deporte}: {response.status_code}")
-            return []
+            return [], ESTADO_ERROR
+    except CuotaAgotadaError as e:
+        metricas.incrementar('errores_total', deporte=deporte, tipo='cuota_agotada')
+        print(f"Consulta de {deporte} omitida: {e}")
+        return [], ESTADO_ERROR
     except Exception as e:
+        metricas.incrementar('errores_total', deporte=deporte, tipo=type(e).__name__)
         print(f"Error de conexión para {deporte}: {e}")
-        return []
+        return [], ESTADO_ERROR
+
+def registrar_instantanea(deporte, partidos):
+    """Guarda la descarga en la serie temporal de cuotas; un fallo aquí no afecta al pronóstico"""
+    if not partidos:
+        return
+    try:
+        obtener_instantaneas().registrar(deporte, partidos)
+    except Exception as e:
+        print(f"No se pudo guardar la instantánea de {deporte}: {e}")
+
+def movimiento_pronosticos(fecha=None):
+    """Cuota de apertura y de cierre del resultado pronosticado para los partidos del historial"""
+    from consenso import columna_resultado
+    
+    # La serie de cuotas solo guarda el 1X2; la fecha se busca por el índice de fecha_pronostico
+    pronosticos = almacen_historial.consultar(desde=fecha, hasta=fecha, mercados=['h2h'], limite=None)
+    movimientos = obtener_instantaneas().movimientos(id_partido for id_partido, _ in pronosticos)
+    
+    filas = []
+    for id_partido, pronostico in pronosticos:
+        movimiento = movimientos.get(id_partido)
+        columna = columna_resultado(pronostico['resultado_probable'], pronostico['equipos'])
+        if movimiento is None or columna < 0:
+            continue
+        filas.append({
+            'id': id_partido,
+            'equipos': pronostico['equipos'],
+            'resultado_probable': pronostico['resultado_probable'],
+            'cuota': pronostico['cuota'],
+            'apertura': round(movimiento['apertura'][columna], 2),
+            'cierre': round(movimiento['cierre'][columna], 2),
+            'variacion_pct': movimiento['variacion_pct'][columna],
+            'num_instantaneas': movimiento['num_instantaneas'],
+        })
+    return filas
+
+def descargar_marcadores(deporte, dias=3, timeout=TIMEOUT_PETICION):
+    """Marcadores de los partidos terminados de una liga en los últimos días (máximo 3 en la API)"""
+    from liquidacion import marcadores_api
+    
+    url = f'{ODDS_API_URL}/{deporte}/scores/'
+    params = {'apiKey': obtener_api_key(), 'daysFrom': dias}
+    try:
+        response = obtener_cliente().get(url, params=params, timeout=timeout)
+        if response.status_code == 200:
+            return marcadores_api(response.json(), deporte)
+        print(f"Error al obtener los marcadores de {deporte}: {response.status_code}")
+    except Exception as e:
+        print(f"Error de conexión al obtener los marcadores de {deporte}: {e}")
+    return {}
+
+def liquidar_pronosticos(dias=3, marcadores=None):
+    """Marca como ganados o perdidos los pronósticos de partidos ya jugados; devuelve (liquidados, pendientes)"""
+    from liquidacion import liquidar
+    
+    historial = cargar_historial()
+    pendientes = historial.pendientes(hasta_fecha=date.today().strftime('%Y-%m-%d'))
+    
+    # Sin marcadores importados se piden a la API solo las ligas con pronósticos pendientes
+    if marcadores is None:
+        marcadores = {}
+        for deporte in sorted({p['deporte'] for _, p in pendientes if p['deporte']}):
+            marcadores.update(descargar_marcadores(deporte, dias))
+    historial.guardar_resultados(marcadores)
+    
+    resultados = historial.resultados(id_partido for id_partido, _ in pendientes)
+    liquidados = historial.liquidar(liquidar(pendientes, resultados))
+    return liquidados, len(pendientes) - liquidados
+
+def importar_marcadores(ruta):
+    """Liquida el historial con los marcadores de un CSV (partidos sin liga conocida o de más de 3 días)"""
+    from liquidacion import importar_marcadores as leer_csv
+    return liquidar_pronosticos(marcadores=leer_csv(ruta))
+
+def rendimiento_historial():
+    """Tasa de acierto y ROI de los pronósticos liquidados: (total, por liga, calibración por tramo de cuota)"""
+    from almacen_historial import GANADO, PERDIDO
+    from liquidacion import calibracion, rendimiento, tabla_liquidados
+    
+    liquidados = almacen_historial.consultar(estados=[GANADO, PERDIDO], limite=None)
+    df = tabla_liquidados(entrada for _, entrada in liquidados)
+    if df.empty:
+        return None
+    return rendimiento(df), rendimiento(df, por='liga'), calibracion(df)
+
+def backtest_reglas(reglas, desde=None, hasta=None):
+    """Reproduce las instantáneas guardadas con varias reglas de selección y compara su rendimiento
+
+    Solo en el mercado 1X2 (backtest.MERCADO), el único que guardan las instantáneas.
+    """
+    from backtest import comparar, preparar
+    
+    candidatos = preparar(obtener_instantaneas(), cargar_historial().resultados(), desde, hasta)
+    return comparar(candidatos, reglas)
+
+def obtener_partidos_deporte(deporte, timeout=TIMEOUT_PETICION, usar_cache=True, ventana=None):
+    """Obtiene los partidos de un deporte específico (solo los de la ventana, si se da)"""
+    return consultar_deporte(deporte, timeout, usar_cache, ventana=ventana)[0]
 
-def procesar_partidos(partidos_raw, historial, fecha_hoy):
-    """Procesa los partidos y filtra los ya pronosticados"""
+def obtener_deportes_disponibles(timeout=TIMEOUT_PETICION, usar_cache=True):
+    """Obtiene las claves de deportes en temporada según el listado de la API (no consume cuota)"""
+    if usar_cache:
+        listado = cache.obtener('', '', '')
+        if listado is not None:
+            return set(listado)
+    
+    url = f'{ODDS_API_URL}/'
+    params = {'apiKey': obtener_api_key()}
+    
+    try:
+        # No gasta cuota: se pide también con la cuota en el mínimo y renueva la cifra restante
+        response = obtener_cliente().get(url, params=params, timeout=timeout, gratuita=True)
+        if response.status_code == 200:
+            listado = [d['key'] for d in response.json() if d.get('active', True)]
+            cache.guardar('', '', '', listado)
+            return set(listado)
+        print(f"Error al obtener el listado de deportes: {response.status_code}")
+    except Exception as e:
+        print(f"Error de conexión al obtener el listado de deportes: {e}")
+    return None
+
+def deportes_a_consultar(deportes=None):
+    """Filtra las ligas configuradas dejando solo las que la API tiene en temporada"""
+    deportes = list(DEPORTES if deportes is None else deportes)
+    disponibles = obtener_deportes_disponibles()
+    
+    # Si el listado falla consultamos todas las ligas, como antes
+    if disponibles is None:
+        return deportes
+    return [d for d in deportes if d in disponibles]
+
+def planificar_ligas(deportes):
+    """Antigüedad máxima tolerada para cada liga y si la pasada es un barrido completo"""
+    antiguedades, completo = planificador.planificar(deportes)
+    pendientes = planificador.pendientes(antiguedades)
+    tipo = "barrido completo" if completo else "el resto se sirve de la caché"
+    print(f"🗓️  {len(pendientes)} de {len(antiguedades)} ligas necesitan descarga ({tipo})")
+    return antiguedades, completo
+
+def _resultado_liga(deporte, futuro):
+    return (deporte, *futuro.result())
+
+def iterar_partidos_ligas(deportes, max_concurrencia=MAX_CONCURRENCIA, timeout=TIMEOUT_PETICION, antiguedades=None,
+                          ventana=None, solo_numero=False):
+    """Consulta varias ligas en paralelo y devuelve (deporte, partidos, estado) a medida que terminan
+
+    Con solo_numero, en lugar de los partidos llega su número (ver consultar_deporte).
+    """
+    antiguedades = antiguedades or {}
+    max_concurrencia = max(1, max_concurrencia)
+    executor = ThreadPoolExecutor(max_workers=max_concurrencia)
+    restantes = iter(deportes)
+    en_curso = {}
+    
+    def lanzar(cuantos):
+        for deporte in islice(restantes, cuantos):
+            en_curso[executor.submit(consultar_deporte, deporte, timeout, True, antiguedades.get(deporte),
+                                     ventana, solo_numero)] = deporte
+    
+    try:
+        # Como mucho max_concurrencia ligas entre descargadas y sin consumir: si el consumidor
+        # procesa más despacio de lo que llegan las respuestas, no se acumulan payloads en memoria
+        lanzar(max_concurrencia)
+        while en_curso:
+            terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            listos = [(en_curso.pop(futuro), futuro) for futuro in terminados]
+            del terminados
+            lanzar(len(listos))
+            while listos:
+                # Ninguna variable de este marco guarda el futuro ni su resultado durante el
+                # yield: cuando el consumidor suelta el payload, se libera
+                yield _resultado_liga(*listos.pop())
+    finally:
+        # Si el consumidor corta la iteración no esperamos a las peticiones pendientes
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def procesar_partidos(partidos_raw, historial, fecha_hoy, dias_max=DIAS_VENTANA, duplicados=None):
+    """Procesa los partidos y filtra los ya pronosticados; devuelve registros PartidoProcesado
+
+    La liga entera se procesa de una vez: la ventana de fechas y el consenso de todas las
+    casas en cada mercado se calculan con NumPy sobre las cuotas aplanadas en columnas.
+    Con un IndiceDuplicados se descartan también los partidos que ya llegaron por otra liga
+    en la misma pasada; se registran los que dan un candidato o ya estaban pronosticados.
+    """
+    import numpy as np  # NumPy solo se importa cuando hay partidos que procesar
+    from mercados import evaluar_partidos
+    from partidos import PartidoProcesado
+    
+    mercados = MARKETS.split(',')
+    
+    inicio = time.perf_counter()
     partidos_procesados = []
+    descartes = {'fuera_de_ventana': 0, 'duplicado': 0, 'ya_pronosticado': 0, 'sin_consenso': 0, 'error': 0}
     
+    # Hora de inicio (epoch UTC) e id de cada partido
+    leidos, inicios = [], []
     for partido in partidos_raw:
         try:
-            equipos = f"{partido['home_team']} vs {partido['away_team']}"
             fecha_partido = datetime.fromisoformat(partido['commence_time'].replace('Z', '+00:00'))
-            
-            # Crear ID único del partido
             partido_id = crear_id_partido(partido['home_team'], partido['away_team'], fecha_partido)
-            
-            # Verificar si ya fue pronosticado
-            if partido_id in historial:
-                continue
-                
-            # Verificar que el partido sea en los próximos 7 días
-            dias_diferencia = (fecha_partido.date() - fecha_hoy).days
-            if dias_diferencia < 0 or dias_diferencia > 7:
-                continue
-
-            # Procesar cuotas
-            if partido.get('bookmakers') and partido['bookmakers'][0].get('markets'):
-                outcomes = partido['bookmakers'][0]['markets'][0]['outcomes']
-                
-                if len(outcomes) >= 2:  # Al menos local y visitante
-                    cuotas_dict = {}
-                    
-                    for outcome in outcomes:
-                        if outcome['name'] == partido['home_team']:
-                            cuotas_dict[f"Gana {outcome['name']}"] = outcome['price']
-                        elif outcome['name'] == partido['away_team']:
-                            cuotas_dict[f"Gana {outcome['name']}"] = outcome['price']
-                        elif outcome['name'].lower() in ['draw', 'tie', 'empate']:
-                            cuotas_dict["Empate"] = outcome['price']
-                    
-                    if cuotas_dict:
-                        resultado_mas_probable = min(cuotas_dict, key=cuotas_dict.get)
-                        cuota_minima = cuotas_dict[resultado_mas_probable]
-                        
-                        partidos_procesados.append({
-                            'id': partido_id,
-                            'equipos': equipos,
-                            'fecha': fecha_partido.strftime('%d-%m-%Y %H:%M'),
-                            'fecha_objeto': fecha_partido,
-                            'resultado_probable': resultado_mas_probable,
-                            'cuota': cuota_minima,
-                            'probabilidad_implicita': cuota_a_probabilidad(cuota_minima),
-                            'liga': partido.get('sport_title', 'Liga desconocida')
-                        })
-                        
         except Exception as e:
+            descartes['error'] += 1
             print(f"Error procesando partido: {e}")
             continue
+        leidos.append((partido, partido_id))
+        inicios.append(fecha_partido.timestamp())
+    
+    # Ventana de los próximos días para toda la liga (antes de consultar el historial)
+    dias = np.array(inicios) // 86400 - (fecha_hoy - date(1970, 1, 1)).days
+    en_ventana = np.flatnonzero((dias >= 0) & (dias <= dias_max)).tolist()
+    descartes['fuera_de_ventana'] = len(leidos) - len(en_ventana)
+    
+    # El mismo partido desde otra clave de la API (otro id, otra grafía u otra hora)
+    candidatos = []
+    for i in en_ventana:
+        (partido, partido_id), ts = leidos[i], inicios[i]
+        if duplicados is not None and duplicados.contiene(partido, ts):
+            descartes['duplicado'] += 1
+            continue
+        candidatos.append((partido, ts, partido_id))
     
+    # Ya pronosticados: una sola consulta al historial por liga; sus copias de otras ligas
+    # también se descartan sin procesarlas
+    ids = [partido_id for *_, partido_id in candidatos]
+    if hasattr(historial, 'existentes'):
+        pronosticados = historial.existentes(ids)
+    else:
+        pronosticados = {partido_id for partido_id in ids if partido_id in historial}
+    pendientes = []
+    for partido, ts, partido_id in candidatos:
+        if partido_id in pronosticados:
+            if duplicados is not None:
+                duplicados.agregar(partido, ts)
+            descartes['ya_pronosticado'] += 1
+        else:
+            pendientes.append((partido, ts))
+    
+    # Consenso de todas las casas en cada mercado para la liga entera; de cada partido se
+    # queda el resultado más probable
+    try:
+        resultados = evaluar_partidos([partido for partido, _ in pendientes], mercados) if pendientes else []
+    except Exception as e:
+        descartes['error'] += len(pendientes)
+        print(f"Error procesando partidos: {e}")
+        pendientes, resultados = [], []
+    
+    for (partido, ts), resultado in zip(pendientes, resultados):
+        # Copias dentro de la misma respuesta: la primera con resultado ya ocupa el sitio
+        if duplicados is not None and duplicados.contiene(partido, ts):
+            descartes['duplicado'] += 1
+            continue
+        if not resultado:
+            descartes['sin_consenso'] += 1
+            continue
+        # Solo una copia con resultado ocupa el sitio en el índice: una sin cuotas no puede
+        # dejar fuera la copia con cuotas que llega por otra liga
+        if duplicados is not None:
+            duplicados.agregar(partido, ts)
+        partidos_procesados.append(PartidoProcesado(
+            partido['home_team'], partido['away_team'], ts, **resultado,
+            liga=partido.get('sport_title', 'Liga desconocida'), deporte=partido.get('sport_key')
+        ))
+    
+    # Una sola actualización del registro por llamada (no por partido)
+    metricas.incrementar('partidos_total', len(partidos_raw), etapa='entrada')
+    for motivo, cantidad in descartes.items():
+        metricas.incrementar('partidos_total', cantidad, etapa=motivo)
+    metricas.incrementar('partidos_total', len(partidos_procesados), etapa='salida')
+    metricas.observar('procesado_segundos', time.perf_counter() - inicio)
     return partidos_procesados
 
+def tamano_ruta(ruta):
+    """Bytes de un archivo o de todos los archivos de un directorio (0 si no existe)"""
+    if os.path.isfile(ruta):
+        return os.path.getsize(ruta)
+    total = 0
+    for raiz, _, archivos in os.walk(ruta):
+        total += sum(os.path.getsize(os.path.join(raiz, archivo)) for archivo in archivos)
+    return total
+
+def exportar_metricas():
+    """Actualiza el tamaño de los archivos de datos y escribe las métricas en METRICAS_FILE"""
+    for ruta in (HISTORIAL_DB, CACHE_FILE, PLANIFICADOR_FILE, INSTANTANEAS_DIR):
+        metricas.fijar('archivo_bytes', tamano_ruta(ruta), archivo=ruta)
+    estadisticas_cache = cache.estadisticas()
+    metricas.fijar('cache_aciertos', estadisticas_cache['aciertos'])
+    metricas.fijar('cache_fallos', estadisticas_cache['fallos'])
+    if _cliente is not None and _cliente.restantes is not None:
+        metricas.fijar('cuota_api_restante', _cliente.restantes)
+    try:
+        metricas.exportar(METRICAS_FILE)
+    except OSError as e:
+        print(f"No se pudieron exportar las métricas a {METRICAS_FILE}: {e}")
+
+def escanear_ligas(deportes=None):
+    """Descarga en una sola pasada las cuotas de las ligas activas: {deporte: número de partidos}"""
+    print("🔍 Verificando ligas activas...")
+    inicio = time.perf_counter()
+    candidatas = deportes_a_consultar(deportes)
+    
+    antiguedades, completo = planificar_ligas(candidatas)
+    # Solo se cuentan los partidos: las ligas en caché ni se decodifican
+    num_partidos = {}
+    for completadas, (deporte, numero, _) in enumerate(
+            iterar_partidos_ligas(candidatas, antiguedades=antiguedades, ventana=ventana_consulta(), solo_numero=True), 1):
+        num_partidos[deporte] = numero
+        if completadas % 10 == 0:
+            print(f"   Verificadas {completadas} ligas...")
+    if completo:
+        planificador.completar_barrido()
+    partidos_por_liga = {deporte: num_partidos[deporte] for deporte in candidatas if num_partidos.get(deporte)}
+    
+    metricas.observar('escaneo_segundos', time.perf_counter() - inicio, tipo='ligas_activas')
+    metricas.fijar('ligas_activas', len(partidos_por_liga))
+    exportar_metricas()
+    print(f"✅ Se encontraron {len(partidos_por_liga)} ligas activas de {len(DEPORTES)} disponibles")
+    return partidos_por_liga
+
 def obtener_ligas_activas():
     """Obtiene una lista de las ligas que tienen partidos disponibles"""
+    return list(escanear_ligas())
+
+def analizar_ligas(deportes=None, k=TOP_K, dias_max=DIAS_VENTANA, historial=None, fecha_hoy=None):
+    """Descarga y procesa las ligas en paralelo; devuelve (deporte, estado, num_partidos, selector) según terminan"""
+    deportes = deportes_a_consultar() if deportes is None else deportes
+    historial = cargar_historial() if historial is None else historial
+    fecha_hoy = fecha_hoy or date.today()
+    selector = SelectorTopK(k)
+    duplicados = IndiceDuplicados()
+    inicio = time.perf_counter()
+    antiguedades, completo = planificar_ligas(deportes)
+    
+    ventana = ventana_consulta(dias_max, fecha_hoy)
+    # Único camino de procesamiento: cada liga pasa por procesar_partidos en cuanto llega y
+    # va al selector. El modo por lotes (procesamiento_lote) esperaba a tener todas las
+    # ligas, que es justo lo que el selector evita, y se eliminó.
+    for deporte, partidos_raw, estado in iterar_partidos_ligas(deportes, antiguedades=antiguedades, ventana=ventana):
+        num_partidos = len(partidos_raw)
+        if partidos_raw:
+            selector.agregar(procesar_partidos(partidos_raw, historial, fecha_hoy, dias_max, duplicados))
+        del partidos_raw  # el payload no sigue vivo mientras el consumidor pinta el progreso
+        yield deporte, estado, num_partidos, selector
+    
+    # Un barrido cancelado a medias no cuenta: la siguiente pasada lo repite
+    if completo:
+        planificador.completar_barrido()
+    metricas.observar('escaneo_segundos', time.perf_counter() - inicio, tipo='analisis')
+    exportar_metricas()
+
+def calcular_pronostico(k=TOP_K, dias_max=DIAS_VENTANA, deportes=None, historial=None, fecha_hoy=None):
+    """Analiza las ligas y devuelve (top_partidos, resumen) sin mostrar ni guardar nada"""
     ligas_activas = []
-    contador = 0
-    
-    print("🔍 Verificando ligas activas...")
+    selector = SelectorTopK(k)
+    for deporte, _, num_partidos, selector in analizar_ligas(deportes, k, dias_max, historial, fecha_hoy):
+        if num_partidos:
+            ligas_activas.append(deporte)
     
-    for deporte in DEPORTES:
-        try:
-            partidos = obtener_partidos_deporte(deporte)
-            if partidos:
-                ligas_activas.append(deporte)
-                contador += 1
-                if contador % 10 == 0:
-                    print(f"   Verificadas {contador} ligas...")
-        except:
-            continue
-    
-    print(f"✅ Se encontraron {len(ligas_activas)} ligas activas de {len(DEPORTES)} disponibles")
-    return ligas_activas
+    resumen = {'ligas_activas': ligas_activas, 'partidos_encontrados': selector.total}
+    return selector.mejores(), resumen
 
 def generar_pronostico_diario():
     """Genera el pronóstico diario de 5 partidos (aumentado por más ligas)"""
@@ -339,32 +613,18 @@ def generar_pronostico_diario():
     # Cargar historial
     historial = cargar_historial()
     
-    # Obtener solo ligas activas para optimizar el proceso
-    ligas_activas = obtener_ligas_activas()
-    
-    # Obtener partidos de todas las ligas activas
-    todos_los_partidos = []
+    # Una sola pasada: cada liga se procesa en cuanto llega y solo se conservan los TOP_K mejores
+    print("🔍 Analizando ligas...")
+    top_partidos, resumen = calcular_pronostico(historial=historial, fecha_hoy=fecha_hoy)
     
-    for deporte in ligas_activas:
-        print(f"Consultando {deporte}...")
-        partidos_raw = obtener_partidos_deporte(deporte)
-        partidos_procesados = procesar_partidos(partidos_raw, historial, fecha_hoy)
-        todos_los_partidos.extend(partidos_procesados)
-    
-    if not todos_los_partidos:
+    if not resumen['partidos_encontrados']:
         print("\n❌ No se encontraron partidos nuevos para pronosticar.")
         print("Posibles razones:")
         print("- Todos los partidos próximos ya fueron pronosticados")
-        print("- No hay partidos en los próximos 7 días")
+        print(f"- No hay partidos en los próximos {DIAS_VENTANA} días")
         print("- Error en la API")
         return
     
-    # Ordenar por probabilidad (cuota más baja = más probable)
-    partidos_ordenados = sorted(todos_los_partidos, key=lambda x: x['cuota'])
-    
-    # Seleccionar los 5 mejores (aumentado por más variedad)
-    top_partidos = partidos_ordenados[:5]
-    
     # Mostrar pronósticos
     print(f"\n🎯 PRONÓSTICOS DEL DÍA - {fecha_hoy.strftime('%d/%m/%Y')}")
     print("=" * 55)
@@ -374,33 +634,24 @@ def generar_pronostico_diario():
         print(f"   📅 Fecha: {p['fecha']}")
         print(f"   🏆 Liga: {p['liga']}")
         print(f"   ⭐ Pronóstico: {p['resultado_probable']}")
-        print(f"   💰 Cuota: {p['cuota']}")
+        print(f"   💰 Cuota: {p['cuota']} (mejor: {p['mejor_cuota']} en {p['casa_mejor_cuota']}, {p['num_casas']} casas)")
         print(f"   📊 Probabilidad: {p['probabilidad_implicita']}%")
         print("-" * 50)
     
     # Mostrar estadísticas adicionales
     print(f"\n📊 ESTADÍSTICAS DEL ANÁLISIS:")
-    print(f"   • Ligas analizadas: {len(ligas_activas)}")
-    print(f"   • Partidos encontrados: {len(todos_los_partidos)}")
-    print(f"   • Partidos ya pronosticados: {len([k for k in historial.keys() if '_vs_' in k])}")
+    print(f"   • Ligas analizadas: {len(resumen['ligas_activas'])}")
+    print(f"   • Partidos encontrados: {resumen['partidos_encontrados']}")
+    print(f"   • Partidos ya pronosticados: {len(historial)}")
+    estadisticas_cache = cache.estadisticas()
+    print(f"   • Caché: {estadisticas_cache['aciertos']} aciertos / {estadisticas_cache['fallos']} fallos")
+    if _cliente is not None and _cliente.restantes is not None:
+        print(f"   • Cuota de la API: {_cliente.restantes} peticiones restantes ({_cliente.usadas} usadas)")
     
     # Guardar en el historial
-    fecha_str = fecha_hoy.strftime('%Y-%m-%d')
-    if fecha_str not in historial:
-        historial[fecha_str] = []
+    registrar_pronosticos(top_partidos, fecha_hoy.strftime('%Y-%m-%d'))
     
-    for partido in top_partidos:
-        historial[partido['id']] = {
-            'fecha_pronostico': fecha_str,
-            'equipos': partido['equipos'],
-            'resultado_probable': partido['resultado_probable'],
-            'cuota': partido['cuota'],
-            'liga': partido['liga']
-        }
-    
-    guardar_historial(historial)
-    
-    print(f"\n✅ Pronósticos guardados en {HISTORIAL_FILE}")
+    print(f"\n✅ Pronósticos guardados en {HISTORIAL_DB}")
 
 def mostrar_historial():
     """Muestra el historial de pronósticos"""
@@ -413,47 +664,76 @@ def mostrar_historial():
     print("\n📚 HISTORIAL DE PRONÓSTICOS")
     print("=" * 40)
     
-    fechas = [k for k in historial.keys() if len(k) == 10]  # Solo fechas (formato YYYY-MM-DD)
-    fechas.sort(reverse=True)
-    
-    for fecha in fechas[:10]:  # Mostrar últimos 10 días
+    for fecha in historial.fechas(limite=10):  # Mostrar últimos 10 días
         print(f"\n📅 {fecha}:")
-        partidos_del_dia = [v for k, v in historial.items() if k.startswith(fecha.replace('-', ''))]
+        partidos_del_dia = historial.por_fecha(fecha)
         
         for partido in partidos_del_dia:
             liga = partido.get('liga', 'Liga desconocida')
+            marcador = f" → {partido['marcador']} {ICONOS_LIQUIDACION[partido['estado']]}" if partido['marcador'] else ""
             print(f"  • {partido['equipos']} ({liga})")
-            print(f"    {partido['resultado_probable']} (Cuota: {partido['cuota']})")
+            print(f"    {partido['resultado_probable']} (Cuota: {partido['cuota']}){marcador}")
+
+def mostrar_rendimiento():
+    """Liquida los pronósticos de partidos ya jugados y muestra acierto y ROI"""
+    print("\n📈 RENDIMIENTO DE LOS PRONÓSTICOS")
+    print("=" * 40)
+    
+    liquidados, pendientes = liquidar_pronosticos()
+    print(f"Liquidados ahora: {liquidados} (sin resultado todavía: {pendientes})")
+    
+    rendimiento = rendimiento_historial()
+    if rendimiento is None:
+        print("Aún no hay pronósticos liquidados.")
+        return
+    total, por_liga, calibracion = rendimiento
+    fila = total.iloc[0]
+    print(f"\n   • Pronósticos liquidados: {int(fila['apuestas'])}")
+    print(f"   • Tasa de acierto: {fila['tasa_acierto']}%")
+    print(f"   • ROI (1 unidad por pronóstico): {fila['roi']}%")
+    print("\n🏆 Por liga:")
+    print(por_liga.sort_values('apuestas', ascending=False).to_string())
+    print("\n🎯 Calibración por tramo de cuota:")
+    print(calibracion.to_string())
+
+def estadisticas_ligas(deportes=None):
+    """Ligas configuradas agrupadas por región, con el recuento por género y tipo de competición
+
+    Sin `deportes` se leen directamente los índices del registro de ligas.
+    """
+    return {
+        'regiones': registro_ligas.agrupar('region', deportes),
+        'generos': {genero: len(ligas) for genero, ligas in registro_ligas.agrupar('genero', deportes).items()},
+        'tipos': {tipo: len(ligas) for tipo, ligas in registro_ligas.agrupar('tipo', deportes).items()},
+    }
 
 def mostrar_estadisticas_ligas():
     """Muestra estadísticas sobre las ligas disponibles"""
     print("\n📊 ESTADÍSTICAS DE COMPETICIONES")
     print("=" * 50)
     
-    # Categorizar ligas por región
-    regiones = {
-        'Europa': [d for d in DEPORTES if any(x in d for x in ['epl', 'spain', 'italy', 'germany', 'france', 'netherlands', 'portugal', 'belgium', 'switzerland', 'austria', 'turkey', 'greece', 'denmark', 'sweden', 'norway', 'finland', 'poland', 'czech', 'slovakia', 'hungary', 'romania', 'bulgaria', 'croatia', 'serbia', 'slovenia', 'russia', 'ukraine', 'uefa', 'scotland', 'wales', 'ireland', 'iceland', 'faroe', 'luxembourg', 'malta', 'cyprus', 'latvia', 'lithuania', 'estonia', 'albania', 'macedonia', 'montenegro', 'bosnia', 'kosovo', 'moldova', 'georgia', 'armenia', 'azerbaijan'])],
-        'Sudamérica': [d for d in DEPORTES if any(x in d for x in ['brazil', 'argentina', 'chile', 'colombia', 'peru', 'uruguay', 'ecuador', 'bolivia', 'paraguay', 'venezuela', 'conmebol', 'copa_america'])],
-        'Norteamérica': [d for d in DEPORTES if any(x in d for x in ['usa', 'mexico', 'canada', 'concacaf'])],
-        'Asia': [d for d in DEPORTES if any(x in d for x in ['japan', 'south_korea', 'china', 'australia', 'saudi', 'uae', 'qatar', 'iran', 'iraq', 'thailand', 'vietnam', 'malaysia', 'singapore', 'indonesia', 'philippines', 'india', 'afc', 'kazakhstan', 'uzbekistan', 'kyrgyzstan', 'tajikistan', 'turkmenistan', 'afghanistan', 'bangladesh', 'bhutan', 'cambodia', 'laos', 'myanmar', 'nepal', 'sri_lanka', 'maldives', 'pakistan'])],
-        'África': [d for d in DEPORTES if any(x in d for x in ['south_africa', 'egypt', 'morocco', 'tunisia', 'algeria', 'nigeria', 'ghana', 'kenya', 'uganda', 'tanzania', 'zambia', 'zimbabwe', 'caf'])],
-        'Internacionales': [d for d in DEPORTES if any(x in d for x in ['fifa', 'olympics', 'friendlies'])],
-        'Femeninas': [d for d in DEPORTES if any(x in d for x in ['women', 'feminine', 'frauen', 'femminile', 'vrouwen', 'damall', 'kvinde', 'feminino'])]
-    }
-    
-    for region, ligas in regiones.items():
+    estadisticas = estadisticas_ligas()
+    for region, ligas in estadisticas['regiones'].items():
         print(f"\n🌍 {region}: {len(ligas)} competiciones")
-        if len(ligas) <= 5:
-            for liga in ligas:
-                print(f"   • {liga}")
+        nombres = [registro_ligas.get(liga).titulo for liga in ligas]
+        if len(nombres) <= 5:
+            for nombre in nombres:
+                print(f"   • {nombre}")
         else:
-            print(f"   • {ligas[0]}")
-            print(f"   • {ligas[1]}")
-            print(f"   • ... y {len(ligas)-2} más")
+            print(f"   • {nombres[0]}")
+            print(f"   • {nombres[1]}")
+            print(f"   • ... y {len(nombres)-2} más")
     
-    print(f"\n🏆 TOTAL: {len(DEPORTES)} competiciones de fútbol configuradas")
+    print("\n👥 " + ", ".join(f"{genero}: {n}" for genero, n in estadisticas['generos'].items() if genero))
+    print("🏟️  " + ", ".join(f"{tipo}: {n}" for tipo, n in estadisticas['tipos'].items() if tipo))
+    print(f"\n🏆 TOTAL: {len(registro_ligas)} competiciones de fútbol configuradas")
 
 if __name__ == "__main__":
+    # Con argumentos se ejecuta el modo sin interfaz (python backend.py pronostico --top 5 ...)
+    if len(sys.argv) > 1:
+        from servicio import main
+        sys.exit(main())
+    
     print("🌍 PREDICTOR DE FÚTBOL MUNDIAL")
     print("=" * 35)
     print("1. Generar pronóstico diario")
@@ -461,28 +741,33 @@ if __name__ == "__main__":
     print("3. Limpiar historial")
     print("4. Ver estadísticas de ligas")
     print("5. Verificar ligas activas")
+    print("6. Liquidar resultados y ver rendimiento")
     
-    opcion = input("\nElige una opción (1-5): ").strip()
-    
-    if opcion == "1":
-        generar_pronostico_diario()
-    elif opcion == "2":
-        mostrar_historial()
-    elif opcion == "3":
-        if input("¿Seguro que quieres limpiar el historial? (s/N): ").lower() == 's':
-            if os.path.exists(HISTORIAL_FILE):
-                os.remove(HISTORIAL_FILE)
-                print("✅ Historial limpiado.")
-            else:
-                print("No hay historial para limpiar.")
-    elif opcion == "4":
-        mostrar_estadisticas_ligas()
-    elif opcion == "5":
-        ligas_activas = obtener_ligas_activas()
-        print(f"\n🏆 Ligas activas encontradas: {len(ligas_activas)}")
-        for i, liga in enumerate(ligas_activas[:20], 1):  # Mostrar primeras 20
-            print(f"{i:2d}. {liga}")
-        if len(ligas_activas) > 20:
-            print(f"    ... y {len(ligas_activas)-20} más")
-    else:
-        print("Opción no válida.")
\ No newline at end of file
+    opcion = input("\nElige una opción (1-6): ").strip()
+    
+    try:
+        if opcion == "1":
+            generar_pronostico_diario()
+        elif opcion == "2":
+            mostrar_historial()
+        elif opcion == "3":
+            if input("¿Seguro que quieres limpiar el historial? (s/N): ").lower() == 's':
+                if limpiar_historial():
+                    print("✅ Historial limpiado.")
+                else:
+                    print("No hay historial para limpiar.")
+        elif opcion == "4":
+            mostrar_estadisticas_ligas()
+        elif opcion == "5":
+            ligas_activas = obtener_ligas_activas()
+            print(f"\n🏆 Ligas activas encontradas: {len(ligas_activas)}")
+            for i, liga in enumerate(ligas_activas[:20], 1):  # Mostrar primeras 20
+                print(f"{i:2d}. {liga}")
+            if len(ligas_activas) > 20:
+                print(f"    ... y {len(ligas_activas)-20} más")
+        elif opcion == "6":
+            mostrar_rendimiento()
+        else:
+            print("Opción no válida.")
+    except ConfiguracionError as e:
+        print(f"❌ {e}")
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from consenso import EMPATE
+from liquidacion import rendimiento
+
+# --- BACKTEST DE REGLAS DE SELECCIÓN SOBRE LAS INSTANTÁNEAS GUARDADAS ---
+# Reproduce día a día lo que habría elegido el pronóstico con otras reglas
+# (K partidos, cuota mínima/máxima, días hacia delante) usando la última
+# instantánea de cada partido de cada día y el marcador final guardado.
+# La preparación se hace una vez; cada regla es un filtrado vectorizado y
+# una sola pasada lineal para no repetir partidos entre días.
+#
+# Solo se reproduce el mercado 1X2: las instantáneas guardan el consenso de
+# local, empate y visitante, no el de totales ni hándicap. Con más mercados en
+# backend.MARKETS el pronóstico en vivo elige entre todos ellos, así que el
+# backtest evalúa la misma regla restringida al 1X2.
+
+SEGUNDOS_DIA = 86400
+
+# Único mercado que se puede reproducir con las instantáneas
+MERCADO = 'h2h'
+
+def preparar(almacen, resultados, desde=None, hasta=None):
+    """Candidatos (partido, día de captura) con el favorito del consenso y la columna ganadora real"""
+    # Las particiones solo se filtran aquí; todo el cálculo se hace después en una sola pasada
+    eventos, trozos = [], []
+    for eventos_particion, registros in almacen.particiones(desde, hasta):
+        con_resultado = [e for e in eventos_particion if e['id'] in resultados]
+        if con_resultado and len(registros):
+            eventos += con_resultado
+            trozos.append(registros[np.isin(registros['evento'], [e['evento'] for e in con_resultado])])
+
+    if not trozos:
+        return pd.DataFrame(columns=['id', 'deporte', 'dia', 'dias_hasta', 'cuota', 'probabilidad',
+                                     'columna', 'ganadora', 'inicio'])
+    registros = np.concatenate(trozos)
+    info = pd.DataFrame({
+        'evento': [e['evento'] for e in eventos],
+        'id': [e['id'] for e in eventos],
+        'deporte': [e['deporte'] for e in eventos],
+        'inicio': [e['inicio'] for e in eventos],
+    })
+
+    # Favorito de cada instantánea: mayor probabilidad de consenso
+    probabilidades = np.nan_to_num(registros['probabilidad'], nan=-1.0)
+    columna = probabilidades.argmax(axis=1)
+    candidatos = pd.DataFrame({
+        'evento': registros['evento'],
+        'capturado': registros['capturado'],
+        'columna': columna,
+        'cuota': np.take_along_axis(registros['mediana'], columna[:, None], axis=1)[:, 0].astype(float),
+        'probabilidad': np.take_along_axis(probabilidades, columna[:, None], axis=1)[:, 0].astype(float),
+    }).merge(info, on='evento')
+
+    # Solo lo que se sabía antes del partido; de cada día vale la última captura
+    candidatos = candidatos[candidatos['capturado'] < candidatos['inicio']]
+    candidatos = candidatos.assign(dia=(candidatos['capturado'] // SEGUNDOS_DIA).astype(int))
+    candidatos = candidatos.sort_values('capturado').drop_duplicates(['evento', 'dia'], keep='last')
+    candidatos['dias_hasta'] = (candidatos['inicio'] // SEGUNDOS_DIA).astype(int) - candidatos['dia']
+
+    goles = np.array([resultados[i] for i in candidatos['id']], dtype=int).reshape(-1, 2)
+    candidatos['ganadora'] = EMPATE - np.sign(goles[:, 0] - goles[:, 1])  # LOCAL=0, EMPATE=1, VISITANTE=2
+    return candidatos.drop(columns=['evento', 'capturado']).reset_index(drop=True)
+
+def simular(candidatos, k=5, dias=7, cuota_min=1.0, cuota_max=np.inf):
+    """Pronósticos que habría dado la regla: hasta K por día, sin repetir partido, de menor a mayor cuota"""
+    c = candidatos[
+        (candidatos['dias_hasta'] <= dias) & (candidatos['cuota'] >= cuota_min) & (candidatos['cuota'] <= cuota_max)
+    ]
+    c = c.sort_values(['dia', 'cuota', 'probabilidad', 'inicio'], ascending=[True, True, False, True], kind='stable')
+
+    # Pasada lineal: un partido elegido un día no vuelve a estar disponible (como con el historial)
+    elegidos, vistos = [], set()
+    dia_actual, en_el_dia = None, 0
+    for posicion, (dia, id_partido) in enumerate(zip(c['dia'].tolist(), c['id'].tolist())):
+        if dia != dia_actual:
+            dia_actual, en_el_dia = dia, 0
+        if en_el_dia < k and id_partido not in vistos:
+            vistos.add(id_partido)
+            elegidos.append(posicion)
+            en_el_dia += 1
+
+    seleccion = c.iloc[elegidos]
+    ganado = (seleccion['columna'] == seleccion['ganadora']).to_numpy()
+    return seleccion.assign(ganado=ganado, beneficio=np.where(ganado, seleccion['cuota'] - 1, -1.0))
+
+def comparar(candidatos, reglas):
+    """Resumen (apuestas, aciertos, tasa, beneficio, ROI) de varias reglas: [{'k':..., 'dias':..., ...}]"""
+    filas = []
+    for regla in reglas:
+        seleccion = simular(candidatos, **regla)
+        resumen = rendimiento(seleccion).iloc[0].to_dict() if len(seleccion) else {'apuestas': 0}
+        filas.append({**regla, **resumen})
+    return pd.DataFrame(filas)
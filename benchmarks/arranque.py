@@ -0,0 +1,44 @@
+"""Mide el tiempo de arranque en frío de `import backend` en un proceso nuevo.
+
+Uso: python benchmarks/arranque.py [--repeticiones N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASOS = {
+    'python vacío': 'pass',
+    'import backend': 'import backend',
+    'import backend + streamlit': 'import streamlit, backend',
+}
+
+def medir(codigo, repeticiones):
+    """Tiempos (ms) de lanzar un intérprete nuevo que ejecuta `codigo`"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, check=True)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'Caso':<30}{'mediana (ms)':>14}{'mínimo (ms)':>14}")
+    for nombre, codigo in CASOS.items():
+        try:
+            tiempos = medir(codigo, args.repeticiones)
+        except subprocess.CalledProcessError:
+            print(f"{nombre:<30}{'error':>14}")
+            continue
+        print(f"{nombre:<30}{statistics.median(tiempos):>14.1f}{min(tiempos):>14.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Mide el backtest (preparación y simulación de reglas) sobre instantáneas sintéticas.
+
+Uso: python benchmarks/backtest.py [--ligas N] [--partidos N] [--dias N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backtest
+from almacen_historial import AlmacenHistorial
+from instantaneas import AlmacenInstantaneas
+
+DIA = 86400
+
+def partido_sintetico(azar, liga, numero, inicio):
+    home, away = f"Local{liga}_{numero}", f"Visitante{liga}_{numero}"
+    casas = [{'key': f'casa{c}', 'markets': [{'key': 'h2h', 'outcomes': [
+        {'name': home, 'price': round(azar.uniform(1.2, 6), 2)},
+        {'name': away, 'price': round(azar.uniform(1.2, 6), 2)},
+        {'name': 'Draw', 'price': round(azar.uniform(2.5, 5), 2)},
+    ]}]} for c in range(3)]
+    return {'home_team': home, 'away_team': away, 'bookmakers': casas,
+            'commence_time': datetime.fromtimestamp(inicio, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}
+
+def generar(directorio, ligas, partidos, dias):
+    """Una instantánea diaria de cada partido durante la semana previa y su marcador final"""
+    azar = random.Random(0)
+    almacen = AlmacenInstantaneas(os.path.join(directorio, 'instantaneas'))
+    historial = AlmacenHistorial(os.path.join(directorio, 'historial.db'))
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()
+    marcadores = {}
+    for liga in range(ligas):
+        calendario = [(partido_sintetico(azar, liga, n, inicio), inicio) for n, inicio in enumerate(
+            base + azar.randint(1, dias) * DIA + azar.randint(0, DIA - 1) for _ in range(partidos))]
+        for p, inicio in calendario:
+            fecha = datetime.fromtimestamp(inicio, timezone.utc).strftime('%Y-%m-%d')
+            marcadores[f"{p['home_team']}_vs_{p['away_team']}_{fecha}"] = (
+                f'liga{liga}', azar.randint(0, 3), azar.randint(0, 3))
+        for dia in range(dias):
+            capturado = base + dia * DIA + 12 * 3600
+            vivos = [p for p, inicio in calendario if 0 < inicio - capturado < 7 * DIA]
+            if vivos:
+                almacen.registrar(f'liga{liga}', vivos, capturado=capturado)
+    historial.guardar_resultados(marcadores)
+    return almacen, historial
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ligas', type=int, default=10)
+    parser.add_argument('--partidos', type=int, default=300, help="partidos por liga")
+    parser.add_argument('--dias', type=int, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        inicio = time.perf_counter()
+        almacen, historial = generar(directorio, args.ligas, args.partidos, args.dias)
+        print(f"Datos sintéticos: {args.ligas * args.partidos} partidos en {time.perf_counter() - inicio:.1f} s")
+
+        inicio = time.perf_counter()
+        candidatos = backtest.preparar(almacen, historial.resultados())
+        print(f"preparar: {len(candidatos)} candidatos en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+        reglas = [{'k': k, 'dias': dias, 'cuota_min': 1.0, 'cuota_max': cuota_max}
+                  for k in (3, 5, 10) for dias in (1, 3, 7) for cuota_max in (2.0, 3.0, float('inf'))]
+        inicio = time.perf_counter()
+        tabla = backtest.comparar(candidatos, reglas)
+        transcurrido = (time.perf_counter() - inicio) * 1000
+        print(f"comparar: {len(reglas)} reglas, {int(tabla['apuestas'].sum())} pronósticos en {transcurrido:.0f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Prueba de estrés del historial con muchos escritores a la vez (procesos e hilos).
+
+Cada proceso abre su propio AlmacenHistorial sobre la misma base de datos, como la app y el
+servicio, y reparte sus escrituras entre varios hilos, como las sesiones de Streamlit. Una
+parte de los ids se repite entre escritores para provocar conflictos. Al terminar se
+comprueba que la base de datos está íntegra, que no falta ningún pronóstico, que cada uno
+se guardó una sola vez y, con --maximo-por-fecha, que ninguna fecha lo supera.
+
+Uso:
+    python benchmarks/estres_historial.py
+    python benchmarks/estres_historial.py --procesos 8 --hilos 8 --lotes 200 --lectores 2
+    python benchmarks/estres_historial.py --maximo-por-fecha 5 --fechas 3
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from almacen_historial import AlmacenHistorial
+
+def percentil(ordenados, p):
+    return ordenados[min(len(ordenados) - 1, round(p / 100 * (len(ordenados) - 1)))] if ordenados else 0
+
+def pronostico(azar, fechas):
+    return {'fecha_pronostico': azar.choice(fechas), 'equipos': 'A vs B', 'resultado_probable': 'Gana A',
+            'cuota': round(azar.uniform(1.2, 3.0), 2), 'liga': f'Liga {azar.randrange(20)}'}
+
+def escribir(historial, args, fechas, proceso, hilo, resultado):
+    """Un escritor: --lotes lotes de --tam-lote pronósticos, parte con ids compartidos"""
+    azar = random.Random(proceso * 1000 + hilo)
+    for lote in range(args.lotes):
+        pronosticos = {}
+        for i in range(args.tam_lote):
+            if azar.random() < args.solapamiento:
+                id_partido = f'Compartido_{azar.randrange(args.compartidos)}_vs_X_2026-01-01'
+            else:
+                id_partido = f'P{proceso}H{hilo}_{lote}_{i}_vs_X_2026-01-01'
+            pronosticos[id_partido] = pronostico(azar, fechas)
+        inicio = time.perf_counter()
+        try:
+            guardados = historial.agregar(pronosticos, args.maximo_por_fecha)
+        except sqlite3.Error as e:
+            resultado['errores'].append(f'{type(e).__name__}: {e}')
+            continue
+        resultado['latencias'].append(time.perf_counter() - inicio)
+        resultado['intentados'].update(pronosticos)
+        resultado['guardados'].extend(guardados)
+
+def leer(historial, parar, pausa, resultado):
+    """Un lector: una página del historial cada `pausa` segundos mientras duran las escrituras"""
+    while not parar.wait(pausa):
+        try:
+            historial.contar()
+            historial.consultar(limite=50)
+            resultado['lecturas'] += 1
+        except sqlite3.Error as e:
+            resultado['errores'].append(f'{type(e).__name__}: {e}')
+
+def proceso_escritor(parametros):
+    ruta, args, fechas, proceso = parametros
+    historial = AlmacenHistorial(ruta)
+    resultado = {'intentados': set(), 'guardados': [], 'latencias': [], 'errores': [], 'lecturas': 0}
+    parar = threading.Event()
+    lectores = [threading.Thread(target=leer, args=(historial, parar, args.pausa_lectura, resultado))
+                for _ in range(args.lectores)]
+    escritores = [threading.Thread(target=escribir, args=(historial, args, fechas, proceso, hilo, resultado))
+                  for hilo in range(args.hilos)]
+    for hilo in lectores + escritores:
+        hilo.start()
+    for hilo in escritores:
+        hilo.join()
+    parar.set()
+    for hilo in lectores:
+        hilo.join()
+    return resultado
+
+def comprobar(ruta, resultados, args):
+    """Lista de fallos encontrados en la base de datos final (vacía si todo cuadra)"""
+    fallos = []
+    conn = sqlite3.connect(ruta)
+    integridad = conn.execute("PRAGMA integrity_check").fetchone()[0]
+    if integridad != 'ok':
+        fallos.append(f'integrity_check: {integridad}')
+    en_base = {fila[0] for fila in conn.execute("SELECT id FROM pronosticos")}
+    por_fecha = dict(conn.execute("SELECT fecha_pronostico, COUNT(*) FROM pronosticos GROUP BY fecha_pronostico"))
+    conn.close()
+
+    intentados = set().union(*(r['intentados'] for r in resultados))
+    guardados = [id_partido for r in resultados for id_partido in r['guardados']]
+    if len(guardados) != len(set(guardados)):
+        fallos.append(f'{len(guardados) - len(set(guardados))} pronósticos guardados por dos escritores')
+    if set(guardados) != en_base:
+        fallos.append(f'{len(set(guardados) ^ en_base)} ids no coinciden entre lo devuelto y la base de datos')
+    if args.maximo_por_fecha is None:
+        perdidos = intentados - en_base
+        if perdidos:
+            fallos.append(f'{len(perdidos)} pronósticos perdidos')
+    else:
+        excedidas = {fecha: n for fecha, n in por_fecha.items() if n > args.maximo_por_fecha}
+        if excedidas:
+            fallos.append(f'fechas por encima del máximo: {excedidas}')
+    return fallos, len(en_base), len(intentados)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--procesos', type=int, default=4)
+    parser.add_argument('--hilos', type=int, default=4, help="escritores por proceso")
+    parser.add_argument('--lectores', type=int, default=1, help="hilos lectores por proceso")
+    parser.add_argument('--pausa-lectura', type=float, default=0.05, help="segundos entre páginas de un lector")
+    parser.add_argument('--lotes', type=int, default=100, help="escrituras por escritor")
+    parser.add_argument('--tam-lote', type=int, default=5, help="pronósticos por escritura")
+    parser.add_argument('--solapamiento', type=float, default=0.3, help="fracción de ids compartidos")
+    parser.add_argument('--compartidos', type=int, default=500, help="tamaño del grupo de ids compartidos")
+    parser.add_argument('--fechas', type=int, default=30, help="fechas de pronóstico distintas")
+    parser.add_argument('--maximo-por-fecha', type=int, help="límite de pronósticos por fecha")
+    args = parser.parse_args()
+
+    fechas = [f'2026-01-{dia:02d}' for dia in range(1, min(args.fechas, 28) + 1)]
+    escritores = args.procesos * args.hilos
+    print(f"{args.procesos} procesos x {args.hilos} escritores ({args.lectores} lectores por proceso), "
+          f"{args.lotes} escrituras de {args.tam_lote} pronósticos cada uno")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'historial.db')
+        AlmacenHistorial(ruta).revision()  # esquema creado antes de arrancar los procesos
+        inicio = time.perf_counter()
+        with Pool(args.procesos) as pool:
+            resultados = pool.map(proceso_escritor, [(ruta, args, fechas, p) for p in range(args.procesos)])
+        transcurrido = time.perf_counter() - inicio
+        fallos, en_base, intentados = comprobar(ruta, resultados, args)
+
+    latencias = sorted(t for r in resultados for t in r['latencias'])
+    errores = [e for r in resultados for e in r['errores']]
+    print(f"\n{len(latencias)} escrituras en {transcurrido:.2f} s: {len(latencias) / transcurrido:.0f} escrituras/s "
+          f"({escritores} escritores), {sum(r['lecturas'] for r in resultados)} lecturas")
+    print(f"latencia por escritura: p50 {percentil(latencias, 50) * 1000:.1f} ms, "
+          f"p95 {percentil(latencias, 95) * 1000:.1f} ms, p99 {percentil(latencias, 99) * 1000:.1f} ms")
+    print(f"{intentados} pronósticos distintos enviados, {en_base} en la base de datos")
+    for error in sorted(set(errores)):
+        print(f"❌ {errores.count(error)} x {error}")
+    for fallo in fallos:
+        print(f"❌ {fallo}")
+    if errores or fallos:
+        return 1
+    print("✅ Sin errores, sin pronósticos perdidos ni duplicados")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
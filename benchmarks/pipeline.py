@@ -0,0 +1,255 @@
+"""Benchmark por etapas del flujo de pronóstico contra un servidor local que imita The Odds API.
+
+Usa las respuestas grabadas de benchmarks/fixtures (ver servidor_stub.py) o, si no hay, respuestas
+sintéticas. Mide latencia (p50/p95/p99), rendimiento y pico de memoria de cada etapa y guarda el
+resultado en benchmarks/resultados/ para compararlo con otros commits.
+
+Uso:
+    python benchmarks/pipeline.py
+    python benchmarks/pipeline.py --factor-ligas 10 --factor-partidos 100 --historial 100000
+    python benchmarks/pipeline.py --comparar benchmarks/resultados/<anterior>.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+
+import servidor_stub
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+
+def percentil(ordenados, p):
+    return ordenados[min(len(ordenados) - 1, round(p / 100 * (len(ordenados) - 1)))]
+
+def resumir(latencias, unidades, pico, unidad):
+    """Estadísticas de una etapa a partir de las latencias (s) de cada operación"""
+    ordenados = sorted(latencias)
+    total = sum(latencias)
+    return {
+        'operaciones': len(latencias),
+        'p50_ms': round(percentil(ordenados, 50) * 1000, 3),
+        'p95_ms': round(percentil(ordenados, 95) * 1000, 3),
+        'p99_ms': round(percentil(ordenados, 99) * 1000, 3),
+        'total_s': round(total, 4),
+        'rendimiento': round(unidades / total, 1) if total else None,
+        'unidad': f'{unidad}/s',
+        'pico_memoria_mb': round(pico / 2 ** 20, 2) if pico is not None else None,
+    }
+
+def medir(etapa, repeticiones, memoria=True):
+    """Ejecuta una etapa `repeticiones` veces y una más con tracemalloc (solo para la memoria)"""
+    latencias, unidades, pico = [], 0, None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeticiones):
+            tiempos, n = etapa()
+            latencias += tiempos
+            unidades += n
+        if memoria:  # tracemalloc ralentiza mucho: sus tiempos no se cuentan
+            tracemalloc.start()
+            etapa()
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return latencias, unidades, pico
+
+def cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    funcion(*args)
+    return time.perf_counter() - inicio
+
+def crear_etapas(backend, decodificacion, fixtures, num_historial):
+    """{nombre: (función, unidad)}; cada función devuelve (latencias, unidades procesadas)"""
+    ligas = list(fixtures['odds'])
+    payloads = list(fixtures['odds'].values())
+    num_partidos = sum(len(p) for p in payloads)
+    historial = backend.cargar_historial()
+    hoy = date.today()
+    azar = random.Random(0)
+    contador = iter(range(10 ** 9))
+
+    def pronostico():
+        return {'fecha_pronostico': hoy.strftime('%Y-%m-%d'), 'equipos': 'A vs B', 'resultado_probable': 'Gana A',
+                'cuota': 1.5, 'liga': 'Benchmark', 'deporte': 'soccer_benchmark'}
+
+    def en_frio():
+        backend.cache.limpiar()
+        backend.planificador.limpiar()
+
+    def historial_carga():
+        # Historial previo de num_historial pronósticos en bloques de 1000
+        backend.limpiar_historial()
+        tiempos = []
+        for inicio in range(0, num_historial, 1000):
+            bloque = {f'Previo_{i}_vs_X_2020-01-01': pronostico() for i in range(inicio, min(inicio + 1000, num_historial))}
+            tiempos.append(cronometrar(historial.agregar, bloque))
+        return tiempos, num_historial
+
+    def historial_consulta():
+        ids = [f'Previo_{azar.randrange(max(num_historial, 1))}_vs_X_2020-01-01' for _ in range(500)]
+        ids += [f'Nuevo_{i}_vs_X_2020-01-01' for i in range(500)]
+        return [cronometrar(historial.__contains__, i) for i in ids], len(ids)
+
+    def historial_lectura():
+        return [cronometrar(historial.values)], len(historial)
+
+    def guardar_historial():
+        tiempos = []
+        for _ in range(20):
+            lote = {f'Nuevo_{next(contador)}_vs_X_2020-01-01': pronostico() for _ in range(backend.TOP_K)}
+            tiempos.append(cronometrar(backend.guardar_historial, lote))
+        return tiempos, 20 * backend.TOP_K
+
+    def ligas_activas():
+        en_frio()
+        return [cronometrar(backend.escanear_ligas, ligas)], len(ligas)
+
+    def ligas_activas_cache():
+        return [cronometrar(backend.escanear_ligas, ligas)], len(ligas)
+
+    # Cuerpos de /odds de cada liga tal como llegan de la red, ya descomprimidos
+    cuerpos = [json.dumps(p).encode('utf-8') for p in payloads]
+
+    def decodificar_stdlib():
+        # Lo que hacía response.json(): bytes -> texto -> dicts con todos los campos
+        return [cronometrar(lambda cuerpo: json.loads(cuerpo.decode('utf-8')), c) for c in cuerpos], len(cuerpos)
+
+    def decodificar():
+        return [cronometrar(decodificacion.decodificar_partidos, c, backend.MARKETS) for c in cuerpos], len(cuerpos)
+
+    def decodificar_sin_orjson():
+        # Ruta de respaldo cuando orjson no está instalado
+        orjson, decodificacion.orjson = decodificacion.orjson, None
+        try:
+            return decodificar()
+        finally:
+            decodificacion.orjson = orjson
+
+    def procesar_partidos():
+        return [cronometrar(backend.procesar_partidos, p, historial, hoy) for p in payloads], num_partidos
+
+    def pronostico_completo():
+        en_frio()
+        return [cronometrar(backend.generar_pronostico_diario)], num_partidos
+
+    return {
+        'historial_carga': (historial_carga, 'pronósticos'),
+        'historial_consulta': (historial_consulta, 'consultas'),
+        'historial_lectura': (historial_lectura, 'pronósticos'),
+        'guardar_historial': (guardar_historial, 'pronósticos'),
+        'ligas_activas': (ligas_activas, 'ligas'),
+        'ligas_activas_cache': (ligas_activas_cache, 'ligas'),
+        'decodificar_stdlib': (decodificar_stdlib, 'ligas'),
+        'decodificar': (decodificar, 'ligas'),
+        'decodificar_sin_orjson': (decodificar_sin_orjson, 'ligas'),
+        'procesar_partidos': (procesar_partidos, 'partidos'),
+        'pronostico_completo': (pronostico_completo, 'partidos'),
+    }
+
+def commit_actual():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        cambios = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=RAIZ,
+                                 capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ('-modificado' if cambios else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconocido'
+
+def imprimir(resultados, anterior=None):
+    print(f"\n{'Etapa':<22}{'ops':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rendimiento':>26}{'memoria MB':>12}")
+    for nombre, r in resultados['etapas'].items():
+        rendimiento = f"{r['rendimiento']} {r['unidad']}"
+        linea = (f"{nombre:<22}{r['operaciones']:>7}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+                 f"{rendimiento:>26}{str(r['pico_memoria_mb']):>12}")
+        previo = (anterior or {}).get('etapas', {}).get(nombre)
+        if previo and previo['p50_ms'] and r['p50_ms']:
+            cambio = (r['p50_ms'] / previo['p50_ms'] - 1) * 100
+            linea += f"   p50 {cambio:+.1f}% vs {anterior['commit']}"
+        print(linea)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--factor-ligas', type=int, default=1, help="multiplica el número de ligas")
+    parser.add_argument('--factor-partidos', type=int, default=1, help="multiplica los partidos de cada liga")
+    parser.add_argument('--historial', type=int, default=10000, help="pronósticos previos en el historial")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--latencia', type=float, default=0, help="latencia simulada del servidor (ms)")
+    parser.add_argument('--sinteticas', action='store_true', help="ignora las respuestas grabadas")
+    parser.add_argument('--limitar-peticiones', action='store_true',
+                        help="respeta el límite de peticiones por segundo del cliente (como en producción)")
+    parser.add_argument('--sin-memoria', dest='memoria', action='store_false',
+                        help="no mide el pico de memoria (ahorra una pasada lenta por etapa)")
+    parser.add_argument('--etapas', help="solo estas etapas, separadas por comas")
+    parser.add_argument('--comparar', help="resultado anterior (JSON) con el que comparar")
+    parser.add_argument('--no-guardar', dest='guardar', action='store_false')
+    args = parser.parse_args()
+
+    comparar = os.path.abspath(args.comparar) if args.comparar else None  # antes de cambiar de directorio
+    fixtures = None if args.sinteticas else servidor_stub.cargar_fixtures()
+    origen = 'grabadas' if fixtures else 'sintéticas'
+    fixtures = servidor_stub.escalar(fixtures or servidor_stub.fixtures_sinteticas(),
+                                     args.factor_ligas, args.factor_partidos)
+    print(f"Respuestas {origen}: {len(fixtures['odds'])} ligas, "
+          f"{sum(len(p) for p in fixtures['odds'].values())} partidos, historial de {args.historial}")
+
+    with servidor_stub.ServidorStub(fixtures, latencia=args.latencia / 1000) as servidor, \
+            tempfile.TemporaryDirectory() as directorio:
+        # El backend usa rutas relativas: cachés e historial del benchmark quedan en el temporal
+        os.environ['ODDS_API_URL'] = servidor.url
+        os.environ.setdefault('ODDS_API_KEY', 'benchmark')
+        os.chdir(directorio)
+        sys.path.insert(0, RAIZ)
+        import backend
+        import decodificacion
+
+        backend.DEPORTES = list(fixtures['odds'])
+        ventana = backend.ventana_consulta()
+        for deporte in backend.DEPORTES:  # serializa y comprime las respuestas antes de medir nada
+            servidor.respuesta(deporte, backend.MARKETS, *ventana, comprimir=True)
+        if not args.limitar_peticiones:
+            backend.MAX_PETICIONES_POR_SEGUNDO = 0
+
+        etapas = crear_etapas(backend, decodificacion, fixtures, args.historial)
+        elegidas = args.etapas.split(',') if args.etapas else list(etapas)
+        resultados = {
+            'commit': commit_actual(),
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'parametros': {**vars(args), 'respuestas': origen},
+            'etapas': {},
+        }
+        for nombre in elegidas:
+            funcion, unidad = etapas[nombre]
+            # La carga del historial se mide una vez: el resto de etapas trabajan sobre ese historial
+            repeticiones = 1 if nombre == 'historial_carga' else args.repeticiones
+            print(f"  {nombre}...", end=' ', flush=True)
+            inicio = time.perf_counter()
+            resultados['etapas'][nombre] = resumir(*medir(funcion, repeticiones, args.memoria), unidad=unidad)
+            print(f"{time.perf_counter() - inicio:.1f} s")
+        resultados['peticiones_servidor'] = servidor.peticiones
+        resultados['bytes_servidor'] = servidor.bytes_enviados
+
+    anterior = None
+    if comparar:
+        with open(comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+    imprimir(resultados, anterior)
+    print(f"\n{resultados['peticiones_servidor']} peticiones al servidor, "
+          f"{resultados['bytes_servidor'] / 2 ** 20:.2f} MB enviados")
+
+    if args.guardar:
+        os.makedirs(RESULTADOS, exist_ok=True)
+        ruta = os.path.join(RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}_{resultados['commit']}.json")
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados guardados en {ruta}")
+
+if __name__ == '__main__':
+    main()
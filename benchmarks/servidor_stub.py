@@ -0,0 +1,219 @@
+"""Servidor local que imita The Odds API con respuestas grabadas (benchmarks/fixtures) o sintéticas.
+
+Grabar respuestas reales (consume cuota): python benchmarks/servidor_stub.py grabar soccer_epl soccer_spain_la_liga
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# --- RESPUESTAS ---
+# fixtures = {'grabado': epoch, 'sports': [listado], 'odds': {deporte: [partidos]}}
+
+def partido_sintetico(azar, deporte, numero, inicio, num_casas=20):
+    """Partido con el formato de /odds y cuotas 1X2, totales y hándicap de num_casas casas"""
+    home, away = f"Local {deporte} {numero}", f"Visitante {deporte} {numero}"
+    base = [azar.uniform(1.3, 4.5), azar.uniform(2.8, 4.2), azar.uniform(1.3, 6.0)]
+    mas, local = azar.uniform(1.5, 2.6), azar.uniform(1.5, 2.6)
+    casas = []
+    for c in range(num_casas):
+        variar = lambda p: round(p * azar.uniform(0.93, 1.05), 2)
+        precios = [variar(p) for p in base]
+        casas.append({'key': f'casa_{c}', 'title': f'Casa {c}', 'last_update': inicio, 'markets': [
+            {'key': 'h2h', 'last_update': inicio, 'outcomes': [
+                {'name': home, 'price': precios[0]},
+                {'name': 'Draw', 'price': precios[1]},
+                {'name': away, 'price': precios[2]},
+            ]},
+            {'key': 'totals', 'last_update': inicio, 'outcomes': [
+                {'name': 'Over', 'price': variar(mas), 'point': 2.5},
+                {'name': 'Under', 'price': variar(1 / (1.06 - 1 / mas)), 'point': 2.5},
+            ]},
+            {'key': 'spreads', 'last_update': inicio, 'outcomes': [
+                {'name': home, 'price': variar(local), 'point': -0.5},
+                {'name': away, 'price': variar(1 / (1.06 - 1 / local)), 'point': 0.5},
+            ]},
+        ]})
+    return {'id': f'{deporte}_{numero}', 'sport_key': deporte, 'sport_title': deporte.replace('_', ' ').title(),
+            'commence_time': inicio, 'home_team': home, 'away_team': away, 'bookmakers': casas}
+
+def fixtures_sinteticas(ligas=20, partidos=10, casas=20, semilla=0):
+    """Respuestas inventadas con partidos repartidos en los próximos 10 días"""
+    azar = random.Random(semilla)
+    ahora = datetime.now(timezone.utc)
+    odds = {}
+    for liga in range(ligas):
+        deporte = f'soccer_sintetica_{liga}'
+        odds[deporte] = [
+            partido_sintetico(azar, deporte, n, (ahora + timedelta(minutes=azar.randint(60, 10 * 1440)))
+                              .strftime('%Y-%m-%dT%H:%M:%SZ'), casas)
+            for n in range(partidos)
+        ]
+    sports = [{'key': d, 'group': 'Soccer', 'title': d, 'active': True, 'has_outrights': False} for d in odds]
+    return {'grabado': ahora.timestamp(), 'sports': sports, 'odds': odds}
+
+def cargar_fixtures(directorio=FIXTURES):
+    """Respuestas grabadas con `grabar`, con las fechas desplazadas a hoy; None si no hay"""
+    ruta = os.path.join(directorio, 'respuestas.json')
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding='utf-8') as f:
+        fixtures = json.load(f)
+    desfase = timedelta(seconds=time.time() - fixtures['grabado'])
+    for partidos in fixtures['odds'].values():
+        for partido in partidos:
+            inicio = datetime.fromisoformat(partido['commence_time'].replace('Z', '+00:00')) + desfase
+            partido['commence_time'] = inicio.strftime('%Y-%m-%dT%H:%M:%SZ')
+    return fixtures
+
+def escalar(fixtures, factor_ligas=1, factor_partidos=1):
+    """Multiplica ligas y partidos por liga renombrando claves y equipos (las cuotas se repiten)"""
+    odds = {}
+    for copia_liga in range(factor_ligas):
+        for deporte, partidos in fixtures['odds'].items():
+            clave = deporte if copia_liga == 0 else f'{deporte}_x{copia_liga}'
+            copias = []
+            for copia in range(factor_partidos):
+                for partido in partidos:
+                    sufijo = f' #{copia_liga}.{copia}' if copia_liga or copia else ''
+                    nuevo = dict(partido, sport_key=clave, id=f"{partido['id']}{sufijo}",
+                                 home_team=partido['home_team'] + sufijo, away_team=partido['away_team'] + sufijo)
+                    nuevo['bookmakers'] = [
+                        dict(b, markets=[dict(m, outcomes=[
+                            dict(o, name=o['name'] + sufijo if o['name'] in (partido['home_team'], partido['away_team'])
+                                 else o['name'])
+                            for o in m['outcomes']]) for m in b['markets']])
+                        for b in partido['bookmakers']
+                    ]
+                    copias.append(nuevo)
+            odds[clave] = copias
+    sports = [{'key': d, 'group': 'Soccer', 'title': d, 'active': True, 'has_outrights': False} for d in odds]
+    return {'grabado': fixtures['grabado'], 'sports': sports, 'odds': odds}
+
+# --- SERVIDOR ---
+
+class ServidorStub:
+    """Sirve /v4/sports, /v4/sports/<deporte>/odds y /scores en localhost (usar con `with`)"""
+
+    def __init__(self, fixtures, latencia=0.0):
+        # Cada respuesta se serializa (y comprime) una sola vez por combinación de mercados,
+        # ventana y codificación: el servidor no debe ser el cuello de botella
+        self.partidos = fixtures['odds']
+        self.respuestas = {}
+        self.listado = json.dumps(fixtures['sports']).encode('utf-8')
+        self.latencia = latencia
+        self.peticiones = 0
+        self.bytes_enviados = 0
+        self._lock = threading.Lock()
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', 0), self._manejador())
+        self._servidor.daemon_threads = True
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self._servidor.server_address[1]}/v4/sports'
+
+    def respuesta(self, deporte, mercados, desde=None, hasta=None, comprimir=False):
+        """JSON de /odds de una liga solo con los mercados y el rango de inicio pedidos, como la API real"""
+        clave = (deporte, mercados, desde, hasta, comprimir)
+        if clave not in self.respuestas:
+            pedidos = set(mercados.split(','))
+            # commence_time y los límites tienen el mismo formato ISO: se comparan como texto
+            partidos = [dict(p, bookmakers=[dict(b, markets=[m for m in b['markets'] if m['key'] in pedidos])
+                                            for b in p['bookmakers']])
+                        for p in self.partidos.get(deporte, [])
+                        if (desde is None or p['commence_time'] >= desde)
+                        and (hasta is None or p['commence_time'] <= hasta)]
+            cuerpo = json.dumps(partidos).encode('utf-8')
+            self.respuestas[clave] = gzip.compress(cuerpo, compresslevel=6) if comprimir else cuerpo
+        return self.respuestas[clave]
+
+    def _manejador(self):
+        stub = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # conexiones persistentes, como la API real
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.peticiones += 1
+                if stub.latencia:
+                    time.sleep(stub.latencia)
+                url = urlparse(self.path)
+                partes = url.path.strip('/').split('/')
+                comprimir = False
+                if partes == ['v4', 'sports']:
+                    cuerpo = stub.listado
+                elif len(partes) == 4 and partes[3] == 'odds':
+                    consulta = {nombre: valores[0] for nombre, valores in parse_qs(url.query).items()}
+                    comprimir = 'gzip' in self.headers.get('Accept-Encoding', '')
+                    with stub._lock:
+                        cuerpo = stub.respuesta(partes[2], consulta.get('markets', 'h2h'),
+                                                consulta.get('commenceTimeFrom'), consulta.get('commenceTimeTo'),
+                                                comprimir)
+                elif len(partes) == 4 and partes[3] == 'scores':
+                    cuerpo = b'[]'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                if comprimir:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.send_header('x-requests-remaining', '100000')
+                self.send_header('x-requests-used', str(stub.peticiones))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+                with stub._lock:
+                    stub.bytes_enviados += len(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        return Manejador
+
+    def __enter__(self):
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+# --- GRABACIÓN ---
+
+def grabar(deportes, directorio=FIXTURES):
+    """Descarga el listado y las cuotas reales de unas ligas y las guarda como fixtures"""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import backend
+
+    cliente = backend.obtener_cliente()
+    clave = backend.obtener_api_key()
+    sports = cliente.get(f'{backend.ODDS_API_URL}/', params={'apiKey': clave}).json()
+    odds = {}
+    for deporte in deportes:
+        params = {'apiKey': clave, 'regions': backend.REGIONS, 'markets': backend.MARKETS}
+        odds[deporte] = cliente.get(f'{backend.ODDS_API_URL}/{deporte}/odds/', params=params).json()
+        print(f"{deporte}: {len(odds[deporte])} partidos")
+
+    os.makedirs(directorio, exist_ok=True)
+    with open(os.path.join(directorio, 'respuestas.json'), 'w', encoding='utf-8') as f:
+        json.dump({'grabado': time.time(), 'sports': sports, 'odds': odds}, f, ensure_ascii=False)
+    print(f"Guardado en {directorio} (quedan {cliente.restantes} peticiones)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    grabacion = subparsers.add_parser('grabar', help="graba respuestas reales de la API como fixtures")
+    grabacion.add_argument('deportes', nargs='+')
+    args = parser.parse_args()
+    grabar(args.deportes)
@@ -0,0 +1,142 @@
+import sqlite3
+import threading
+import time
+import zlib
+
+from decodificacion import cargar, volcar
+
+# --- CACHÉ EN DISCO DE RESPUESTAS DE THE ODDS API ---
+# Cada entrada se identifica por (deporte, regions, markets, ventana) y guarda el JSON
+# comprimido junto con la hora de descarga. Sobrevive a reinicios del proceso. La ventana
+# es el rango commenceTimeFrom/commenceTimeTo pedido ('' = todos los partidos).
+# Delante del disco hay una copia en memoria compartida por todos los hilos
+# (y por tanto por todas las sesiones de Streamlit del mismo servidor). Esa copia
+# guarda el JSON comprimido, no los partidos decodificados: cada consulta recibe su
+# propia lista, que se libera en cuanto termina de procesarse. Junto al JSON se guarda el
+# número de partidos, para quien solo quiere contarlos (escaneo de ligas activas) sin
+# descomprimir ni decodificar nada.
+
+class CacheRespuestas:
+    """Caché SQLite con caducidad (TTL) y número máximo de entradas"""
+
+    def __init__(self, ruta, ttl=600, max_entradas=500):
+        self.ruta = ruta
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self._conn = None
+        self._memoria = {}
+        self._lock = threading.Lock()
+
+    def _conexion(self):
+        """Abre la base de datos la primera vez que se usa"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.ruta, check_same_thread=False)
+            # Una caché de antes de las columnas ventana o num_partidos se descarta: no se
+            # sabe qué rango tenía y volver a descargarla es más sencillo que migrarla
+            columnas = {fila[1] for fila in self._conn.execute("PRAGMA table_info(respuestas)")}
+            if columnas and not {'ventana', 'num_partidos'} <= columnas:
+                self._conn.execute("DROP TABLE respuestas")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS respuestas (
+                    deporte TEXT NOT NULL,
+                    regions TEXT NOT NULL,
+                    markets TEXT NOT NULL,
+                    ventana TEXT NOT NULL,
+                    descargado REAL NOT NULL,
+                    ultimo_acceso REAL NOT NULL,
+                    num_partidos INTEGER NOT NULL,
+                    datos BLOB NOT NULL,
+                    PRIMARY KEY (deporte, regions, markets, ventana)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ultimo_acceso ON respuestas (ultimo_acceso)")
+            self._conn.commit()
+        return self._conn
+
+    def obtener(self, deporte, regions, markets, ttl=None, ventana='', solo_numero=False):
+        """Devuelve la respuesta guardada si no ha caducado, o None (ttl sustituye al de la caché)
+
+        Con solo_numero devuelve únicamente cuántos elementos tiene, sin decodificarla.
+        """
+        ahora = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        clave = (deporte, regions, markets, ventana)
+        with self._lock:
+            en_memoria = self._memoria.get(clave)
+            vigente = en_memoria is not None and ahora - en_memoria[0] <= ttl
+            if vigente:
+                self.aciertos += 1
+        if vigente:
+            if solo_numero:
+                return en_memoria[2]
+            # La descompresión no bloquea a los demás hilos
+            return cargar(zlib.decompress(en_memoria[1]))
+
+        with self._lock:
+            conn = self._conexion()
+            fila = conn.execute(
+                "SELECT descargado, datos, num_partidos FROM respuestas "
+                "WHERE deporte = ? AND regions = ? AND markets = ? AND ventana = ?",
+                clave
+            ).fetchone()
+            if fila is None or ahora - fila[0] > ttl:
+                self.fallos += 1
+                return None
+            conn.execute(
+                "UPDATE respuestas SET ultimo_acceso = ? "
+                "WHERE deporte = ? AND regions = ? AND markets = ? AND ventana = ?",
+                (ahora, *clave)
+            )
+            conn.commit()
+            self.aciertos += 1
+            self._guardar_en_memoria(clave, *fila)
+        if solo_numero:
+            return fila[2]
+        return cargar(zlib.decompress(fila[1]))
+
+    def _guardar_en_memoria(self, clave, descargado, blob, num_partidos):
+        """Copia comprimida en memoria limitada al mismo número de entradas que el disco"""
+        self._memoria.pop(clave, None)
+        self._memoria[clave] = (descargado, blob, num_partidos)
+        while len(self._memoria) > self.max_entradas:
+            self._memoria.pop(next(iter(self._memoria)))
+
+    def guardar(self, deporte, regions, markets, datos, ventana=''):
+        """Guarda una respuesta y expulsa las entradas menos usadas si se supera el límite"""
+        ahora = time.time()
+        clave = (deporte, regions, markets, ventana)
+        blob = zlib.compress(volcar(datos))
+        with self._lock:
+            conn = self._conexion()
+            conn.execute(
+                "INSERT OR REPLACE INTO respuestas "
+                "(deporte, regions, markets, ventana, descargado, ultimo_acceso, num_partidos, datos) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*clave, ahora, ahora, len(datos), blob)
+            )
+            self._guardar_en_memoria(clave, ahora, blob, len(datos))
+            conn.execute(
+                """DELETE FROM respuestas WHERE rowid IN (
+                       SELECT rowid FROM respuestas ORDER BY ultimo_acceso DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entradas,)
+            )
+            conn.commit()
+
+    def limpiar(self):
+        """Elimina todas las entradas y reinicia los contadores"""
+        with self._lock:
+            conn = self._conexion()
+            conn.execute("DELETE FROM respuestas")
+            conn.commit()
+            self._memoria.clear()
+            self.aciertos = 0
+            self.fallos = 0
+
+    def estadisticas(self):
+        """Devuelve aciertos, fallos y número de entradas guardadas"""
+        with self._lock:
+            entradas = self._conexion().execute("SELECT COUNT(*) FROM respuestas").fetchone()[0]
+            return {'aciertos': self.aciertos, 'fallos': self.fallos, 'entradas': entradas}
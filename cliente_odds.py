@@ -0,0 +1,96 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# --- CLIENTE HTTP COMPARTIDO PARA THE ODDS API ---
+# Una sola sesión con conexiones persistentes para todas las ligas, reintentos
+# con espera exponencial y control de la cuota mensual mediante las cabeceras
+# x-requests-remaining / x-requests-used que devuelve la API. El listado de deportes no
+# gasta cuota y también trae esas cabeceras: se pide aunque la cuota esté en el mínimo y
+# así, cuando la cuota mensual se renueva, el cliente lo ve sin reiniciar el proceso.
+
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+class CuotaAgotadaError(Exception):
+    """La cuota de peticiones restante está por debajo del mínimo reservado"""
+
+class ClienteOdds:
+    """Sesión HTTP con reintentos, espera exponencial con jitter y control de cuota"""
+
+    def __init__(self, pool=8, reintentos=3, espera_base=0.5, espera_max=8.0,
+                 cuota_minima=10, max_por_segundo=10):
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self.cuota_minima = cuota_minima
+        self.intervalo_minimo = 1.0 / max_por_segundo if max_por_segundo else 0
+        self.restantes = None
+        self.usadas = None
+        self._proxima_peticion = 0.0
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        # Respuestas comprimidas: el JSON de cuotas se reduce varias veces con gzip
+        self.session.headers['Accept-Encoding'] = 'gzip'
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=pool)
+        self.session.mount('https://', adaptador)
+        self.session.mount('http://', adaptador)
+
+    def _esperar_turno(self):
+        """Limita el número de peticiones por segundo entre todos los hilos"""
+        if not self.intervalo_minimo:
+            return
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._proxima_peticion)
+            self._proxima_peticion = turno + self.intervalo_minimo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+    def _espera(self, intento, response=None):
+        """Calcula la espera antes del siguiente intento (respeta Retry-After si existe)"""
+        if response is not None and response.headers.get('Retry-After', '').isdigit():
+            return min(float(response.headers['Retry-After']), self.espera_max)
+        tope = min(self.espera_max, self.espera_base * (2 ** intento))
+        return random.uniform(0, tope)
+
+    def _leer_cuota(self, response):
+        """Actualiza la cuota restante y usada a partir de las cabeceras de la respuesta"""
+        restantes = response.headers.get('x-requests-remaining')
+        usadas = response.headers.get('x-requests-used')
+        with self._lock:
+            if restantes is not None:
+                self.restantes = int(float(restantes))
+            if usadas is not None:
+                self.usadas = int(float(usadas))
+
+    def get(self, url, params=None, timeout=15, gratuita=False):
+        """GET con reintentos ante errores de red, 429 y 5xx
+
+        gratuita: la petición no consume cuota (listado de deportes) y se hace aunque se
+        haya llegado al mínimo reservado; sus cabeceras actualizan la cuota restante.
+        """
+        for intento in range(self.reintentos + 1):
+            if not gratuita and self.restantes is not None and self.restantes <= self.cuota_minima:
+                raise CuotaAgotadaError(f"Quedan {self.restantes} peticiones (mínimo reservado: {self.cuota_minima})")
+
+            self._esperar_turno()
+            try:
+                response = self.session.get(url, params=params, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if intento == self.reintentos:
+                    raise
+                time.sleep(self._espera(intento))
+                continue
+
+            self._leer_cuota(response)
+            if response.status_code in ESTADOS_REINTENTABLES and intento < self.reintentos:
+                time.sleep(self._espera(intento, response))
+                continue
+            # Para las métricas de quien hace la petición: reintentos y bytes recibidos por la red
+            response.reintentos = intento
+            response.bytes_transferidos = response.raw.tell() if response.raw is not None else len(response.content)
+            return response
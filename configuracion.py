@@ -0,0 +1,80 @@
+import os
+import sys
+import threading
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+# --- CONFIGURACIÓN PEREZOSA ---
+# La clave de The Odds API se busca la primera vez que se necesita, en este orden:
+#   1. Variables de entorno ODDS_API_KEY o API_KEY
+#   2. Archivo de secretos .streamlit/secrets.toml (carpeta actual o del usuario)
+#   3. st.secrets, solo si Streamlit ya está cargado (la app web)
+# Así el backend se puede importar y ejecutar sin Streamlit.
+
+VARIABLES_ENTORNO = ('ODDS_API_KEY', 'API_KEY')
+RUTAS_SECRETOS = (
+    os.path.join('.streamlit', 'secrets.toml'),
+    os.path.join(os.path.expanduser('~'), '.streamlit', 'secrets.toml'),
+)
+
+class ConfiguracionError(Exception):
+    """No se encontró la clave de la API en ninguna fuente"""
+
+_api_key = None
+_lock = threading.Lock()
+
+def _desde_entorno():
+    for variable in VARIABLES_ENTORNO:
+        if os.environ.get(variable):
+            return os.environ[variable]
+    return None
+
+def _desde_archivo_secretos():
+    if tomllib is None:
+        return None
+    for ruta in RUTAS_SECRETOS:
+        if os.path.exists(ruta):
+            try:
+                with open(ruta, 'rb') as f:
+                    secretos = tomllib.load(f)
+            except (OSError, tomllib.TOMLDecodeError) as e:
+                print(f"No se pudo leer {ruta}: {e}")
+                continue
+            if secretos.get('API_KEY'):
+                return secretos['API_KEY']
+    return None
+
+def _desde_streamlit():
+    st = sys.modules.get('streamlit')
+    if st is None:
+        return None
+    try:
+        return st.secrets.get('API_KEY')
+    except Exception:  # Sin secrets.toml Streamlit lanza su propio error
+        return None
+
+def claves_secretos_streamlit():
+    """Nombres (no valores) de los secretos que ve Streamlit, para diagnosticar"""
+    st = sys.modules.get('streamlit')
+    try:
+        return list(st.secrets.keys()) if st else []
+    except Exception:
+        return []
+
+def obtener_api_key():
+    """Devuelve la clave de The Odds API; lanza ConfiguracionError si no está configurada"""
+    global _api_key
+    if _api_key is None:
+        with _lock:
+            if _api_key is None:
+                _api_key = _desde_entorno() or _desde_archivo_secretos() or _desde_streamlit()
+    if not _api_key:
+        _api_key = None
+        raise ConfiguracionError(
+            "No se encontró la clave 'API_KEY'. Defínela en la variable de entorno ODDS_API_KEY, "
+            "en .streamlit/secrets.toml o en 'Settings > Secrets' de Streamlit Cloud."
+        )
+    return _api_key
@@ -0,0 +1,75 @@
+import numpy as np
+
+# --- CONSENSO DE CUOTAS ENTRE CASAS DE APUESTAS ---
+# Las cuotas de todos los partidos de una liga se vuelcan en un bloque
+# (partidos x casas x resultados) reservado de antemano, con NaN donde una casa
+# no cotiza un resultado y en las filas de relleno de los partidos con menos
+# casas. Sobre él se calculan a la vez, para cada partido, la mejor cuota, la
+# cuota mediana y la probabilidad de consenso sin el margen de cada casa.
+
+NOMBRES_EMPATE = ['draw', 'tie', 'empate']
+
+# Columnas de la matriz de cuotas 1X2
+LOCAL, EMPATE, VISITANTE = 0, 1, 2
+NUM_RESULTADOS = 3
+
+def nombre_resultado(columna, home_team, away_team):
+    """Texto del pronóstico para una columna de la matriz"""
+    if columna == LOCAL:
+        return f"Gana {home_team}"
+    if columna == VISITANTE:
+        return f"Gana {away_team}"
+    return "Empate"
+
+def columna_resultado(resultado_probable, equipos):
+    """Inversa de nombre_resultado a partir del texto "Local vs Visitante" guardado en el historial"""
+    if resultado_probable == "Empate":
+        return EMPATE
+    home, _, away = equipos.partition(' vs ')
+    if resultado_probable == f"Gana {home}":
+        return LOCAL
+    if resultado_probable == f"Gana {away}":
+        return VISITANTE
+    return -1
+
+def consenso(precios):
+    """Mejor cuota, mediana y probabilidad de consenso sin margen por partido y columna
+
+    precios: (partidos x casas x resultados); las filas enteras de NaN no cuentan.
+    """
+    validos = precios > 0  # NaN > 0 es False
+    cuenta = validos.sum(axis=1)
+    presentes = cuenta > 0
+
+    # Máximo y mediana por columna sin las funciones nan* (mucho más lentas)
+    con_menos_inf = np.where(validos, precios, -np.inf)
+    casa_mejor = con_menos_inf.argmax(axis=1)
+    mejor = np.where(presentes, con_menos_inf.max(axis=1), np.nan)
+
+    ordenados = np.sort(np.where(validos, precios, np.inf), axis=1)
+    centro = np.maximum(cuenta - 1, 0)
+    bajo = np.take_along_axis(ordenados, (centro // 2)[:, None, :], axis=1)[:, 0]
+    alto = np.take_along_axis(ordenados, ((cuenta // 2) * presentes)[:, None, :], axis=1)[:, 0]
+    mediana = np.where(presentes, (bajo + alto) / 2, np.nan)
+
+    # Solo las casas que cotizan todos los resultados del partido permiten quitar su margen
+    completas = (validos == presentes[:, None, :]).all(axis=2)
+    num_completas = completas.sum(axis=1)
+    implicitas = np.where(presentes[:, None, :], 1 / np.where(validos, precios, 1), 0)
+    suma = np.where(completas, implicitas.sum(axis=2), 1)[:, :, None]
+    with np.errstate(invalid='ignore'):  # un partido sin ninguna cuota queda en NaN
+        normalizadas = np.where(completas[:, :, None], implicitas / suma, 0)
+    media = normalizadas.sum(axis=1) / np.maximum(num_completas, 1)[:, None]
+
+    # Sin casas completas se usa la inversa de la mediana
+    inversa_mediana = np.where(presentes, 1 / np.where(presentes, mediana, 1), 0)
+    probabilidad = np.where((num_completas > 0)[:, None], media, inversa_mediana)
+    total = probabilidad.sum(axis=1, keepdims=True)
+    probabilidad = np.where(presentes.any(axis=1)[:, None], probabilidad / np.where(total > 0, total, 1), probabilidad)
+    return {
+        'mejor': mejor,
+        'mediana': mediana,
+        'casa_mejor': np.where(presentes, casa_mejor, -1),
+        'probabilidad': probabilidad,
+        'num_resultados': presentes.sum(axis=1)
+    }
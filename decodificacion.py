@@ -0,0 +1,90 @@
+import gc
+import json
+import sys
+import threading
+from contextlib import contextmanager
+
+try:
+    import orjson
+except ImportError:  # opcional (pip install orjson): sin él se usa json de la biblioteca estándar
+    orjson = None
+
+# --- DECODIFICACIÓN DE LAS RESPUESTAS DE /odds ---
+# response.json() pasa el cuerpo entero a texto y de ahí a dicts con todo lo que manda la
+# API (títulos de las casas, last_update de cada casa y mercado...). Aquí los bytes van
+# directos al parser (orjson si está instalado) y cada partido se reduce, según se recorre
+# la lista, a los campos que leen el pronóstico, la caché y las instantáneas; los
+# resultados (name, price, point) se reutilizan tal cual.
+#
+# La mayor parte del tiempo no era el parser sino el recolector de ciclos: una respuesta
+# crea cientos de miles de dicts y listas, y cada pocos cientos de objetos nuevos el
+# recolector vuelve a recorrerlos. El árbol de un JSON no puede tener ciclos, así que
+# durante la decodificación el recolector queda en pausa (la cuenta de referencias sigue
+# liberando memoria como siempre). La decodificación se hace en el hilo de descarga de
+# cada liga (ThreadPoolExecutor de backend.iterar_partidos_ligas), no en el de la interfaz.
+
+CAMPOS_PARTIDO = ('id', 'sport_key', 'sport_title', 'commence_time', 'home_team', 'away_team')
+
+_lock_gc = threading.Lock()
+_pausas = 0  # decodificaciones en curso (varios hilos a la vez)
+_reactivar = False  # si el recolector estaba activo antes de la primera pausa
+
+@contextmanager
+def recolector_en_pausa():
+    """Desactiva el recolector de ciclos mientras dure el bloque, también con varios hilos"""
+    global _pausas, _reactivar
+    with _lock_gc:
+        if _pausas == 0:
+            _reactivar = gc.isenabled()
+            gc.disable()
+        _pausas += 1
+    try:
+        yield
+    finally:
+        with _lock_gc:
+            _pausas -= 1
+            if _pausas == 0 and _reactivar:
+                gc.enable()
+
+def cargar(datos):
+    """JSON (bytes o str) -> objetos Python"""
+    with recolector_en_pausa():
+        if orjson is not None:
+            return orjson.loads(datos)
+        return json.loads(datos)
+
+def volcar(objeto):
+    """Objetos Python -> JSON en bytes UTF-8"""
+    if orjson is not None:
+        return orjson.dumps(objeto)
+    return json.dumps(objeto, ensure_ascii=False).encode('utf-8')
+
+def _interna(valor):
+    return sys.intern(valor) if isinstance(valor, str) else valor
+
+def compactar(partido, mercados=None):
+    """Partido con solo los campos que se usan; mercados: claves que se conservan (None = todas)"""
+    compacto = {campo: _interna(partido[campo]) for campo in CAMPOS_PARTIDO if campo in partido}
+    casas = []
+    for bookmaker in partido.get('bookmakers') or ():
+        markets = [{'key': _interna(market.get('key')), 'outcomes': market.get('outcomes') or []}
+                   for market in bookmaker.get('markets') or ()
+                   if mercados is None or market.get('key') in mercados]
+        if markets:
+            casas.append({'key': _interna(bookmaker.get('key')), 'markets': markets})
+    compacto['bookmakers'] = casas
+    return compacto
+
+def proyectar(partidos, mercados=None):
+    """Compacta la lista de partidos en su sitio: cada original se libera en cuanto se reduce"""
+    mercados = set(mercados.split(',')) if isinstance(mercados, str) else mercados
+    for i, partido in enumerate(partidos):
+        if isinstance(partido, dict):
+            partidos[i] = compactar(partido, mercados)
+    return partidos
+
+def decodificar_partidos(datos, mercados=None):
+    """Cuerpo de una respuesta de /odds -> lista de partidos compactos"""
+    with recolector_en_pausa():
+        partidos = cargar(datos)
+        return proyectar(partidos, mercados) if isinstance(partidos, list) else partidos
@@ -0,0 +1,100 @@
+import re
+import unicodedata
+from datetime import datetime
+
+# --- PARTIDOS DUPLICADOS ENTRE LIGAS ---
+# Un mismo partido puede llegar por varias claves de la API (soccer_friendlies y
+# soccer_friendlies_clubs, la clave de la fase previa y la de la competición...), a veces
+# con otra grafía de los equipos ("Man Utd" / "Manchester United", "Atlético" /
+# "Atletico") o con la hora algo cambiada. El índice se llena durante una pasada y descarta
+# las repeticiones antes del consenso, así que tampoco llegan al top-K. Se reconoce un
+# partido por el id de evento de la API y, si no coincide, por los dos equipos
+# normalizados con una tolerancia en la hora de inicio.
+
+TOLERANCIA_INICIO = 12 * 3600  # segundos; dos partidos entre los mismos equipos nunca están tan cerca
+
+# Palabras que unas casas ponen y otras no
+RELLENO = {'fc', 'cf', 'afc', 'sc', 'ac', 'cd', 'ca', 'fk', 'sk', 'if', 'bk', 'club', 'the'}
+
+# Nombre normalizado -> nombre normalizado canónico
+ALIAS = {
+    'man utd': 'manchester united',
+    'man united': 'manchester united',
+    'man city': 'manchester city',
+    'spurs': 'tottenham hotspur',
+    'tottenham': 'tottenham hotspur',
+    'wolves': 'wolverhampton wanderers',
+    'wolverhampton': 'wolverhampton wanderers',
+    'brighton': 'brighton and hove albion',
+    'brighton hove albion': 'brighton and hove albion',
+    'newcastle': 'newcastle united',
+    'west ham': 'west ham united',
+    'nottm forest': 'nottingham forest',
+    'psg': 'paris saint germain',
+    'paris sg': 'paris saint germain',
+    'inter': 'inter milan',
+    'internazionale': 'inter milan',
+    'milan': 'ac milan',
+    'bayern munchen': 'bayern munich',
+    'bayern': 'bayern munich',
+    'atletico madrid': 'atletico de madrid',
+    'atl madrid': 'atletico de madrid',
+    'athletic bilbao': 'athletic club',
+    'athletic': 'athletic club',
+    'sporting lisbon': 'sporting cp',
+    'sporting': 'sporting cp',
+    'usa': 'united states',
+    'korea republic': 'south korea',
+}
+
+_NO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+
+def normalizar_equipo(nombre):
+    """Nombre comparable: sin acentos ni mayúsculas, sin signos, sin relleno y con los alias resueltos"""
+    texto = unicodedata.normalize('NFKD', nombre)
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).casefold()
+    palabras = _NO_ALFANUMERICO.sub(' ', texto.replace('&', ' and ')).split()
+    texto = ' '.join([p for p in palabras if p not in RELLENO] or palabras)
+    return ALIAS.get(texto, texto)
+
+def inicio_epoch(partido):
+    """Hora de inicio del partido crudo como epoch, o None si no se puede leer"""
+    try:
+        return datetime.fromisoformat(partido['commence_time'].replace('Z', '+00:00')).timestamp()
+    except (KeyError, AttributeError, ValueError):
+        return None
+
+class IndiceDuplicados:
+    """Partidos ya vistos en una pasada, por id de evento y por equipos normalizados"""
+
+    def __init__(self, tolerancia=TOLERANCIA_INICIO):
+        self.tolerancia = tolerancia
+        self._ids = set()
+        self._por_equipos = {}   # (equipo, equipo) ordenados -> [inicios]
+        self._normalizados = {}  # nombre tal cual llega -> normalizado
+
+    def _normalizar(self, nombre):
+        normalizado = self._normalizados.get(nombre)
+        if normalizado is None:
+            normalizado = self._normalizados[nombre] = normalizar_equipo(nombre)
+        return normalizado
+
+    def _equipos(self, partido):
+        # Sin orden: en campo neutral cada liga puede poner de local a uno distinto
+        return tuple(sorted((self._normalizar(partido['home_team']), self._normalizar(partido['away_team']))))
+
+    def contiene(self, partido, inicio=None):
+        """True si el partido ya se registró en esta pasada, aunque sea desde otra liga"""
+        if partido.get('id') in self._ids:
+            return True
+        inicio = inicio_epoch(partido) if inicio is None else inicio
+        inicios = self._por_equipos.get(self._equipos(partido), ())
+        return inicio is not None and any(abs(inicio - otro) <= self.tolerancia for otro in inicios)
+
+    def agregar(self, partido, inicio=None):
+        """Registra un partido que ya se ha procesado"""
+        if partido.get('id'):
+            self._ids.add(partido['id'])
+        inicio = inicio_epoch(partido) if inicio is None else inicio
+        if inicio is not None:
+            self._por_equipos.setdefault(self._equipos(partido), []).append(inicio)
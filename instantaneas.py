@@ -0,0 +1,210 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from itertools import groupby
+
+import numpy as np
+
+from consenso import NUM_RESULTADOS
+from mercados import consenso_partidos
+
+# --- SERIE TEMPORAL DE CUOTAS (INSTANTÁNEAS) ---
+# Cada descarga de una liga se guarda como registros de tamaño fijo (un registro por
+# partido con el consenso de los tres resultados) añadidos al final de un archivo binario:
+#     instantaneas/<fecha del partido>/<deporte>.bin
+# Todas las instantáneas de un partido quedan en el mismo archivo, así que consultar
+# su evolución lee un único archivo pequeño. Un índice SQLite guarda por partido su
+# archivo, hora de inicio y primera/última captura. Nada se carga entero en memoria.
+
+REGISTRO = np.dtype([
+    ('evento', '<i8'),                         # hash del id del partido
+    ('capturado', '<f8'),                      # epoch de la descarga
+    ('mediana', '<f4', (NUM_RESULTADOS,)),     # cuota mediana de LOCAL, EMPATE, VISITANTE
+    ('mejor', '<f4', (NUM_RESULTADOS,)),
+    ('probabilidad', '<f4', (NUM_RESULTADOS,)),
+    ('num_casas', '<u2'),
+])
+
+def hash_evento(id_partido):
+    """Entero de 63 bits estable para un id de partido (cabe en un INTEGER de SQLite)"""
+    return int.from_bytes(hashlib.blake2b(id_partido.encode('utf-8'), digest_size=8).digest(), 'little') >> 1
+
+class AlmacenInstantaneas:
+    """Instantáneas de cuotas por partido, particionadas por fecha del partido y liga"""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _conexion(self):
+        """Crea el directorio y el índice de partidos la primera vez que se usa"""
+        if self._conn is None:
+            os.makedirs(self.directorio, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.directorio, 'indice.db'), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS eventos (
+                        id TEXT PRIMARY KEY,
+                        evento INTEGER NOT NULL,
+                        deporte TEXT NOT NULL,
+                        fecha TEXT NOT NULL,
+                        equipos TEXT NOT NULL,
+                        inicio REAL NOT NULL,
+                        primera REAL NOT NULL,
+                        ultima REAL NOT NULL,
+                        num_instantaneas INTEGER NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_eventos_fecha ON eventos (fecha, deporte)")
+            self._conn = conn
+        return self._conn
+
+    def _archivo(self, fecha, deporte):
+        return os.path.join(self.directorio, fecha, f"{deporte}.bin")
+
+    def registrar(self, deporte, partidos, capturado=None):
+        """Añade una instantánea de la liga; devuelve el número de partidos guardados"""
+        capturado = time.time() if capturado is None else capturado
+        validos = []
+        for partido in partidos:
+            try:
+                inicio = datetime.fromisoformat(partido['commence_time'].replace('Z', '+00:00'))
+                validos.append((partido, partido['home_team'], partido['away_team'], inicio))
+            except (KeyError, TypeError, AttributeError, ValueError):
+                continue
+
+        # Consenso 1X2 de toda la liga de una vez
+        tabla = consenso_partidos([partido for partido, *_ in validos]) if validos else None
+        if tabla is None:
+            return 0
+        datos = tabla['datos']
+
+        particiones = {}
+        eventos = []
+        for i, (partido, home, away, inicio) in enumerate(validos):
+            if not tabla['num_casas'][i]:
+                continue
+            fecha = inicio.strftime('%Y-%m-%d')
+            id_partido = f"{home}_vs_{away}_{fecha}"  # mismo id que crear_id_partido
+            evento = hash_evento(id_partido)
+            particiones.setdefault(fecha, []).append(
+                (evento, capturado, datos['mediana'][i], datos['mejor'][i], datos['probabilidad'][i],
+                 tabla['num_casas'][i])
+            )
+            eventos.append((id_partido, evento, deporte, fecha, f"{home} vs {away}", inicio.timestamp(),
+                            capturado, capturado))
+        if not eventos:
+            return 0
+
+        with self._lock:
+            conn = self._conexion()
+            for fecha, filas in particiones.items():
+                os.makedirs(os.path.join(self.directorio, fecha), exist_ok=True)
+                # Una sola escritura por archivo: solo se añade, nunca se reescribe
+                with open(self._archivo(fecha, deporte), 'ab') as f:
+                    f.write(np.array(filas, dtype=REGISTRO).tobytes())
+            with conn:
+                conn.executemany("""
+                    INSERT INTO eventos VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
+                    ON CONFLICT (id) DO UPDATE SET
+                        inicio = excluded.inicio, ultima = excluded.ultima,
+                        num_instantaneas = num_instantaneas + 1
+                """, eventos)
+        return len(eventos)
+
+    def _leer(self, fecha, deporte):
+        """Registros de una partición (si una escritura quedó a medias se descarta el final)"""
+        ruta = self._archivo(fecha, deporte)
+        if not os.path.exists(ruta):
+            return np.empty(0, dtype=REGISTRO)
+        completos = os.path.getsize(ruta) // REGISTRO.itemsize
+        return np.fromfile(ruta, dtype=REGISTRO, count=completos)
+
+    def evento(self, id_partido):
+        """Fila del índice de un partido, o None si nunca se capturó"""
+        with self._lock:
+            return self._conexion().execute("SELECT * FROM eventos WHERE id = ?", (id_partido,)).fetchone()
+
+    def serie(self, id_partido, desde=None, hasta=None):
+        """Instantáneas de un partido ordenadas por hora de captura, opcionalmente en un rango (epoch)"""
+        indice = self.evento(id_partido)
+        if indice is None:
+            return np.empty(0, dtype=REGISTRO)
+        return self._serie(self._leer(indice['fecha'], indice['deporte']), indice['evento'], desde, hasta)
+
+    @staticmethod
+    def _serie(registros, evento, desde=None, hasta=None):
+        mascara = registros['evento'] == evento
+        if desde is not None:
+            mascara &= registros['capturado'] >= desde
+        if hasta is not None:
+            mascara &= registros['capturado'] <= hasta
+        serie = registros[mascara]
+        return serie[np.argsort(serie['capturado'], kind='stable')]
+
+    def particiones(self, desde=None, hasta=None):
+        """Recorre una a una las particiones de partidos entre dos fechas (YYYY-MM-DD): (eventos, registros)"""
+        with self._lock:
+            filas = self._conexion().execute(
+                "SELECT * FROM eventos WHERE fecha >= ? AND fecha <= ? ORDER BY fecha, deporte",
+                (desde or '0000-00-00', hasta or '9999-99-99')
+            ).fetchall()
+        for particion, eventos in groupby(filas, key=lambda fila: (fila['fecha'], fila['deporte'])):
+            yield list(eventos), self._leer(*particion)
+
+    def movimiento(self, id_partido):
+        """Cuota de apertura, de cierre (última antes del inicio) y variación por resultado, o None"""
+        return next(iter(self.movimientos([id_partido]).values()), None)
+
+    def movimientos(self, ids):
+        """{id: movimiento} de varios partidos leyendo cada partición una sola vez"""
+        ids = list(ids)
+        with self._lock:
+            conn = self._conexion()
+            indices = []
+            for i in range(0, len(ids), 500):
+                bloque = ids[i:i + 500]
+                indices += conn.execute(
+                    f"SELECT * FROM eventos WHERE id IN ({','.join('?' * len(bloque))})", bloque
+                ).fetchall()
+        indices.sort(key=lambda fila: (fila['fecha'], fila['deporte']))
+
+        resultados = {}
+        particion, registros = None, None
+        for indice in indices:
+            if particion != (indice['fecha'], indice['deporte']):
+                particion = (indice['fecha'], indice['deporte'])
+                registros = self._leer(*particion)
+            serie = self._serie(registros, indice['evento'], hasta=indice['inicio'])
+            if len(serie):
+                resultados[indice['id']] = self._resumir(indice, serie)
+        return resultados
+
+    @staticmethod
+    def _resumir(indice, serie):
+        apertura, cierre = serie[0], serie[-1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variacion = (cierre['mediana'] / apertura['mediana'] - 1) * 100
+
+        def lista(valores, decimales=3):  # float32 -> float con los decimales que tenía la cuota
+            return np.round(valores.astype(float), decimales).tolist()
+
+        return {
+            'id': indice['id'],
+            'equipos': indice['equipos'],
+            'deporte': indice['deporte'],
+            'inicio': datetime.fromtimestamp(indice['inicio']),
+            'num_instantaneas': len(serie),
+            'apertura': lista(apertura['mediana']),
+            'cierre': lista(cierre['mediana']),
+            'minima': lista(np.fmin.reduce(serie['mediana'], axis=0)),
+            'maxima': lista(np.fmax.reduce(serie['mediana'], axis=0)),
+            'variacion_pct': lista(variacion, 2),
+            'probabilidad_apertura': lista(apertura['probabilidad'], 4),
+            'probabilidad_cierre': lista(cierre['probabilidad'], 4),
+        }
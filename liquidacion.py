@@ -0,0 +1,87 @@
+import csv
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from almacen_historial import GANADO, PERDIDO
+from mercados import liquidar as acertado
+
+# --- LIQUIDACIÓN DE PRONÓSTICOS Y MÉTRICAS DE ACIERTO ---
+# Los marcadores finales llegan del endpoint /scores de The Odds API o de un CSV.
+# Con ellos cada pronóstico pendiente pasa a ganado o perdido, y sobre los
+# liquidados se calculan tasa de acierto, ROI (1 unidad por pronóstico a la
+# cuota guardada) y calibración por tramos de cuota.
+
+# Límites de los tramos de cuota para la calibración
+TRAMOS_CUOTA = [1.0, 1.3, 1.6, 2.0, 2.5, 3.5, np.inf]
+
+def marcadores_api(eventos, deporte):
+    """Marcadores de los partidos terminados en una respuesta de /scores: {id: (deporte, local, visitante)}"""
+    marcadores = {}
+    for evento in eventos:
+        if not evento.get('completed') or not evento.get('scores'):
+            continue
+        try:
+            home, away = evento['home_team'], evento['away_team']
+            goles = {s['name']: int(s['score']) for s in evento['scores']}
+            fecha = datetime.fromisoformat(evento['commence_time'].replace('Z', '+00:00'))
+            marcadores[f"{home}_vs_{away}_{fecha.strftime('%Y-%m-%d')}"] = (deporte, goles[home], goles[away])
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Marcador ignorado en {deporte}: {e}")
+    return marcadores
+
+def importar_marcadores(ruta):
+    """Lee marcadores de un CSV con columnas id (o home_team, away_team, fecha), goles_local y goles_visitante"""
+    marcadores = {}
+    with open(ruta, newline='', encoding='utf-8') as f:
+        for numero, fila in enumerate(csv.DictReader(f), 2):
+            try:
+                id_partido = fila.get('id') or f"{fila['home_team']}_vs_{fila['away_team']}_{fila['fecha']}"
+                marcadores[id_partido] = (fila.get('deporte'), int(fila['goles_local']), int(fila['goles_visitante']))
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Línea {numero} de {ruta} ignorada: {e}")
+    return marcadores
+
+def liquidar(pendientes, resultados):
+    """Estado de los pronósticos pendientes con marcador conocido: {id: (estado, marcador)}"""
+    estados = {}
+    for id_partido, pronostico in pendientes:
+        if id_partido not in resultados:
+            continue
+        goles_local, goles_visitante = resultados[id_partido]
+        ganado = acertado(pronostico, goles_local, goles_visitante)
+        if ganado is None:  # mercado desconocido: se queda pendiente
+            continue
+        estados[id_partido] = (GANADO if ganado else PERDIDO, f"{goles_local}-{goles_visitante}")
+    return estados
+
+def tabla_liquidados(pronosticos):
+    """DataFrame de los pronósticos ya liquidados con columnas ganado y beneficio"""
+    df = pd.DataFrame(list(pronosticos))
+    if df.empty or 'estado' not in df:
+        return pd.DataFrame(columns=['liga', 'cuota', 'ganado', 'beneficio'])
+    df = df[df['estado'].isin([GANADO, PERDIDO])].copy()
+    df['ganado'] = df['estado'] == GANADO
+    df['beneficio'] = np.where(df['ganado'], df['cuota'] - 1, -1.0)
+    return df
+
+def rendimiento(df, por=None):
+    """Apuestas, aciertos, tasa de acierto (%), beneficio y ROI (%) en total o agrupado por una columna"""
+    grupos = df.groupby(por, observed=True) if por else df.groupby(np.zeros(len(df), dtype=int))
+    tabla = grupos.agg(apuestas=('ganado', 'size'), aciertos=('ganado', 'sum'), beneficio=('beneficio', 'sum'))
+    tabla['tasa_acierto'] = (tabla['aciertos'] / tabla['apuestas'] * 100).round(2)
+    tabla['roi'] = (tabla['beneficio'] / tabla['apuestas'] * 100).round(2)
+    tabla['beneficio'] = tabla['beneficio'].round(2)
+    return tabla if por else tabla.reset_index(drop=True)
+
+def calibracion(df, tramos=TRAMOS_CUOTA):
+    """Por tramo de cuota: probabilidad implícita media frente a la tasa de acierto real"""
+    df = df.assign(
+        tramo=pd.cut(df['cuota'], tramos, right=False),
+        implicita=1 / df['cuota'],
+    )
+    tabla = rendimiento(df, por='tramo')
+    tabla['probabilidad_implicita'] = (df.groupby('tramo', observed=True)['implicita'].mean() * 100).round(2)
+    tabla['desviacion'] = (tabla['tasa_acierto'] - tabla['probabilidad_implicita']).round(2)
+    return tabla
@@ -0,0 +1,317 @@
+import numpy as np
+
+from consenso import EMPATE, LOCAL, NOMBRES_EMPATE, VISITANTE, consenso, nombre_resultado
+
+# --- MERCADOS DE APUESTA ---
+# Registro de evaluadores, uno por tipo de mercado de The Odds API. Cada evaluador sabe
+# leer la línea de su mercado, clasificar sus resultados en columnas, poner nombre a cada
+# resultado y decidir cuál gana con el marcador final. El consenso entre casas es el
+# mismo para todos (consenso.consenso). Todos los mercados de MARKETS llegan en la misma
+# respuesta de /odds, así que añadir un mercado no añade peticiones (sí gasta más cuota:
+# la API cobra por mercado y región).
+#
+# En los mercados con línea (totales, hándicap) cada casa puede cotizar una distinta:
+# se usa la línea que cotizan más casas y solo las de medio punto (2.5, -1.5...), que
+# nunca acaban en empate con devolución de la apuesta.
+
+MERCADOS = {}
+
+# Línea de los mercados que no tienen (en los arrays de floats)
+SIN_LINEA = np.inf
+
+def registrar(clase):
+    """Decorador: añade un evaluador al registro con su clave de la API"""
+    MERCADOS[clase.clave] = clase()
+    return clase
+
+def _por_nombre(nombres, columnas):
+    """Columna de cada resultado según su nombre exacto ({'Over': 0, ...}), -1 si no está"""
+    resultado = np.full(len(nombres), -1)
+    for nombre, columna in columnas.items():
+        resultado[nombres == nombre] = columna
+    return resultado
+
+class Mercado:
+    """Evaluador de un tipo de mercado: línea, clasificación de resultados, nombre y liquidación"""
+
+    clave = None
+    num_resultados = 2
+    min_resultados = 2  # resultados cotizados necesarios para fiarse del consenso
+
+    def linea(self, outcomes, home, away):
+        """Línea que cotiza una casa (None en mercados sin línea)"""
+        return None
+
+    def linea_valida(self, linea):
+        return True
+
+    def columnas(self, nombres, locales, visitantes):
+        """Columna de cada resultado (arrays alineados de nombres y equipos), -1 si no se reconoce"""
+        raise NotImplementedError
+
+    def nombre(self, columna, home, away, linea):
+        """Texto del pronóstico (es lo que se guarda en el historial)"""
+        raise NotImplementedError
+
+    def columna_ganadora(self, goles_local, goles_visitante, linea):
+        raise NotImplementedError
+
+    def columna_resultado(self, texto, home, away, linea):
+        """Inversa de nombre(), o -1"""
+        for columna in range(self.num_resultados):
+            if self.nombre(columna, home, away, linea) == texto:
+                return columna
+        return -1
+
+def _medio_punto(linea):
+    return linea is not None and (linea * 2) % 2 == 1
+
+@registrar
+class Ganador(Mercado):
+    """1X2: local, empate o visitante"""
+
+    clave = 'h2h'
+    num_resultados = 3
+
+    def columnas(self, nombres, locales, visitantes):
+        # De menos a más prioridad: un equipo llamado "Draw" sigue siendo el equipo
+        columnas = np.where(np.isin(np.char.lower(nombres), NOMBRES_EMPATE), EMPATE, -1)
+        columnas[nombres == visitantes] = VISITANTE
+        columnas[nombres == locales] = LOCAL
+        return columnas
+
+    def nombre(self, columna, home, away, linea):
+        return nombre_resultado(columna, home, away)
+
+    def columna_ganadora(self, goles_local, goles_visitante, linea):
+        if goles_local > goles_visitante:
+            return LOCAL
+        if goles_local < goles_visitante:
+            return VISITANTE
+        return EMPATE
+
+@registrar
+class Totales(Mercado):
+    """Más/menos goles que la línea"""
+
+    clave = 'totals'
+    MAS, MENOS = 0, 1
+
+    def linea(self, outcomes, home, away):
+        return next((o.get('point') for o in outcomes if o.get('name') == 'Over'), None)
+
+    def linea_valida(self, linea):
+        return _medio_punto(linea)
+
+    def columnas(self, nombres, locales, visitantes):
+        return _por_nombre(nombres, {'Over': self.MAS, 'Under': self.MENOS})
+
+    def nombre(self, columna, home, away, linea):
+        return f"{'Más' if columna == self.MAS else 'Menos'} de {linea:g} goles"
+
+    def columna_ganadora(self, goles_local, goles_visitante, linea):
+        return self.MAS if goles_local + goles_visitante > linea else self.MENOS
+
+@registrar
+class Handicap(Mercado):
+    """Hándicap (spreads): la línea es la del local y el visitante tiene la contraria"""
+
+    clave = 'spreads'
+    LOCAL, VISITANTE = 0, 1
+
+    def linea(self, outcomes, home, away):
+        return next((o.get('point') for o in outcomes if o.get('name') == home), None)
+
+    def linea_valida(self, linea):
+        return _medio_punto(linea)
+
+    def columnas(self, nombres, locales, visitantes):
+        columnas = np.where(nombres == visitantes, self.VISITANTE, -1)
+        columnas[nombres == locales] = self.LOCAL
+        return columnas
+
+    def nombre(self, columna, home, away, linea):
+        if columna == self.LOCAL:
+            return f"{home} {linea:+g}"
+        return f"{away} {-linea:+g}"
+
+    def columna_ganadora(self, goles_local, goles_visitante, linea):
+        return self.LOCAL if goles_local + linea > goles_visitante else self.VISITANTE
+
+@registrar
+class AmbosMarcan(Mercado):
+    """Ambos equipos marcan (btts): sí o no"""
+
+    clave = 'btts'
+    SI, NO = 0, 1
+
+    def columnas(self, nombres, locales, visitantes):
+        return _por_nombre(nombres, {'Yes': self.SI, 'No': self.NO})
+
+    def nombre(self, columna, home, away, linea):
+        return f"Ambos marcan: {'Sí' if columna == self.SI else 'No'}"
+
+    def columna_ganadora(self, goles_local, goles_visitante, linea):
+        return self.SI if goles_local > 0 and goles_visitante > 0 else self.NO
+
+# --- EVALUACIÓN DE UNA LIGA ---
+# Una sola pasada por el payload aplana las cuotas en columnas: una fila por partido, casa
+# y mercado (de cada casa vale el primer mercado de cada clave) y un resultado por cuota.
+# Todo lo demás se hace con NumPy para la liga entera: clasificar los resultados, elegir
+# la línea más cotizada de cada partido, el consenso entre casas y el mejor mercado.
+
+def aplanar(partidos, claves):
+    """Cuotas de los partidos en columnas: filas (partido, mercado, línea, casa) y resultados (fila, nombre, precio)"""
+    indice_mercado = {clave: m for m, clave in enumerate(claves)}
+    evaluadores = [MERCADOS[clave] for clave in claves]
+    f_partido, f_mercado, f_linea, f_casa = [], [], [], []
+    r_fila, r_nombre, r_precio = [], [], []
+
+    for i, partido in enumerate(partidos):
+        home, away = partido['home_team'], partido['away_team']
+        for bookmaker in partido.get('bookmakers') or ():
+            vistos = set()
+            for market in bookmaker.get('markets') or ():
+                # Un mercado sin clave cuenta como 1X2, como en las primeras versiones de la API
+                m = indice_mercado.get(market.get('key', 'h2h'))
+                if m is None or m in vistos:
+                    continue
+                vistos.add(m)
+                outcomes = market.get('outcomes') or ()
+                linea = evaluadores[m].linea(outcomes, home, away)
+                if not evaluadores[m].linea_valida(linea):
+                    continue
+                fila = len(f_partido)
+                f_partido.append(i)
+                f_mercado.append(m)
+                f_linea.append(SIN_LINEA if linea is None else linea)
+                f_casa.append(bookmaker.get('key'))
+                for outcome in outcomes:
+                    r_fila.append(fila)
+                    r_nombre.append(outcome.get('name'))
+                    r_precio.append(outcome.get('price'))
+
+    return {
+        'claves': list(claves),
+        'locales': np.array([partido['home_team'] for partido in partidos], dtype=str),
+        'visitantes': np.array([partido['away_team'] for partido in partidos], dtype=str),
+        'partido': np.array(f_partido, dtype=np.intp),
+        'mercado': np.array(f_mercado, dtype=np.intp),
+        'linea': np.array(f_linea, dtype=float),
+        'casa': f_casa,
+        'fila': np.array(r_fila, dtype=np.intp),
+        'nombre': np.array(r_nombre, dtype=str),
+        'precio': np.array(r_precio, dtype=float),
+    }
+
+def consenso_mercado(tabla, m):
+    """Consenso de un mercado de la tabla aplanada en todos sus partidos, con la línea más cotizada de cada uno
+
+    Devuelve None si ningún partido cotiza el mercado.
+    """
+    evaluador = MERCADOS[tabla['claves'][m]]
+    num_partidos = len(tabla['locales'])
+    filas = np.flatnonzero(tabla['mercado'] == m)
+    if not len(filas):
+        return None
+    partido, linea = tabla['partido'][filas], tabla['linea'][filas]
+
+    # Casas por (partido, línea); de cada partido se queda la línea con más casas y, a
+    # igualdad, la que aparece antes
+    orden = np.lexsort((filas, linea, partido))
+    p, l = partido[orden], linea[orden]
+    inicios = np.flatnonzero(np.r_[True, (p[1:] != p[:-1]) | (l[1:] != l[:-1])])
+    veces = np.diff(np.r_[inicios, len(orden)])
+    grupos = np.lexsort((orden[inicios], -veces, p[inicios]))
+    primeros = grupos[np.r_[True, p[inicios][grupos][1:] != p[inicios][grupos][:-1]]]
+    linea_partido = np.full(num_partidos, SIN_LINEA)
+    linea_partido[p[inicios][primeros]] = l[inicios][primeros]
+    elegidas = linea == linea_partido[partido]
+    filas, partido = filas[elegidas], partido[elegidas]
+
+    # Posición de cada casa dentro de su partido (las filas van en orden de partido)
+    casa = np.arange(len(filas)) - np.searchsorted(partido, partido)
+    num_casas = np.bincount(partido, minlength=num_partidos)
+    max_casas = int(num_casas.max())
+    fila_casa = np.full((num_partidos, max_casas), -1)
+    fila_casa[partido, casa] = filas
+
+    # Resultados de las filas elegidas, clasificados en su columna
+    posicion = np.full(len(tabla['partido']), -1)
+    posicion[filas] = np.arange(len(filas))
+    indice = posicion[tabla['fila']]
+    de_mercado = np.flatnonzero(indice >= 0)
+    indice = indice[de_mercado]
+    columna = evaluador.columnas(tabla['nombre'][de_mercado], tabla['locales'][partido[indice]],
+                                 tabla['visitantes'][partido[indice]])
+    reconocidos = columna >= 0
+    destino = ((partido[indice] * max_casas + casa[indice]) * evaluador.num_resultados + columna)[reconocidos]
+    precio = tabla['precio'][de_mercado][reconocidos]
+
+    # Si una casa repite un resultado vale la última cuota
+    _, desde_el_final = np.unique(destino[::-1], return_index=True)
+    ultimos = len(destino) - 1 - desde_el_final
+    precios = np.full((num_partidos, max_casas, evaluador.num_resultados), np.nan)
+    precios.reshape(-1)[destino[ultimos]] = precio[ultimos]
+
+    return {
+        'datos': consenso(precios),
+        'num_casas': num_casas,
+        'fila_casa': fila_casa,
+        'linea': linea_partido,
+    }
+
+def consenso_partidos(partidos, clave='h2h'):
+    """Consenso de un mercado para cada partido (num_casas 0 si no lo cotiza), o None si ninguno lo cotiza"""
+    return consenso_mercado(aplanar(partidos, [clave]), 0)
+
+def evaluar_partidos(partidos, mercados=('h2h',)):
+    """El resultado más probable de cada partido entre varios mercados (o None), en el orden de entrada"""
+    tabla = aplanar(partidos, mercados)
+    elegidos = [None] * len(partidos)  # (probabilidad en %, mercado, consenso)
+    for m, clave in enumerate(tabla['claves']):
+        resultado = consenso_mercado(tabla, m)
+        if resultado is None:
+            continue
+        datos = resultado['datos']
+        validos = np.flatnonzero((resultado['num_casas'] > 0)
+                                 & (datos['num_resultados'] >= MERCADOS[clave].min_resultados))
+        columnas = datos['probabilidad'][validos].argmax(axis=1)
+        probabilidades = datos['probabilidad'][validos, columnas]
+        # Redondeo de Python, el mismo con el que se muestra y se compara
+        for i, columna, probabilidad in zip(validos.tolist(), columnas.tolist(), probabilidades.tolist()):
+            porcentaje = round(probabilidad * 100, 2)
+            if elegidos[i] is None or porcentaje > elegidos[i][0]:
+                elegidos[i] = (porcentaje, clave, columna, resultado)
+
+    # Solo los partidos con resultado vuelven a objetos Python
+    resultados = []
+    for i, elegido in enumerate(elegidos):
+        if elegido is None:
+            resultados.append(None)
+            continue
+        porcentaje, clave, columna, resultado = elegido
+        datos, linea = resultado['datos'], float(resultado['linea'][i])
+        resultados.append({
+            'columna': columna,  # el texto del pronóstico sale de MERCADOS[mercado].nombre
+            'cuota': round(float(datos['mediana'][i, columna]), 2),
+            'mejor_cuota': float(datos['mejor'][i, columna]),
+            'casa_mejor_cuota': tabla['casa'][resultado['fila_casa'][i, datos['casa_mejor'][i, columna]]],
+            'probabilidad_implicita': porcentaje,
+            'num_casas': int(resultado['num_casas'][i]),
+            'mercado': clave,
+            'linea': None if linea == SIN_LINEA else linea,
+        })
+    return resultados
+
+def liquidar(pronostico, goles_local, goles_visitante):
+    """True si el pronóstico guardado acertó, False si no; None si no se puede interpretar"""
+    evaluador = MERCADOS.get(pronostico.get('mercado') or 'h2h')
+    if evaluador is None:
+        return None
+    home, _, away = pronostico['equipos'].partition(' vs ')
+    linea = pronostico.get('linea')
+    columna = evaluador.columna_resultado(pronostico['resultado_probable'], home, away, linea)
+    if columna < 0:
+        return None
+    return columna == evaluador.columna_ganadora(goles_local, goles_visitante, linea)
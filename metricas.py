@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from archivos import escribir_json_atomico
+
+# --- MÉTRICAS DEL PROCESO ---
+# Contadores, valores puntuales y medidas de tiempo con etiquetas (deporte, código...).
+# Un único registro por proceso, compartido por todos los hilos y, en la app web,
+# por todas las sesiones. Se exporta como JSON (archivo o /metrics.json) y en el
+# formato de texto de Prometheus (/metrics).
+
+MUESTRAS_PERCENTILES = 256  # últimas observaciones con las que se calculan p50/p95
+
+def _clave(nombre, etiquetas):
+    return nombre, tuple(sorted(etiquetas.items()))
+
+class _Medida:
+    __slots__ = ('n', 'suma', 'maximo', 'ultimo', 'muestras')
+
+    def __init__(self):
+        self.n = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+        self.ultimo = 0.0
+        self.muestras = deque(maxlen=MUESTRAS_PERCENTILES)
+
+    def observar(self, valor):
+        self.n += 1
+        self.suma += valor
+        self.maximo = max(self.maximo, valor)
+        self.ultimo = valor
+        self.muestras.append(valor)
+
+    def resumen(self):
+        ordenadas = sorted(self.muestras)
+        percentil = lambda p: ordenadas[min(len(ordenadas) - 1, round(p * (len(ordenadas) - 1)))]
+        return {'n': self.n, 'suma': round(self.suma, 6), 'media': round(self.suma / self.n, 6),
+                'p50': round(percentil(0.5), 6), 'p95': round(percentil(0.95), 6),
+                'max': round(self.maximo, 6), 'ultimo': round(self.ultimo, 6)}
+
+class RegistroMetricas:
+    """Contadores, valores y medidas de tiempo con etiquetas, seguros entre hilos"""
+
+    def __init__(self):
+        self._contadores = {}
+        self._valores = {}
+        self._medidas = {}
+        self._lock = threading.Lock()
+        self.inicio = time.time()
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        clave = _clave(nombre, etiquetas)
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+
+    def fijar(self, nombre, valor, **etiquetas):
+        with self._lock:
+            self._valores[_clave(nombre, etiquetas)] = valor
+
+    def observar(self, nombre, valor, **etiquetas):
+        clave = _clave(nombre, etiquetas)
+        with self._lock:
+            medida = self._medidas.get(clave)
+            if medida is None:
+                medida = self._medidas[clave] = _Medida()
+            medida.observar(valor)
+
+    @contextmanager
+    def cronometro(self, nombre, **etiquetas):
+        """Observa en `nombre` los segundos que tarda el bloque (también si lanza una excepción)"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nombre, time.perf_counter() - inicio, **etiquetas)
+
+    def instantanea(self):
+        """Copia de todas las métricas como listas de dicts (lista para JSON o un DataFrame)"""
+        with self._lock:
+            return {
+                'inicio': self.inicio,
+                'generado': time.time(),
+                'contadores': [{'nombre': n, 'etiquetas': dict(e), 'valor': v} for (n, e), v in self._contadores.items()],
+                'valores': [{'nombre': n, 'etiquetas': dict(e), 'valor': v} for (n, e), v in self._valores.items()],
+                'medidas': [{'nombre': n, 'etiquetas': dict(e), **m.resumen()} for (n, e), m in self._medidas.items()],
+            }
+
+    def texto_prometheus(self):
+        """Métricas en el formato de exposición de texto de Prometheus"""
+        def etiquetas(e, **extra):
+            pares = {**e, **extra}
+            return '{' + ','.join(f'{k}="{v}"' for k, v in pares.items()) + '}' if pares else ''
+
+        datos = self.instantanea()
+        lineas = []
+        for c in datos['contadores']:
+            lineas.append(f"{c['nombre']}{etiquetas(c['etiquetas'])} {c['valor']}")
+        for v in datos['valores']:
+            lineas.append(f"{v['nombre']}{etiquetas(v['etiquetas'])} {v['valor']}")
+        for m in datos['medidas']:
+            lineas.append(f"{m['nombre']}{etiquetas(m['etiquetas'], quantile='0.5')} {m['p50']}")
+            lineas.append(f"{m['nombre']}{etiquetas(m['etiquetas'], quantile='0.95')} {m['p95']}")
+            lineas.append(f"{m['nombre']}_sum{etiquetas(m['etiquetas'])} {m['suma']}")
+            lineas.append(f"{m['nombre']}_count{etiquetas(m['etiquetas'])} {m['n']}")
+        return '\n'.join(lineas) + '\n'
+
+    def exportar(self, ruta):
+        """Escribe la instantánea en un JSON (temporal + renombrado, nunca queda a medias)"""
+        escribir_json_atomico(ruta, self.instantanea())
+
+    def limpiar(self):
+        with self._lock:
+            self._contadores.clear()
+            self._valores.clear()
+            self._medidas.clear()
+            self.inicio = time.time()
+
+    def servir(self, puerto, host='127.0.0.1'):
+        """Expone /metrics (Prometheus) y /metrics.json en un hilo aparte; devuelve el servidor"""
+        # Solo lo usa el demonio: importarlo arriba lo pagaría cada `import backend`
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registro = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    cuerpo, tipo = registro.texto_prometheus().encode('utf-8'), 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    cuerpo, tipo = json.dumps(registro.instantanea()).encode('utf-8'), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', tipo)
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        servidor = ThreadingHTTPServer((host, puerto), Manejador)
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        return servidor
+
+# Registro del proceso
+registro = RegistroMetricas()
@@ -0,0 +1,83 @@
+import sys
+from datetime import datetime, timezone
+
+from mercados import MERCADOS
+
+# --- PARTIDO PROCESADO ---
+# Registro compacto de cada partido candidato: __slots__ en lugar de un dict por partido,
+# nombres de equipos, ligas y casas internados (una sola copia de cada cadena aunque el
+# payload de la API ya se haya liberado) y la hora de inicio como epoch. El id, el texto
+# del partido, la fecha formateada y el pronóstico se construyen solo al pedirlos, es decir,
+# para las filas que se muestran o se guardan. Se lee igual que el dict de antes:
+# p['cuota'], p.get('deporte'), p.items().
+
+class PartidoProcesado:
+    """Partido con su resultado más probable según el consenso de las casas"""
+
+    __slots__ = ('local', 'visitante', 'inicio', 'columna', 'cuota', 'mejor_cuota', 'casa_mejor_cuota',
+                 'probabilidad_implicita', 'num_casas', 'liga', 'deporte', 'mercado', 'linea')
+
+    # Claves del acceso tipo dict, en el orden de items()
+    CAMPOS = ('id', 'equipos', 'fecha', 'fecha_objeto', 'resultado_probable', 'cuota', 'mejor_cuota',
+              'casa_mejor_cuota', 'probabilidad_implicita', 'num_casas', 'liga', 'deporte', 'mercado', 'linea')
+
+    def __init__(self, local, visitante, inicio, columna, cuota, mejor_cuota, casa_mejor_cuota,
+                 probabilidad_implicita, num_casas, liga, deporte=None, mercado='h2h', linea=None):
+        self.local = sys.intern(local)
+        self.visitante = sys.intern(visitante)
+        self.inicio = inicio  # epoch UTC
+        self.columna = columna
+        self.cuota = cuota
+        self.mejor_cuota = mejor_cuota
+        self.casa_mejor_cuota = sys.intern(casa_mejor_cuota)
+        self.probabilidad_implicita = probabilidad_implicita
+        self.num_casas = num_casas
+        self.liga = sys.intern(liga)
+        self.deporte = sys.intern(deporte) if deporte else deporte
+        self.mercado = sys.intern(mercado)
+        self.linea = linea
+
+    # --- Campos derivados ---
+
+    @property
+    def fecha_objeto(self):
+        return datetime.fromtimestamp(self.inicio, timezone.utc)
+
+    @property
+    def id(self):
+        # Mismo formato que backend.crear_id_partido
+        return f"{self.local}_vs_{self.visitante}_{self.fecha_objeto.strftime('%Y-%m-%d')}"
+
+    @property
+    def equipos(self):
+        return f"{self.local} vs {self.visitante}"
+
+    @property
+    def fecha(self):
+        return self.fecha_objeto.strftime('%d-%m-%Y %H:%M')
+
+    @property
+    def resultado_probable(self):
+        return MERCADOS[self.mercado].nombre(self.columna, self.local, self.visitante, self.linea)
+
+    # --- Acceso tipo dict ---
+
+    def __getitem__(self, clave):
+        if clave not in self.CAMPOS:
+            raise KeyError(clave)
+        return getattr(self, clave)
+
+    def get(self, clave, defecto=None):
+        return getattr(self, clave) if clave in self.CAMPOS else defecto
+
+    def __contains__(self, clave):
+        return clave in self.CAMPOS
+
+    def keys(self):
+        return self.CAMPOS
+
+    def items(self):
+        return [(clave, getattr(self, clave)) for clave in self.CAMPOS]
+
+    def __repr__(self):
+        return f"PartidoProcesado({self.equipos!r}, {self.fecha!r}, {self.resultado_probable!r}, cuota={self.cuota})"
@@ -0,0 +1,143 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# --- PLANIFICADOR ADAPTATIVO DE CONSULTAS POR LIGA ---
+# Recuerda, para cada liga, cuándo se descargó por última vez, cuántos partidos
+# tenía y cuándo empieza el próximo. Con eso decide la antigüedad máxima que se
+# tolera en la caché de esa liga:
+#   - partido inminente        -> se refresca a menudo
+#   - partidos en unos días    -> cada vez con menos frecuencia
+#   - liga vacía               -> espera exponencial (1 h, 2 h, 4 h... hasta un día)
+# Cada cierto tiempo se hace un barrido completo para detectar ligas que vuelven a tener partidos.
+
+HORA = 3600
+
+class PlanificadorLigas:
+    """Estado persistente de cada liga y antigüedad máxima de sus datos en caché"""
+
+    def __init__(self, ruta, intervalo_inminente=300, intervalo_base=600, intervalo_lejano=1800,
+                 espera_vacia=HORA, espera_maxima=24 * HORA, barrido_completo=12 * HORA):
+        self.ruta = ruta
+        self.intervalo_inminente = intervalo_inminente
+        self.intervalo_base = intervalo_base
+        self.intervalo_lejano = intervalo_lejano
+        self.espera_vacia = espera_vacia
+        self.espera_maxima = espera_maxima
+        self.barrido_completo = barrido_completo
+        self._conn = None
+        self._ligas = None
+        self._ultimo_barrido = 0.0
+        self._lock = threading.Lock()
+
+    def _conexion(self):
+        """Abre la base de datos y carga en memoria el estado de todas las ligas"""
+        if self._conn is None:
+            conn = sqlite3.connect(self.ruta, check_same_thread=False)
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS ligas (
+                        deporte TEXT PRIMARY KEY,
+                        ultima_consulta REAL NOT NULL,
+                        num_partidos INTEGER NOT NULL,
+                        proximo_partido REAL,
+                        vacias_seguidas INTEGER NOT NULL
+                    )
+                """)
+                conn.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+            self._ligas = {fila[0]: fila[1:] for fila in conn.execute("SELECT * FROM ligas")}
+            fila = conn.execute("SELECT valor FROM meta WHERE clave = 'ultimo_barrido'").fetchone()
+            self._ultimo_barrido = float(fila[0]) if fila else 0.0
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _proximo_partido(partidos, ahora):
+        """Hora (epoch) del primer partido que aún no ha empezado, o None"""
+        proximo = None
+        for partido in partidos:
+            try:
+                inicio = datetime.fromisoformat(partido['commence_time'].replace('Z', '+00:00')).timestamp()
+            except (KeyError, TypeError, AttributeError, ValueError):
+                continue
+            if inicio >= ahora and (proximo is None or inicio < proximo):
+                proximo = inicio
+        return proximo
+
+    def registrar(self, deporte, partidos, ahora=None):
+        """Anota el resultado de una descarga real de la liga (no las lecturas de caché ni los errores)"""
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            conn = self._conexion()
+            anterior = self._ligas.get(deporte)
+            vacias = 0 if partidos else (anterior[3] + 1 if anterior else 1)
+            estado = (ahora, len(partidos), self._proximo_partido(partidos, ahora), vacias)
+            self._ligas[deporte] = estado
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO ligas VALUES (?, ?, ?, ?, ?)", (deporte, *estado))
+
+    def intervalo(self, deporte, ahora=None):
+        """Segundos que pueden pasar entre dos descargas de la liga según su actividad"""
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            self._conexion()
+            estado = self._ligas.get(deporte)
+        if estado is None:
+            return 0  # Nunca consultada
+        _, num_partidos, proximo, vacias = estado
+        if not num_partidos:
+            return min(self.espera_vacia * 2 ** (vacias - 1), self.espera_maxima)
+        if proximo is None or proximo - ahora <= 6 * HORA:
+            return self.intervalo_inminente
+        if proximo - ahora <= 48 * HORA:
+            return self.intervalo_base
+        return self.intervalo_lejano
+
+    def barrido_pendiente(self, ahora=None):
+        """True si toca volver a consultar todas las ligas, activas o no"""
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            self._conexion()
+            return ahora - self._ultimo_barrido >= self.barrido_completo
+
+    def planificar(self, deportes, ahora=None):
+        """Devuelve {deporte: antigüedad máxima en segundos} y si la pasada es un barrido completo"""
+        ahora = time.time() if ahora is None else ahora
+        completo = self.barrido_pendiente(ahora)
+        antiguedades = {}
+        for deporte in deportes:
+            intervalo = self.intervalo(deporte, ahora)
+            antiguedades[deporte] = min(intervalo, self.intervalo_base) if completo else intervalo
+        return antiguedades, completo
+
+    def pendientes(self, antiguedades, ahora=None):
+        """Ligas de la planificación cuya última descarga es más antigua de lo permitido"""
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            self._conexion()
+            return [d for d, maxima in antiguedades.items()
+                    if d not in self._ligas or ahora - self._ligas[d][0] > maxima]
+
+    def completar_barrido(self, ahora=None):
+        """Marca como hecho el barrido completo (solo si la pasada terminó)"""
+        ahora = time.time() if ahora is None else ahora
+        with self._lock:
+            conn = self._conexion()
+            self._ultimo_barrido = ahora
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('ultimo_barrido', ?)", (str(ahora),))
+
+    def forzar_barrido(self):
+        """La próxima pasada consultará todas las ligas"""
+        self.completar_barrido(0.0)
+
+    def limpiar(self):
+        """Olvida el estado de todas las ligas"""
+        with self._lock:
+            conn = self._conexion()
+            with conn:
+                conn.execute("DELETE FROM ligas")
+                conn.execute("DELETE FROM meta")
+            self._ligas.clear()
+            self._ultimo_barrido = 0.0
@@ -0,0 +1,263 @@
+from collections import namedtuple
+
+# --- REGISTRO DE LIGAS ---
+# Todas las competiciones de fútbol de The Odds API con sus atributos: región
+# (confederación), país, género, nivel (1 = primera división) y tipo de competición.
+# Se construye una sola vez al importar el módulo, junto con un índice por cada
+# atributo, de modo que agrupar por región o quedarse con "las primeras divisiones
+# de Europa" son búsquedas en diccionarios y no comparaciones de subcadenas.
+
+class Liga(namedtuple('Liga', 'clave nombre pais region nivel genero tipo')):
+    __slots__ = ()
+
+    @property
+    def titulo(self):
+        """Nombre con el país, para distinguir las muchas Premier League"""
+        return f"{self.nombre} ({self.pais})" if self.pais else self.nombre
+
+# Atributos indexados
+ATRIBUTOS = ('pais', 'region', 'nivel', 'genero', 'tipo')
+
+EUROPA, SUDAMERICA, NORTEAMERICA, ASIA, AFRICA = 'Europa', 'Sudamérica', 'Norteamérica', 'Asia', 'África'
+INTERNACIONAL, OTRAS = 'Internacional', 'Otras regiones'
+MASC, FEM = 'masculino', 'femenino'
+LIGA, COPA, SELECCIONES, AMISTOSOS, JUVENIL = 'liga', 'copa de clubes', 'selecciones', 'amistosos', 'juvenil'
+
+# (clave, nombre, país, región, nivel, género, tipo); el orden es el de consulta
+LIGAS = [
+    # --- LIGAS EUROPEAS PRINCIPALES ---
+    ('soccer_epl', 'Premier League', 'Inglaterra', EUROPA, 1, MASC, LIGA),
+    ('soccer_efl_champ', 'EFL Championship', 'Inglaterra', EUROPA, 2, MASC, LIGA),
+    ('soccer_england_league1', 'League One', 'Inglaterra', EUROPA, 3, MASC, LIGA),
+    ('soccer_england_league2', 'League Two', 'Inglaterra', EUROPA, 4, MASC, LIGA),
+    ('soccer_spain_la_liga', 'La Liga', 'España', EUROPA, 1, MASC, LIGA),
+    ('soccer_spain_segunda_division', 'Segunda División', 'España', EUROPA, 2, MASC, LIGA),
+    ('soccer_italy_serie_a', 'Serie A', 'Italia', EUROPA, 1, MASC, LIGA),
+    ('soccer_italy_serie_b', 'Serie B', 'Italia', EUROPA, 2, MASC, LIGA),
+    ('soccer_germany_bundesliga', 'Bundesliga', 'Alemania', EUROPA, 1, MASC, LIGA),
+    ('soccer_germany_bundesliga2', '2. Bundesliga', 'Alemania', EUROPA, 2, MASC, LIGA),
+    ('soccer_germany_liga3', '3. Liga', 'Alemania', EUROPA, 3, MASC, LIGA),
+    ('soccer_france_ligue_one', 'Ligue 1', 'Francia', EUROPA, 1, MASC, LIGA),
+    ('soccer_france_ligue_two', 'Ligue 2', 'Francia', EUROPA, 2, MASC, LIGA),
+    ('soccer_netherlands_eredivisie', 'Eredivisie', 'Países Bajos', EUROPA, 1, MASC, LIGA),
+    ('soccer_portugal_primeira_liga', 'Primeira Liga', 'Portugal', EUROPA, 1, MASC, LIGA),
+    ('soccer_belgium_first_div', 'First Division A', 'Bélgica', EUROPA, 1, MASC, LIGA),
+    ('soccer_switzerland_superleague', 'Super League', 'Suiza', EUROPA, 1, MASC, LIGA),
+    ('soccer_austria_bundesliga', 'Bundesliga', 'Austria', EUROPA, 1, MASC, LIGA),
+    ('soccer_turkey_super_league', 'Süper Lig', 'Turquía', EUROPA, 1, MASC, LIGA),
+    ('soccer_greece_super_league', 'Super League', 'Grecia', EUROPA, 1, MASC, LIGA),
+    ('soccer_denmark_superliga', 'Superliga', 'Dinamarca', EUROPA, 1, MASC, LIGA),
+    ('soccer_sweden_allsvenskan', 'Allsvenskan', 'Suecia', EUROPA, 1, MASC, LIGA),
+    ('soccer_norway_eliteserien', 'Eliteserien', 'Noruega', EUROPA, 1, MASC, LIGA),
+    ('soccer_finland_veikkausliiga', 'Veikkausliiga', 'Finlandia', EUROPA, 1, MASC, LIGA),
+    ('soccer_poland_ekstraklasa', 'Ekstraklasa', 'Polonia', EUROPA, 1, MASC, LIGA),
+    ('soccer_czech_republic_fnl', 'Fortuna Liga', 'República Checa', EUROPA, 1, MASC, LIGA),
+    ('soccer_slovakia_super_liga', 'Super Liga', 'Eslovaquia', EUROPA, 1, MASC, LIGA),
+    ('soccer_hungary_nb_i', 'NB I', 'Hungría', EUROPA, 1, MASC, LIGA),
+    ('soccer_romania_liga_1', 'Liga 1', 'Rumania', EUROPA, 1, MASC, LIGA),
+    ('soccer_bulgaria_first_league', 'First League', 'Bulgaria', EUROPA, 1, MASC, LIGA),
+    ('soccer_croatia_hnl', 'HNL', 'Croacia', EUROPA, 1, MASC, LIGA),
+    ('soccer_serbia_super_liga', 'Super Liga', 'Serbia', EUROPA, 1, MASC, LIGA),
+    ('soccer_slovenia_prvaliga', 'PrvaLiga', 'Eslovenia', EUROPA, 1, MASC, LIGA),
+    ('soccer_russia_premier_league', 'Premier League', 'Rusia', EUROPA, 1, MASC, LIGA),
+    ('soccer_ukraine_premier_league', 'Premier League', 'Ucrania', EUROPA, 1, MASC, LIGA),
+
+    # --- COMPETICIONES EUROPEAS ---
+    ('soccer_uefa_champs_league', 'Champions League', None, EUROPA, None, MASC, COPA),
+    ('soccer_uefa_europa_league', 'Europa League', None, EUROPA, None, MASC, COPA),
+    ('soccer_uefa_europa_conference_league', 'Europa Conference League', None, EUROPA, None, MASC, COPA),
+    ('soccer_uefa_nations_league', 'Nations League', None, EUROPA, None, MASC, SELECCIONES),
+    ('soccer_uefa_euros', 'Eurocopa', None, EUROPA, None, MASC, SELECCIONES),
+    ('soccer_uefa_euros_qualification', 'Clasificación Eurocopa', None, EUROPA, None, MASC, SELECCIONES),
+
+    # --- LIGAS SUDAMERICANAS ---
+    ('soccer_brazil_campeonato', 'Campeonato Brasileiro Série A', 'Brasil', SUDAMERICA, 1, MASC, LIGA),
+    ('soccer_brazil_serie_b', 'Campeonato Brasileiro Série B', 'Brasil', SUDAMERICA, 2, MASC, LIGA),
+    ('soccer_argentina_primera_division', 'Primera División', 'Argentina', SUDAMERICA, 1, MASC, LIGA),
+    ('soccer_chile_primera_division', 'Primera División', 'Chile', SUDAMERICA, 1, MASC, LIGA),
+    ('soccer_colombia_primera_a', 'Primera A', 'Colombia', SUDAMERICA, 1, MASC, LIGA),
+    ('soccer_peru_primera_division', 'Primera División', 'Perú', SUDAMERICA, 1, MASC, LIGA),
+    ('soccer_uruguay_primera_division', 'Primera División', 'Uruguay', SUDAMERICA, 1, MASC, LIGA),
+    ('soccer_ecuador_primera_a', 'Primera A', 'Ecuador', SUDAMERICA, 1, MASC, LIGA),
+    ('soccer_bolivia_primera_division', 'Primera División', 'Bolivia', SUDAMERICA, 1, MASC, LIGA),
+    ('soccer_paraguay_primera_division', 'Primera División', 'Paraguay', SUDAMERICA, 1, MASC, LIGA),
+    ('soccer_venezuela_primera_profesional', 'Primera Profesional', 'Venezuela', SUDAMERICA, 1, MASC, LIGA),
+    ('soccer_conmebol_copa_libertadores', 'Copa Libertadores', None, SUDAMERICA, None, MASC, COPA),
+    ('soccer_conmebol_copa_sudamericana', 'Copa Sudamericana', None, SUDAMERICA, None, MASC, COPA),
+    ('soccer_copa_america', 'Copa América', None, SUDAMERICA, None, MASC, SELECCIONES),
+    ('soccer_conmebol_wc_qualification', 'Clasificación Mundial CONMEBOL', None, SUDAMERICA, None, MASC, SELECCIONES),
+
+    # --- LIGAS NORTEAMERICANAS ---
+    ('soccer_usa_mls', 'Major League Soccer', 'Estados Unidos', NORTEAMERICA, 1, MASC, LIGA),
+    ('soccer_mexico_ligamx', 'Liga MX', 'México', NORTEAMERICA, 1, MASC, LIGA),
+    ('soccer_canada_cpl', 'Canadian Premier League', 'Canadá', NORTEAMERICA, 1, MASC, LIGA),
+    ('soccer_concacaf_champions_league', 'Champions League CONCACAF', None, NORTEAMERICA, None, MASC, COPA),
+    ('soccer_concacaf_gold_cup', 'Copa Oro CONCACAF', None, NORTEAMERICA, None, MASC, SELECCIONES),
+    ('soccer_concacaf_nations_league', 'Nations League CONCACAF', None, NORTEAMERICA, None, MASC, SELECCIONES),
+    ('soccer_concacaf_wc_qualification', 'Clasificación Mundial CONCACAF', None, NORTEAMERICA, None, MASC, SELECCIONES),
+
+    # --- LIGAS ASIÁTICAS ---
+    ('soccer_japan_j_league', 'J1 League', 'Japón', ASIA, 1, MASC, LIGA),
+    ('soccer_japan_j_league_2', 'J2 League', 'Japón', ASIA, 2, MASC, LIGA),
+    ('soccer_south_korea_k_league_1', 'K League 1', 'Corea del Sur', ASIA, 1, MASC, LIGA),
+    ('soccer_china_super_league', 'Chinese Super League', 'China', ASIA, 1, MASC, LIGA),
+    ('soccer_australia_aleague', 'A-League', 'Australia', ASIA, 1, MASC, LIGA),
+    ('soccer_saudi_arabia_pro_league', 'Pro League', 'Arabia Saudí', ASIA, 1, MASC, LIGA),
+    ('soccer_uae_arabian_gulf_league', 'Arabian Gulf League', 'Emiratos Árabes Unidos', ASIA, 1, MASC, LIGA),
+    ('soccer_qatar_stars_league', 'Stars League', 'Qatar', ASIA, 1, MASC, LIGA),
+    ('soccer_iran_pro_league', 'Pro League', 'Irán', ASIA, 1, MASC, LIGA),
+    ('soccer_iraq_premier_league', 'Premier League', 'Irak', ASIA, 1, MASC, LIGA),
+    ('soccer_thailand_premier_league', 'Premier League', 'Tailandia', ASIA, 1, MASC, LIGA),
+    ('soccer_vietnam_v_league', 'V.League 1', 'Vietnam', ASIA, 1, MASC, LIGA),
+    ('soccer_malaysia_super_league', 'Super League', 'Malasia', ASIA, 1, MASC, LIGA),
+    ('soccer_singapore_premier_league', 'Premier League', 'Singapur', ASIA, 1, MASC, LIGA),
+    ('soccer_indonesia_liga_1', 'Liga 1', 'Indonesia', ASIA, 1, MASC, LIGA),
+    ('soccer_philippines_pfl', 'Philippines Football League', 'Filipinas', ASIA, 1, MASC, LIGA),
+    ('soccer_india_super_league', 'Indian Super League', 'India', ASIA, 1, MASC, LIGA),
+    ('soccer_afc_asian_cup', 'Copa Asiática AFC', None, ASIA, None, MASC, SELECCIONES),
+    ('soccer_afc_wc_qualification', 'Clasificación Mundial AFC', None, ASIA, None, MASC, SELECCIONES),
+
+    # --- LIGAS AFRICANAS ---
+    ('soccer_south_africa_premier_division', 'Premier Division', 'Sudáfrica', AFRICA, 1, MASC, LIGA),
+    ('soccer_egypt_premier_league', 'Premier League', 'Egipto', AFRICA, 1, MASC, LIGA),
+    ('soccer_morocco_gnf_1', 'Botola Pro', 'Marruecos', AFRICA, 1, MASC, LIGA),
+    ('soccer_tunisia_ligue_1', 'Ligue 1', 'Túnez', AFRICA, 1, MASC, LIGA),
+    ('soccer_algeria_ligue_1', 'Ligue 1', 'Argelia', AFRICA, 1, MASC, LIGA),
+    ('soccer_nigeria_npfl', 'Nigeria Professional Football League', 'Nigeria', AFRICA, 1, MASC, LIGA),
+    ('soccer_ghana_premier_league', 'Premier League', 'Ghana', AFRICA, 1, MASC, LIGA),
+    ('soccer_kenya_premier_league', 'Premier League', 'Kenia', AFRICA, 1, MASC, LIGA),
+    ('soccer_uganda_premier_league', 'Premier League', 'Uganda', AFRICA, 1, MASC, LIGA),
+    ('soccer_tanzania_premier_league', 'Premier League', 'Tanzania', AFRICA, 1, MASC, LIGA),
+    ('soccer_zambia_super_league', 'Super League', 'Zambia', AFRICA, 1, MASC, LIGA),
+    ('soccer_zimbabwe_premier_league', 'Premier League', 'Zimbabwe', AFRICA, 1, MASC, LIGA),
+    ('soccer_caf_champions_league', 'Champions League CAF', None, AFRICA, None, MASC, COPA),
+    ('soccer_caf_confederation_cup', 'Copa Confederación CAF', None, AFRICA, None, MASC, COPA),
+    ('soccer_caf_african_cup_of_nations', 'Copa Africana de Naciones', None, AFRICA, None, MASC, SELECCIONES),
+    ('soccer_caf_wc_qualification', 'Clasificación Mundial CAF', None, AFRICA, None, MASC, SELECCIONES),
+
+    # --- OTRAS COMPETICIONES INTERNACIONALES ---
+    ('soccer_fifa_world_cup', 'Copa del Mundo FIFA', None, INTERNACIONAL, None, MASC, SELECCIONES),
+    ('soccer_fifa_world_cup_qualification', 'Clasificación Copa del Mundo', None, INTERNACIONAL, None, MASC, SELECCIONES),
+    ('soccer_fifa_confederations_cup', 'Copa Confederaciones FIFA', None, INTERNACIONAL, None, MASC, SELECCIONES),
+    ('soccer_fifa_club_world_cup', 'Copa del Mundo de Clubes FIFA', None, INTERNACIONAL, None, MASC, COPA),
+    ('soccer_fifa_womens_world_cup', 'Copa del Mundo Femenina FIFA', None, INTERNACIONAL, None, FEM, SELECCIONES),
+    ('soccer_olympics_mens', 'Juegos Olímpicos (masculino)', None, INTERNACIONAL, None, MASC, SELECCIONES),
+    ('soccer_olympics_womens', 'Juegos Olímpicos (femenino)', None, INTERNACIONAL, None, FEM, SELECCIONES),
+
+    # --- LIGAS FEMENINAS ---
+    ('soccer_fa_wsl', "Women's Super League", 'Inglaterra', EUROPA, 1, FEM, LIGA),
+    ('soccer_nwsl', "National Women's Soccer League", 'Estados Unidos', NORTEAMERICA, 1, FEM, LIGA),
+    ('soccer_france_feminine_1', 'Première Ligue', 'Francia', EUROPA, 1, FEM, LIGA),
+    ('soccer_germany_frauen_bundesliga', 'Frauen-Bundesliga', 'Alemania', EUROPA, 1, FEM, LIGA),
+    ('soccer_spain_primera_federacion_femenina', 'Primera Federación Femenina', 'España', EUROPA, 1, FEM, LIGA),
+    ('soccer_italy_serie_a_femminile', 'Serie A Femminile', 'Italia', EUROPA, 1, FEM, LIGA),
+    ('soccer_netherlands_eredivisie_vrouwen', 'Eredivisie Vrouwen', 'Países Bajos', EUROPA, 1, FEM, LIGA),
+    ('soccer_sweden_damallsvenskan', 'Damallsvenskan', 'Suecia', EUROPA, 1, FEM, LIGA),
+    ('soccer_norway_toppserien', 'Toppserien', 'Noruega', EUROPA, 1, FEM, LIGA),
+    ('soccer_denmark_kvindeligaen', 'Kvindeligaen', 'Dinamarca', EUROPA, 1, FEM, LIGA),
+    ('soccer_australia_aleague_women', 'A-League Women', 'Australia', ASIA, 1, FEM, LIGA),
+    ('soccer_brazil_serie_a1_feminino', 'Série A1 Feminino', 'Brasil', SUDAMERICA, 1, FEM, LIGA),
+    ('soccer_uefa_womens_euro', 'Eurocopa Femenina UEFA', None, EUROPA, None, FEM, SELECCIONES),
+    ('soccer_uefa_womens_champions_league', 'Champions League Femenina UEFA', None, EUROPA, None, FEM, COPA),
+
+    # --- LIGAS MENORES Y REGIONALES ---
+    ('soccer_scotland_premiership', 'Premiership', 'Escocia', EUROPA, 1, MASC, LIGA),
+    ('soccer_scotland_championship', 'Championship', 'Escocia', EUROPA, 2, MASC, LIGA),
+    ('soccer_wales_premier_league', 'Premier League', 'Gales', EUROPA, 1, MASC, LIGA),
+    ('soccer_northern_ireland_premiership', 'Premiership', 'Irlanda del Norte', EUROPA, 1, MASC, LIGA),
+    ('soccer_ireland_premier_division', 'Premier Division', 'Irlanda', EUROPA, 1, MASC, LIGA),
+    ('soccer_iceland_urvalsdeild', 'Úrvalsdeild', 'Islandia', EUROPA, 1, MASC, LIGA),
+    ('soccer_faroe_islands_premier_league', 'Premier League', 'Islas Feroe', EUROPA, 1, MASC, LIGA),
+    ('soccer_luxembourg_bgl_ligue', 'BGL Ligue', 'Luxemburgo', EUROPA, 1, MASC, LIGA),
+    ('soccer_malta_premier_league', 'Premier League', 'Malta', EUROPA, 1, MASC, LIGA),
+    ('soccer_cyprus_first_division', 'First Division', 'Chipre', EUROPA, 1, MASC, LIGA),
+    ('soccer_latvia_virsliga', 'Virsliga', 'Letonia', EUROPA, 1, MASC, LIGA),
+    ('soccer_lithuania_a_lyga', 'A Lyga', 'Lituania', EUROPA, 1, MASC, LIGA),
+    ('soccer_estonia_meistriliiga', 'Meistriliiga', 'Estonia', EUROPA, 1, MASC, LIGA),
+    ('soccer_albania_kategoria_superiore', 'Kategoria Superiore', 'Albania', EUROPA, 1, MASC, LIGA),
+    ('soccer_north_macedonia_first_league', 'First League', 'Macedonia del Norte', EUROPA, 1, MASC, LIGA),
+    ('soccer_montenegro_first_league', 'First League', 'Montenegro', EUROPA, 1, MASC, LIGA),
+    ('soccer_bosnia_premier_league', 'Premier League', 'Bosnia y Herzegovina', EUROPA, 1, MASC, LIGA),
+    ('soccer_kosovo_superliga', 'Superliga', 'Kosovo', EUROPA, 1, MASC, LIGA),
+    ('soccer_moldova_super_liga', 'Super Liga', 'Moldavia', EUROPA, 1, MASC, LIGA),
+    ('soccer_georgia_erovnuli_liga', 'Erovnuli Liga', 'Georgia', EUROPA, 1, MASC, LIGA),
+    ('soccer_armenia_premier_league', 'Premier League', 'Armenia', EUROPA, 1, MASC, LIGA),
+    ('soccer_azerbaijan_premier_league', 'Premier League', 'Azerbaiyán', EUROPA, 1, MASC, LIGA),
+    ('soccer_kazakhstan_premier_league', 'Premier League', 'Kazajistán', EUROPA, 1, MASC, LIGA),
+    ('soccer_uzbekistan_super_league', 'Super League', 'Uzbekistán', ASIA, 1, MASC, LIGA),
+    ('soccer_kyrgyzstan_top_league', 'Top League', 'Kirguistán', ASIA, 1, MASC, LIGA),
+    ('soccer_tajikistan_higher_league', 'Higher League', 'Tayikistán', ASIA, 1, MASC, LIGA),
+    ('soccer_turkmenistan_yokary_liga', 'Yokary Liga', 'Turkmenistán', ASIA, 1, MASC, LIGA),
+    ('soccer_afghanistan_premier_league', 'Premier League', 'Afganistán', ASIA, 1, MASC, LIGA),
+    ('soccer_bangladesh_premier_league', 'Premier League', 'Bangladesh', ASIA, 1, MASC, LIGA),
+    ('soccer_bhutan_premier_league', 'Premier League', 'Bután', ASIA, 1, MASC, LIGA),
+    ('soccer_cambodia_premier_league', 'Premier League', 'Camboya', ASIA, 1, MASC, LIGA),
+    ('soccer_laos_premier_league', 'Premier League', 'Laos', ASIA, 1, MASC, LIGA),
+    ('soccer_myanmar_national_league', 'National League', 'Myanmar', ASIA, 1, MASC, LIGA),
+    ('soccer_nepal_super_league', 'Super League', 'Nepal', ASIA, 1, MASC, LIGA),
+    ('soccer_sri_lanka_premier_league', 'Premier League', 'Sri Lanka', ASIA, 1, MASC, LIGA),
+    ('soccer_maldives_premier_league', 'Premier League', 'Maldivas', ASIA, 1, MASC, LIGA),
+    ('soccer_pakistan_premier_league', 'Premier League', 'Pakistán', ASIA, 1, MASC, LIGA),
+
+    # --- COMPETICIONES DE CLUBES ESPECIALES ---
+    ('soccer_friendlies', 'Partidos amistosos', None, INTERNACIONAL, None, MASC, AMISTOSOS),
+    ('soccer_friendlies_clubs', 'Amistosos de clubes', None, INTERNACIONAL, None, MASC, AMISTOSOS),
+    ('soccer_friendlies_womens', 'Amistosos femeninos', None, INTERNACIONAL, None, FEM, AMISTOSOS),
+    ('soccer_youth_league', 'UEFA Youth League', None, EUROPA, None, MASC, JUVENIL),
+    ('soccer_europa_league_qualifying', 'Clasificación Europa League', None, EUROPA, None, MASC, COPA),
+    ('soccer_champions_league_qualifying', 'Clasificación Champions League', None, EUROPA, None, MASC, COPA),
+    ('soccer_conference_league_qualifying', 'Clasificación Conference League', None, EUROPA, None, MASC, COPA),
+]
+
+class RegistroLigas:
+    """Ligas por clave con índices por región, país, nivel, género y tipo"""
+
+    def __init__(self, filas):
+        self._ligas = {}
+        self._indices = {atributo: {} for atributo in ATRIBUTOS}
+        for fila in filas:
+            liga = Liga(*fila)
+            self._ligas[liga.clave] = liga
+            for atributo in ATRIBUTOS:
+                self._indices[atributo].setdefault(getattr(liga, atributo), []).append(liga.clave)
+
+    def claves(self):
+        """Claves de todas las ligas en el orden del registro"""
+        return list(self._ligas)
+
+    def __contains__(self, clave):
+        return clave in self._ligas
+
+    def __len__(self):
+        return len(self._ligas)
+
+    def get(self, clave):
+        """Atributos de una liga; las claves que no están en el registro van a OTRAS"""
+        liga = self._ligas.get(clave)
+        return liga if liga is not None else Liga(clave, clave, None, OTRAS, None, None, None)
+
+    def agrupar(self, atributo, claves=None):
+        """{valor: [claves]} para un atributo, solo de las claves dadas si se indican"""
+        if claves is None:
+            return {valor: list(grupo) for valor, grupo in self._indices[atributo].items()}
+        grupos = {}
+        for clave in claves:
+            grupos.setdefault(getattr(self.get(clave), atributo), []).append(clave)
+        return grupos
+
+    def filtrar(self, claves=None, **criterios):
+        """Claves que cumplen todos los criterios (atributo=valor o atributo=[valores]), en su orden"""
+        seleccion = None
+        for atributo, valores in criterios.items():
+            if valores is None:
+                continue
+            if isinstance(valores, (str, int)):
+                valores = [valores]
+            indice = self._indices[atributo]
+            coinciden = {clave for valor in valores for clave in indice.get(valor, ())}
+            seleccion = coinciden if seleccion is None else seleccion & coinciden
+        claves = self.claves() if claves is None else claves
+        return list(claves) if seleccion is None else [clave for clave in claves if clave in seleccion]
+
+# Registro del proceso
+registro = RegistroLigas(LIGAS)
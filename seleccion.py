@@ -0,0 +1,54 @@
+import heapq
+
+# --- SELECCIÓN EN STREAMING DE LOS K MEJORES PARTIDOS ---
+# Un heap acotado a K elementos consume los partidos liga a liga según llegan,
+# de modo que la memoria no depende del número total de partidos y el top-K
+# provisional está disponible en cualquier momento.
+
+# Criterios de desempate tras la cuota (menor cuota = más probable)
+CRITERIOS_DESEMPATE = {
+    'probabilidad': lambda p: -p['probabilidad_implicita'],  # mayor probabilidad de consenso primero
+    'fecha': lambda p: p['fecha_objeto'],                    # partido más cercano primero
+    'casas': lambda p: -p.get('num_casas', 0),              # más casas cotizando primero
+}
+
+class _Candidato:
+    """Entrada del heap con el orden invertido: en la cima queda el peor de los K"""
+    __slots__ = ('clave', 'partido')
+
+    def __init__(self, clave, partido):
+        self.clave = clave
+        self.partido = partido
+
+    def __lt__(self, otro):
+        return self.clave > otro.clave
+
+class SelectorTopK:
+    """Mantiene los K partidos de menor cuota vistos hasta ahora"""
+
+    def __init__(self, k=5, desempate=('probabilidad', 'fecha')):
+        self.k = k
+        self.criterios = [CRITERIOS_DESEMPATE[c] for c in desempate]
+        self.total = 0
+        self._heap = []
+
+    def clave(self, partido):
+        """Clave de ordenación: cuota, desempates configurados y, por último, el id"""
+        return (partido['cuota'], *(criterio(partido) for criterio in self.criterios), partido['id'])
+
+    def agregar(self, partidos):
+        """Consume un lote de partidos procesados (normalmente los de una liga)"""
+        for partido in partidos:
+            self.total += 1
+            candidato = _Candidato(self.clave(partido), partido)
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, candidato)
+            elif candidato.clave < self._heap[0].clave:
+                heapq.heapreplace(self._heap, candidato)
+
+    def mejores(self):
+        """Top-K actual ordenado de mejor a peor"""
+        return [c.partido for c in sorted(self._heap, key=lambda c: c.clave)]
+
+    def __len__(self):
+        return len(self._heap)
@@ -0,0 +1,167 @@
+"""Modo sin interfaz del predictor: pronóstico puntual o servicio que se repite a intervalos.
+
+Ejemplos:
+    python servicio.py pronostico --top 5 --dias 7 --salida pronosticos.json
+    python servicio.py pronostico --ligas soccer_epl,soccer_spain_la_liga --no-guardar
+    python servicio.py pronostico --region Europa --nivel 1
+    python servicio.py demonio --intervalo 3600
+    python servicio.py liquidar --importar marcadores.csv
+    python servicio.py backtest --top 3,5 --cuota-max 2.0,3.0 --dias 2,7
+"""
+import argparse
+import signal
+import sys
+import threading
+from datetime import date, datetime
+
+import backend
+from archivos import escribir_json_atomico
+
+def serializar(partido):
+    """Partido procesado -> dict apto para JSON"""
+    return {clave: valor for clave, valor in partido.items() if clave != 'fecha_objeto'}
+
+def ejecutar_ciclo(args):
+    """Calcula el pronóstico, lo guarda en el historial y en --salida; devuelve los partidos"""
+    fecha_hoy = date.today()
+    fecha_str = fecha_hoy.strftime('%Y-%m-%d')
+    historial = backend.cargar_historial()
+    deportes = args.ligas.split(',') if args.ligas else None
+    if args.region or args.nivel:
+        # Filtro sobre el registro de ligas; de las elegidas solo se consultan las activas
+        deportes = backend.deportes_a_consultar(
+            backend.registro_ligas.filtrar(deportes, region=args.region, nivel=args.nivel))
+
+    top_partidos, resumen = backend.calcular_pronostico(args.top, args.dias, deportes, historial, fecha_hoy)
+
+    guardados = []
+    if args.guardar:
+        # Nunca más de --top pronósticos por día aunque el ciclo se repita o la app guarde a la vez
+        guardados = backend.registrar_pronosticos(top_partidos, fecha_str, maximo=args.top)
+
+    if args.salida:
+        escribir_json_atomico(args.salida, {
+            'fecha': fecha_str,
+            'generado': datetime.now().isoformat(timespec='seconds'),
+            'ligas_activas': len(resumen['ligas_activas']),
+            'partidos_encontrados': resumen['partidos_encontrados'],
+            'pronosticos': [serializar(p) for p in top_partidos],
+        }, indent=2)
+
+    print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {len(resumen['ligas_activas'])} ligas activas, "
+          f"{resumen['partidos_encontrados']} partidos nuevos, {len(guardados)} pronósticos guardados")
+    return top_partidos
+
+def comando_pronostico(args):
+    top_partidos = ejecutar_ciclo(args)
+    for i, p in enumerate(top_partidos, 1):
+        print(f"{i}. {p['equipos']} ({p['liga']}) - {p['resultado_probable']} @ {p['cuota']}")
+    return 0
+
+def comando_demonio(args):
+    if args.puerto_metricas:
+        backend.metricas.servir(args.puerto_metricas, host=args.host_metricas)
+        print(f"Métricas en http://{args.host_metricas}:{args.puerto_metricas}/metrics")
+
+    parar = threading.Event()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(senal, lambda *_: parar.set())
+
+    # El proceso no termina entre ciclos: la sesión HTTP y la caché en memoria siguen calientes
+    ciclo = 0
+    while not parar.is_set():
+        ciclo += 1
+        try:
+            ejecutar_ciclo(args)
+        except backend.ConfiguracionError:
+            raise
+        except Exception as e:
+            print(f"Error en el ciclo {ciclo}: {e}", file=sys.stderr)
+        if args.ciclos and ciclo >= args.ciclos:
+            break
+        parar.wait(args.intervalo)
+    return 0
+
+def comando_liquidar(args):
+    if args.importar:
+        liquidados, pendientes = backend.importar_marcadores(args.importar)
+    else:
+        liquidados, pendientes = backend.liquidar_pronosticos(args.dias)
+    print(f"{liquidados} pronósticos liquidados, {pendientes} sin resultado todavía")
+
+    rendimiento = backend.rendimiento_historial()
+    if rendimiento is not None:
+        total, por_liga, calibracion = rendimiento
+        print(total.to_string(index=False))
+        print(por_liga.to_string())
+        print(calibracion.to_string())
+    return 0
+
+def lista(tipo):
+    """Argumento con uno o varios valores separados por comas"""
+    return lambda texto: [tipo(valor) for valor in texto.split(',')]
+
+def comando_backtest(args):
+    from backtest import MERCADO
+    
+    # Todas las combinaciones de los valores dados se prueban sobre la misma preparación
+    reglas = [
+        {'k': k, 'dias': dias, 'cuota_min': cuota_min, 'cuota_max': cuota_max}
+        for k in args.top for dias in args.dias for cuota_min in args.cuota_min for cuota_max in args.cuota_max
+    ]
+    tabla = backend.backtest_reglas(reglas, args.desde, args.hasta)
+    otros = [mercado for mercado in backend.MARKETS.split(',') if mercado != MERCADO]
+    if otros:
+        print(f"ℹ️  Backtest solo del mercado 1X2 ({MERCADO}): las instantáneas no guardan {', '.join(otros)}, "
+              f"que el pronóstico en vivo también evalúa (MARKETS = '{backend.MARKETS}').")
+    if 'roi' in tabla:
+        tabla = tabla.sort_values('roi', ascending=False)
+    print(tabla.to_string(index=False))
+    return 0
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Predictor de fútbol sin interfaz")
+    comun = argparse.ArgumentParser(add_help=False)
+    comun.add_argument('--top', type=int, default=backend.TOP_K, help="partidos por pronóstico")
+    comun.add_argument('--dias', type=int, default=backend.DIAS_VENTANA, help="días hacia delante")
+    comun.add_argument('--ligas', help="claves de liga separadas por comas (por defecto, todas las activas)")
+    comun.add_argument('--region', type=lista(str), help="solo ligas de estas regiones (p. ej. Europa,Sudamérica)")
+    comun.add_argument('--nivel', type=lista(int), help="solo estas divisiones (p. ej. 1 para primeras divisiones)")
+    comun.add_argument('--salida', help="archivo JSON donde escribir el pronóstico")
+    comun.add_argument('--no-guardar', dest='guardar', action='store_false', help="no escribir en el historial")
+
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    pronostico = subparsers.add_parser('pronostico', parents=[comun], help="genera un pronóstico y termina")
+    pronostico.set_defaults(funcion=comando_pronostico)
+    demonio = subparsers.add_parser('demonio', parents=[comun], help="repite el pronóstico a intervalos")
+    demonio.add_argument('--intervalo', type=float, default=3600, help="segundos entre ciclos")
+    demonio.add_argument('--ciclos', type=int, default=0, help="número de ciclos (0 = sin límite)")
+    demonio.add_argument('--puerto-metricas', type=int, help="sirve /metrics (Prometheus) y /metrics.json en este puerto")
+    demonio.add_argument('--host-metricas', default='127.0.0.1', help="interfaz del servidor de métricas")
+    demonio.set_defaults(funcion=comando_demonio)
+
+    liquidar = subparsers.add_parser('liquidar', help="marca los pronósticos ganados o perdidos y muestra el rendimiento")
+    liquidar.add_argument('--dias', type=int, default=3, help="días de marcadores a pedir a la API (máximo 3)")
+    liquidar.add_argument('--importar', help="CSV con id (o home_team, away_team, fecha), goles_local y goles_visitante")
+    liquidar.set_defaults(funcion=comando_liquidar)
+
+    backtest = subparsers.add_parser('backtest', help="compara reglas de selección sobre las instantáneas guardadas (solo 1X2)")
+    backtest.add_argument('--top', type=lista(int), default=[backend.TOP_K], help="partidos por día (p. ej. 3,5)")
+    backtest.add_argument('--dias', type=lista(int), default=[backend.DIAS_VENTANA], help="días hacia delante")
+    backtest.add_argument('--cuota-min', type=lista(float), default=[1.0], help="cuota mínima")
+    backtest.add_argument('--cuota-max', type=lista(float), default=[float('inf')], help="cuota máxima")
+    backtest.add_argument('--desde', help="primera fecha de partido (YYYY-MM-DD)")
+    backtest.add_argument('--hasta', help="última fecha de partido (YYYY-MM-DD)")
+    backtest.set_defaults(funcion=comando_backtest)
+    return parser
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    try:
+        return args.funcion(args)
+    except backend.ConfiguracionError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+if __name__ == '__main__':
+    sys.exit(main())